@@ -0,0 +1,55 @@
+import os
+import statistics
+import sys
+import time
+
+# Shared helpers for the benchmark scripts
+# Benchmarks run against a throwaway database (BENCH_MONGODB_URI, default
+# localhost) so they never touch the application data. Run them from
+# backend/, e.g. `python -m benchmarks.bench_search`.
+
+BENCH_MONGODB_URI = os.getenv("BENCH_MONGODB_URI", "mongodb://localhost:27017")
+BENCH_DATABASE = os.getenv("BENCH_DATABASE", "svpams_benchmark")
+
+# utils modules import config.db and utils.render_cache, which require these;
+# point them at the benchmark database
+os.environ.setdefault("MONGODB_URI", BENCH_MONGODB_URI)
+os.environ.setdefault("DATABASE_NAME", BENCH_DATABASE)
+os.environ.setdefault("PUBLIC_API_BASE_URL", "http://localhost:8000")
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def bench_db():
+    from pymongo import MongoClient
+    return MongoClient(BENCH_MONGODB_URI)[BENCH_DATABASE]
+
+
+def timed(fn, repeat: int) -> dict:
+    """Run fn `repeat` times; returns latency stats in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "p50": statistics.median(samples),
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "mean": statistics.fmean(samples),
+    }
+
+
+def print_table(title: str, rows: list, columns: list):
+    """Print rows (dicts) as an aligned table"""
+    print(f"\n{title}")
+    widths = [max(len(c), *(len(_fmt(r.get(c))) for r in rows)) for c in columns]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(_fmt(row.get(c)).ljust(w) for c, w in zip(columns, widths)))
+
+
+def _fmt(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return "" if value is None else str(value)
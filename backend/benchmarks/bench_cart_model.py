@@ -0,0 +1,96 @@
+"""
+Cart detector latency and memory per inference backend.
+
+Each backend (PyTorch, ONNX Runtime, OpenVINO; optionally INT8) runs in its
+own process so peak memory is not shared. Reports export/load time, p50/p95
+predict latency, peak RSS and whether the exported model's detections match
+PyTorch on the same image (the check load_cart_model runs at startup; a
+mismatching backend would not be served). Needs secrets_backend/best.pt and
+an image.
+
+    python -m benchmarks.bench_cart_model --image cart.jpg --repeat 50 --int8
+"""
+import argparse
+import multiprocessing
+import resource
+import time
+
+from benchmarks._common import timed, print_table
+
+BACKENDS = ["pytorch", "onnx", "openvino"]
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_backend(backend: str, int8: bool, image_path: str, repeat: int, warmup: int) -> dict:
+    """Load one backend and time it (runs inside a fresh process)"""
+    import cv2
+    from ultralytics import YOLO
+    from utils.cart_detector import PYTORCH_MODEL_PATH, cart_model_imgsz, compare_with_pytorch, export_cart_model
+
+    baseline = _peak_rss_mb()
+    image = cv2.imread(image_path)
+    if image is None:
+        raise ValueError(f"Could not read image: {image_path}")
+    imgsz = cart_model_imgsz()
+
+    started = time.perf_counter()
+    if backend == "pytorch":
+        model = YOLO(PYTORCH_MODEL_PATH)
+    else:
+        model = YOLO(export_cart_model(backend, int8), task="detect")
+    for _ in range(warmup):
+        model(image, imgsz=imgsz, verbose=False)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    latency = timed(lambda: model(image, imgsz=imgsz, verbose=False), repeat)
+    result = {
+        "load+warmup ms": load_ms,
+        "p50 ms": latency["p50"],
+        "p95 ms": latency["p95"],
+        "peak rss MB": _peak_rss_mb(),
+        "model rss MB": _peak_rss_mb() - baseline,
+    }
+
+    # After the memory readings: the check loads the PyTorch model as well
+    if backend == "pytorch":
+        result["parity"] = "reference"
+    else:
+        parity = compare_with_pytorch(model, image)
+        result["parity"] = "ok" if parity["matches"] else f"MISMATCH: {parity['mismatches'][0]}"[:60]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--image", required=True, help="cart photo to run inference on")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--int8", action="store_true", help="also run the INT8 exports")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    args = parser.parse_args()
+
+    variants = [(b, False) for b in args.backends.split(",")]
+    if args.int8:
+        variants += [(b, True) for b in args.backends.split(",") if b != "pytorch"]
+
+    rows = []
+    context = multiprocessing.get_context("spawn")
+    for backend, int8 in variants:
+        name = f"{backend}{' int8' if int8 else ''}"
+        with context.Pool(1) as pool:
+            try:
+                result = pool.apply(run_backend, (backend, int8, args.image, args.repeat, args.warmup))
+            except Exception as e:
+                result = {"error": str(e)[:60]}
+        rows.append({"backend": name, **result})
+
+    print_table(f"Cart detector, {args.repeat} predictions per backend", rows,
+                ["backend", "load+warmup ms", "p50 ms", "p95 ms", "peak rss MB", "model rss MB", "parity", "error"])
+
+
+if __name__ == "__main__":
+    main()
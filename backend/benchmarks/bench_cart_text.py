@@ -0,0 +1,108 @@
+"""
+Cart registry / email extraction micro-benchmark on synthetic OCR fixtures.
+
+Checks CartTextExtractor and the previous regex-per-field implementation
+against the expected values in fixtures/cart_ocr.json, then times both per
+call. Needs no database or OCR backend.
+
+The fixtures are hand-written, not recorded from real cart photos: the text
+imitates cart signs and the detected_texts follow the run_ocr result shape
+(confidences on the 0-100 scale, boxes laid out line by line). They cover
+the extraction branches, not real OCR noise.
+
+    python -m benchmarks.bench_cart_text --number 20000
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import timeit
+
+from benchmarks._common import print_table
+from utils.cart_text_extractor import CartTextExtractor
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "cart_ocr.json")
+CHECKED_FIELDS = ("cart_registry_no", "sanitary_email", "is_pasig_cart")
+
+legacy_logger = logging.getLogger("benchmarks.legacy_extraction")
+
+
+def legacy_extract(full_text: str, detected_texts: list) -> dict:
+    """Extraction as it was before CartTextExtractor (baseline)"""
+    cart_registry_no = None
+    sanitary_email = None
+    cart_registry_pattern = r'CART\s*REGISTRY\s*(?:NO|NUMBER)\.?\s*:?\s*(\d{4})'
+    standalone_number_pattern = r'\b(\d{4})\b'
+    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+
+    cart_match = re.search(cart_registry_pattern, full_text, re.IGNORECASE)
+    if cart_match:
+        cart_registry_no = cart_match.group(1)
+
+    if not cart_registry_no:
+        sorted_texts = sorted(detected_texts, key=lambda x: (x.get('box', [0, 0, 0, 0])[1], x.get('box', [0, 0, 0, 0])[0]))
+        for i, text_obj in enumerate(sorted_texts):
+            if re.search(r'CART\s*REGISTRY', text_obj.get("text", ""), re.IGNORECASE):
+                for j in range(i + 1, min(i + 4, len(sorted_texts))):
+                    number_match = re.search(standalone_number_pattern, sorted_texts[j].get("text", ""))
+                    if number_match:
+                        cart_registry_no = number_match.group(1)
+                        break
+                if cart_registry_no:
+                    break
+
+    if not cart_registry_no:
+        for num in re.findall(standalone_number_pattern, full_text):
+            if num not in ('8643', '1111', '1531'):
+                cart_registry_no = num
+                break
+
+    email_match = re.search(email_pattern, full_text)
+    if email_match:
+        sanitary_email = email_match.group(0).lower()
+
+    is_pasig_cart = bool(re.search(r'PASIG', full_text, re.IGNORECASE))
+
+    legacy_logger.info(f"Full detected text: {full_text}")
+    legacy_logger.info(f"All detected numbers: {re.findall(standalone_number_pattern, full_text)}")
+
+    return {
+        "cart_registry_no": cart_registry_no,
+        "sanitary_email": sanitary_email,
+        "is_pasig_cart": is_pasig_cart,
+        "has_required_info": bool(cart_registry_no and sanitary_email)
+    }
+
+
+def mismatches(result: dict, expected: dict) -> list:
+    return [f"{field}={result.get(field)!r}" for field in CHECKED_FIELDS if result.get(field) != expected.get(field)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=20000, help="calls per fixture and implementation")
+    args = parser.parse_args()
+
+    with open(FIXTURES) as f:
+        fixtures = json.load(f)
+    extractor = CartTextExtractor(phone_exclusions=["8643", "1111", "1531"])
+    implementations = {"legacy": legacy_extract, "extractor": extractor.extract}
+
+    rows = []
+    for fixture in fixtures:
+        row = {"fixture": fixture["name"], "chars": len(fixture["full_text"]), "tokens": len(fixture["detected_texts"])}
+        for name, extract in implementations.items():
+            wrong = mismatches(extract(fixture["full_text"], fixture["detected_texts"]), fixture["expected"])
+            seconds = timeit.timeit(lambda: extract(fixture["full_text"], fixture["detected_texts"]), number=args.number)
+            row[f"{name} us"] = seconds / args.number * 1e6
+            row[f"{name} ok"] = "yes" if not wrong else ", ".join(wrong)
+        row["speedup"] = row["legacy us"] / row["extractor us"]
+        rows.append(row)
+
+    print_table(f"Cart text extraction ({args.number} calls per fixture, microseconds per call)", rows,
+                ["fixture", "chars", "tokens", "legacy us", "extractor us", "speedup", "legacy ok", "extractor ok"])
+
+
+if __name__ == "__main__":
+    main()
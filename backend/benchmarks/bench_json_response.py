@@ -0,0 +1,157 @@
+"""
+Serialization cost of large list responses: legacy vs MongoJSONResponse.
+
+Builds synthetic document_submissions and vendor_carts pages shaped like the
+stored records, then times the previous path (per-document stringify loop,
+jsonable_encoder, JSONResponse) and MongoJSONResponse on both the full
+documents and the projected listing documents, so the serializer's effect is
+visible separately from the projection's. Needs no database.
+
+    python -m benchmarks.bench_json_response --rows 1000 --repeat 20
+"""
+import argparse
+import copy
+import random
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from benchmarks._common import timed, print_table
+from models.vendor_carts import CART_LIST_PROJECTION
+from utils.json_response import MongoJSONResponse
+from utils.submission_artifacts import SUMMARY_PROJECTION
+
+
+def make_submission(rng: random.Random, index: int) -> dict:
+    files = rng.randint(1, 3)
+    return {
+        "_id": ObjectId(),
+        "user_id": ObjectId(),
+        "base_document_id": ObjectId(),
+        "user_email": f"vendor{index}@example.com",
+        "filenames": [f"permit_{index}_{f}.jpg" for f in range(files)],
+        "file_url_original": [f"https://res.cloudinary.com/demo/image/upload/v1/docs/{index}_{f}.jpg" for f in range(files)],
+        "file_hash": [f"{rng.getrandbits(256):064x}" for _ in range(files)],
+        "gemini_reason": "Document matches the required barangay clearance layout.",
+        "ai_prediction_label": 1,
+        "ai_confidence_score": rng.random(),
+        "status": "needs_review",
+        "submitted_at": datetime(2025, 1, 1) + timedelta(minutes=index),
+        "reviewed_at": None,
+        "reviewed_by": None,
+        "admin_notes": "",
+        # Embedded artifacts of records written before the artifacts split
+        "gemini_details": [{"file": f, "label": 1, "score": rng.random(), "reason": "ok " * 20} for f in range(files)],
+        "bounding_boxes": [{"words": [
+            {"text": f"w{w}", "confidence": 0.9, "vertices": [{"x": w, "y": w}] * 4} for w in range(150)
+        ]} for _ in range(files)],
+    }
+
+
+def make_cart(rng: random.Random, index: int) -> dict:
+    return {
+        "_id": ObjectId(),
+        "user_id": str(ObjectId()),
+        "original_image_url": f"https://res.cloudinary.com/demo/image/upload/v1/carts/{index}.jpg",
+        "postprocessed_image_url": f"/api/vendor/carts/vendor/cart-records/{index}/annotated",
+        "predictions": [{"class_id": 0, "confidence": rng.random(), "box": [10.0, 20.0, 300.0, 400.0]}],
+        "classification": "pasig_cart",
+        "confidence": rng.random(),
+        "text_detection": {
+            "full_text": "CART REGISTRY NO 0427 PASIG CITY " * 4,
+            "detected_texts": [{"text": f"t{t}", "confidence": 0.9, "box": [t, t, t + 20, t + 10]} for t in range(120)],
+        },
+        "cart_registry_no": "0427",
+        "sanitary_email": f"vendor{index}@example.com",
+        "status": "Pending",
+        "created_at": (datetime(2025, 1, 1) + timedelta(minutes=index)).isoformat(),
+    }
+
+
+def project(doc: dict, projection: dict) -> dict:
+    """Apply an exclusion projection the way Mongo does (top-level and dotted fields)"""
+    doc = copy.deepcopy(doc)
+    for field in projection:
+        parent, _, leaf = field.rpartition(".")
+        target = doc.get(parent) if parent else doc
+        if isinstance(target, dict):
+            target.pop(leaf, None)
+    return doc
+
+
+def legacy_submissions(rows: list) -> bytes:
+    for sub in rows:
+        sub["_id"] = str(sub["_id"])
+        sub["user_id"] = str(sub["user_id"])
+        sub["base_document_id"] = str(sub["base_document_id"])
+        sub["submitted_at"] = sub["submitted_at"].isoformat()
+        if sub.get("reviewed_at"):
+            sub["reviewed_at"] = sub["reviewed_at"].isoformat()
+    return JSONResponse(jsonable_encoder({"success": True, "submissions": rows})).body
+
+
+def legacy_carts(rows: list) -> bytes:
+    for cart in rows:
+        cart["_id"] = str(cart["_id"])
+    return JSONResponse(jsonable_encoder({"records": rows, "total": len(rows)})).body
+
+
+def fresh_copies(rows: list, count: int) -> list:
+    """
+    Inputs for `count` runs of a legacy serializer, built before timing.
+    The legacy loops only reassign top-level fields, so a shallow copy of
+    each document is a fresh input.
+    """
+    return [[dict(row) for row in rows] for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(50)
+    submissions = [make_submission(rng, i) for i in range(args.rows)]
+    carts = [make_cart(rng, i) for i in range(args.rows)]
+    listed_submissions = [project(s, SUMMARY_PROJECTION) for s in submissions]
+    listed_carts = [project(c, CART_LIST_PROJECTION) for c in carts]
+
+    serializers = {
+        "submissions": (
+            legacy_submissions,
+            lambda docs: MongoJSONResponse({"success": True, "submissions": docs}).body,
+        ),
+        "carts": (
+            legacy_carts,
+            lambda docs: MongoJSONResponse({"records": docs, "total": len(docs)}).body,
+        ),
+    }
+    datasets = [
+        ("submissions", "full docs", submissions),
+        ("submissions", "projected", listed_submissions),
+        ("carts", "full docs", carts),
+        ("carts", "projected", listed_carts),
+    ]
+
+    rows = []
+    for kind, shape, docs in datasets:
+        legacy, orjson_body = serializers[kind]
+
+        # Legacy mutates its input: one fresh copy per run (+1 for the size)
+        copies = fresh_copies(docs, args.repeat + 1)
+        stats = timed(lambda: legacy(copies.pop()), args.repeat)
+        rows.append({"response": f"{kind}, legacy ({shape})", "p50 ms": stats["p50"], "p95 ms": stats["p95"],
+                     "bytes": len(legacy(copies.pop()))})
+
+        stats = timed(lambda: orjson_body(docs), args.repeat)
+        rows.append({"response": f"{kind}, orjson ({shape})", "p50 ms": stats["p50"], "p95 ms": stats["p95"],
+                     "bytes": len(orjson_body(docs))})
+
+    print_table(f"List response serialization, {args.rows} documents", rows, ["response", "p50 ms", "p95 ms", "bytes"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Admin user search latency: legacy $regex $or scan vs the prefix search index.
+
+Seeds N synthetic users (default 100k) into the benchmark database, then runs
+the same searches get_all_users runs (count + ranked page) both ways and
+prints p50/p95 per query. Requires a reachable MongoDB (BENCH_MONGODB_URI).
+
+    python -m benchmarks.bench_search --users 100000 --repeat 20
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from benchmarks._common import bench_db, timed, print_table
+from utils.search_index import add_search_filter, ranked_pipeline, user_search_fields
+
+FIRST_NAMES = ["Juan", "Maria", "Jose", "Ana", "Mark", "Kristine", "Ramon", "Lourdes", "Niño", "Peña",
+               "Angelica", "Roberto", "Carmela", "Efren", "Rosario", "Julius", "Andrea", "Miguel"]
+LAST_NAMES = ["Dela Cruz", "Santos", "Reyes", "Garcia", "Mendoza", "Muñoz", "Bautista", "Villanueva",
+              "Castillo", "Aquino", "Ramos", "Torres", "Navarro", "Del Rosario", "Ocampo", "Salazar"]
+SEARCHES = ["j", "ma", "jua", "juan dela", "munoz", "muñoz", "villanueva", "maria santos", "zzz"]
+PAGE_SIZE = 10
+
+
+def seed_users(collection, count: int):
+    collection.drop()
+    rng = random.Random(26)
+    started = datetime(2024, 1, 1)
+    batch = []
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        user = {
+            "firstname": first,
+            "lastname": last,
+            "email": f"{first.lower()}.{last.lower().replace(' ', '')}{i}@example.com",
+            "role": "vendor" if i % 5 == 0 else "user",
+            "created_at": started + timedelta(minutes=i),
+        }
+        user.update(user_search_fields(user))
+        batch.append(user)
+        if len(batch) >= 5000:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+    collection.create_index([("search_tokens", 1), ("created_at", -1)], name="users_search_tokens")
+    collection.create_index([("created_at", -1)])
+
+
+def legacy_search(collection, search: str):
+    query = {"$or": [
+        {"firstname": {"$regex": search, "$options": "i"}},
+        {"lastname": {"$regex": search, "$options": "i"}},
+        {"email": {"$regex": search, "$options": "i"}},
+    ]}
+    collection.count_documents(query)
+    list(collection.find(query).skip(0).limit(PAGE_SIZE).sort("created_at", -1))
+
+
+def indexed_search(collection, search: str):
+    query = {}
+    terms = add_search_filter(query, search)
+    collection.count_documents(query)
+    list(collection.aggregate(ranked_pipeline(query, terms, {"created_at": -1}, 0, PAGE_SIZE), allowDiskUse=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="keep the seeded collection")
+    args = parser.parse_args()
+
+    collection = bench_db()["bench_users"]
+    print(f"Seeding {args.users} users...")
+    seed_users(collection, args.users)
+
+    rows = []
+    try:
+        for search in SEARCHES:
+            legacy = timed(lambda: legacy_search(collection, search), args.repeat)
+            indexed = timed(lambda: indexed_search(collection, search), args.repeat)
+            rows.append({
+                "search": search,
+                "regex p50": legacy["p50"], "regex p95": legacy["p95"],
+                "index p50": indexed["p50"], "index p95": indexed["p95"],
+                "speedup": legacy["p50"] / indexed["p50"] if indexed["p50"] else None,
+            })
+    finally:
+        if not args.keep:
+            collection.drop()
+
+    print_table(f"Admin user search, {args.users} users (ms, count + first page)", rows,
+                ["search", "regex p50", "regex p95", "index p50", "index p95", "speedup"])
+
+
+if __name__ == "__main__":
+    main()
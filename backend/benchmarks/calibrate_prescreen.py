@@ -0,0 +1,129 @@
+"""
+False-reject rate of the document pre-screen's blank and blur checks.
+
+Labelled samples come from either source:
+  --approved N  the latest N admin-approved document submissions (files a
+                reviewer accepted, so every local reject is a false reject).
+                Reads the application database (MONGODB_URI), read-only.
+  --dir PATH    a hand-labelled folder with readable/ and unreadable/
+                subfolders; also reports how many unreadable files are caught.
+
+Prints sharpness percentiles of readable files and the BLUR_THRESHOLD that
+keeps false rejects at or below --target.
+
+    python -m benchmarks.calibrate_prescreen --approved 500
+    python -m benchmarks.calibrate_prescreen --dir samples/
+"""
+import argparse
+import os
+
+from dotenv import load_dotenv
+
+# --approved reads the application database: load its settings before
+# _common defaults MONGODB_URI to the benchmark database
+load_dotenv(os.path.join(os.path.dirname(__file__), "../secrets_backend/.env"))
+
+from benchmarks._common import print_table  # noqa: E402
+
+_IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff")
+
+
+def _mime_type(name: str) -> str:
+    return "application/pdf" if name.lower().endswith(".pdf") else "image/jpeg"
+
+
+def approved_samples(limit: int):
+    """(name, bytes) of files on admin-approved submissions, newest first"""
+    import requests
+    from config.cloudinary_config import generate_signed_url
+    from config.db import db
+
+    cursor = db["document_submissions"].find(
+        {"status": "approved"}, {"file_url_original": 1}
+    ).sort("_id", -1)
+    count = 0
+    for submission in cursor:
+        for url in submission.get("file_url_original") or []:
+            if count >= limit:
+                return
+            response = requests.get(generate_signed_url(url), timeout=30)
+            if response.status_code != 200:
+                continue
+            count += 1
+            yield url, response.content
+
+
+def folder_samples(path: str):
+    """(name, bytes) of files in a folder"""
+    for name in sorted(os.listdir(path)):
+        if name.lower().endswith(_IMAGE_EXTENSIONS + (".pdf",)):
+            with open(os.path.join(path, name), "rb") as f:
+                yield name, f.read()
+
+
+def measure(samples) -> list:
+    """(stddev, sharpness) per decodable sample"""
+    from utils.document_prescreen import decode_document_image, image_sharpness
+
+    results = []
+    for name, content in samples:
+        image = decode_document_image(content, _mime_type(name))
+        if image is not None:
+            results.append((float(image.std()), image_sharpness(image)))
+    return results
+
+
+def _percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+def _rejected(metrics: tuple) -> bool:
+    from utils.document_prescreen import BLANK_STDDEV, BLUR_THRESHOLD
+    stddev, sharpness = metrics
+    return stddev < BLANK_STDDEV or sharpness < BLUR_THRESHOLD
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--approved", type=int, help="number of approved submission files to sample")
+    source.add_argument("--dir", help="folder with readable/ and unreadable/ subfolders")
+    parser.add_argument("--target", type=float, default=0.01, help="acceptable false-reject rate")
+    args = parser.parse_args()
+
+    from utils.document_prescreen import BLUR_THRESHOLD
+
+    if args.approved:
+        readable, unreadable = measure(approved_samples(args.approved)), []
+    else:
+        readable = measure(folder_samples(os.path.join(args.dir, "readable")))
+        unreadable_dir = os.path.join(args.dir, "unreadable")
+        unreadable = measure(folder_samples(unreadable_dir)) if os.path.isdir(unreadable_dir) else []
+
+    if not readable:
+        print("No readable samples decoded")
+        return
+
+    sharpness = [s for _, s in readable]
+    false_rejects = sum(1 for m in readable if _rejected(m))
+    rows = [{
+        "readable": len(readable),
+        "false rejects": false_rejects,
+        "false-reject %": 100.0 * false_rejects / len(readable),
+        "sharpness p1": _percentile(sharpness, 0.01),
+        "sharpness p5": _percentile(sharpness, 0.05),
+        "sharpness p50": _percentile(sharpness, 0.50),
+        f"threshold @{args.target:.0%}": _percentile(sharpness, args.target),
+    }]
+    columns = list(rows[0])
+    if unreadable:
+        caught = sum(1 for m in unreadable if _rejected(m))
+        rows[0].update({"unreadable": len(unreadable), "caught %": 100.0 * caught / len(unreadable)})
+        columns += ["unreadable", "caught %"]
+
+    print_table(f"Pre-screen at BLUR_THRESHOLD={BLUR_THRESHOLD}", rows, columns)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,44 @@ from config.db import db
 from bson import ObjectId
 import logging
 from datetime import datetime, timezone
-from utils.notification import send_notification
+from pymongo import UpdateOne
+from utils.notification_dispatcher import build_notification, enqueue_notifications
+from utils.token_registry import get_user_tokens, get_tokens_for_users
+from utils.gemini_util import verify_document_with_gemini
+from utils.status_audit import build_audit_entry, record_status_changes
+from utils.submission_artifacts import attach_artifacts, save_artifacts, delete_artifacts, SUMMARY_PROJECTION
 
 logger = logging.getLogger(__name__)
 
+VALID_REVIEW_STATUSES = ["approved", "rejected", "needs_review"]
+
+def build_status_notification(doc_title: str, new_status: str, admin_notes: str):
+    """Title and body of the push sent when a submission is reviewed"""
+    if new_status == "approved":
+        return "Document Approved ✅", f"Your '{doc_title}' has been approved!"
+    if new_status == "rejected":
+        return "Document Rejected ❌", f"Your '{doc_title}' was rejected. {admin_notes}"
+    return "Document Needs Review 🔍", f"Your '{doc_title}' needs review. {admin_notes}"
+
+def _is_admin_ref(reviewed_by) -> bool:
+    """reviewed_by holds an admin ObjectId (older records) rather than an email"""
+    return bool(reviewed_by) and not (isinstance(reviewed_by, str) and "@" in reviewed_by) and ObjectId.is_valid(reviewed_by)
+
+def _resolve_reviewers(submissions: list) -> list:
+    """Replace ObjectId reviewed_by values with the admin email (one query for the whole page)"""
+    admin_ids = {ObjectId(sub["reviewed_by"]) for sub in submissions if _is_admin_ref(sub.get("reviewed_by"))}
+    if not admin_ids:
+        return submissions
+    
+    emails = {
+        admin["_id"]: admin.get("email")
+        for admin in db["users"].find({"_id": {"$in": list(admin_ids)}}, {"email": 1})
+    }
+    for sub in submissions:
+        if _is_admin_ref(sub.get("reviewed_by")):
+            sub["reviewed_by"] = emails.get(ObjectId(sub["reviewed_by"])) or str(sub["reviewed_by"])
+    return submissions
+
 # For managing each user document submission (admin)
 def get_submission_by_id(submission_id: str, current_user: dict):
     """Get single submission details (only if it belongs to user)"""
@@ -13,10 +47,10 @@ def get_submission_by_id(submission_id: str, current_user: dict):
         user_id = current_user["_id"]
         user_oid = ObjectId(user_id)
         
-        submission = db["document_submissions"].find_one({
-            "_id": ObjectId(submission_id),
-            "user_id": user_oid
-        })
+        submission = db["document_submissions"].find_one(
+            {"_id": ObjectId(submission_id), "user_id": user_oid},
+            {"file_hash": 0}
+        )
         
         if not submission:
             return {
@@ -24,27 +58,9 @@ def get_submission_by_id(submission_id: str, current_user: dict):
                 "error": "Submission not found or you don't have permission to view it"
             }
         
-        # Convert ObjectIds and datetimes to strings
-        submission["_id"] = str(submission["_id"])
-        submission["user_id"] = str(submission["user_id"])
-        submission["base_document_id"] = str(submission["base_document_id"])
-        submission["submitted_at"] = submission["submitted_at"].isoformat()
-        if submission.get("reviewed_at"):
-            submission["reviewed_at"] = submission["reviewed_at"].isoformat()
-        
-        # Handle both ObjectId and email formats
-        if submission.get("reviewed_by"):
-            reviewed_by = submission["reviewed_by"]
-            # Check if it's already an email (string with @)
-            if isinstance(reviewed_by, str) and "@" in reviewed_by:
-                submission["reviewed_by"] = reviewed_by
-            # Otherwise, try to convert ObjectId to email
-            else:
-                try:
-                    admin = db["users"].find_one({"_id": ObjectId(reviewed_by)})
-                    submission["reviewed_by"] = admin.get("email", str(reviewed_by)) if admin else str(reviewed_by)
-                except Exception:
-                    submission["reviewed_by"] = str(reviewed_by)
+        # Detail view: load the AI artifacts
+        attach_artifacts(submission)
+        _resolve_reviewers([submission])
         
         logger.info(f"Retrieved submission {submission_id}")
         
@@ -57,38 +73,42 @@ def get_submission_by_id(submission_id: str, current_user: dict):
         logger.error(f"Error fetching submission: {str(e)}")
         return {"success": False, "error": str(e)}
 
+# Full submission with AI artifacts (admin detail view)
+def get_submission_details(submission_id: str):
+    """Admin: Get one submission with Gemini details, bounding boxes and evidence URLs"""
+    try:
+        submission = db["document_submissions"].find_one({"_id": ObjectId(submission_id)}, {"file_hash": 0})
+        
+        if not submission:
+            return {
+                "success": False,
+                "error": "Submission not found"
+            }
+        
+        attach_artifacts(submission)
+        _resolve_reviewers([submission])
+        
+        return {
+            "success": True,
+            "submission": submission
+        }
+    
+    except Exception as e:
+        logger.error(f"Error fetching submission details: {str(e)}")
+        return {"success": False, "error": str(e)}
+
 # Get all submissions (admin)
 def get_all_submissions():
-    """Admin: Get all document submissions from all users"""
+    """Admin: Get all document submissions from all users (summaries; artifacts via get_submission_details)"""
     try:
         submissions = list(
             db["document_submissions"]
-            .find({})
+            .find({}, SUMMARY_PROJECTION)
             .sort("submitted_at", -1)
         )
         
-        # Convert ObjectIds and datetimes to strings
-        for sub in submissions:
-            sub["_id"] = str(sub["_id"])
-            sub["user_id"] = str(sub["user_id"])
-            sub["base_document_id"] = str(sub["base_document_id"])
-            sub["submitted_at"] = sub["submitted_at"].isoformat()
-            if sub.get("reviewed_at"):
-                sub["reviewed_at"] = sub["reviewed_at"].isoformat()
-            
-            # Handle both ObjectId and email formats
-            if sub.get("reviewed_by"):
-                reviewed_by = sub["reviewed_by"]
-                # Check if it's already an email (string with @)
-                if isinstance(reviewed_by, str) and "@" in reviewed_by:
-                    sub["reviewed_by"] = reviewed_by
-                # Otherwise, try to convert ObjectId to email
-                else:
-                    try:
-                        admin = db["users"].find_one({"_id": ObjectId(reviewed_by)})
-                        sub["reviewed_by"] = admin.get("email", str(reviewed_by)) if admin else str(reviewed_by)
-                    except Exception:
-                        sub["reviewed_by"] = str(reviewed_by)
+        # ObjectIds and datetimes are serialized by MongoJSONResponse
+        _resolve_reviewers(submissions)
         
         logger.info(f"Retrieved {len(submissions)} total submissions")
         
@@ -126,6 +146,8 @@ def delete_submission(submission_id: str):
                 "error": "Failed to delete submission"
             }
         
+        delete_artifacts(ObjectId(submission_id))
+        
         logger.info(f"Deleted submission {submission_id}")
         
         return {
@@ -142,11 +164,10 @@ def update_submission_status(submission_id: str, new_status: str, admin_notes: s
     """Admin: Update the status of a document submission with required admin notes"""
     try:
         # Validate status
-        valid_statuses = ["approved", "rejected", "needs_review"]
-        if new_status not in valid_statuses:
+        if new_status not in VALID_REVIEW_STATUSES:
             return {
                 "success": False,
-                "error": f"Invalid status. Valid statuses are: {valid_statuses}"
+                "error": f"Invalid status. Valid statuses are: {VALID_REVIEW_STATUSES}"
             }
         
         # Validate admin_notes is provided
@@ -200,32 +221,27 @@ def update_submission_status(submission_id: str, new_status: str, admin_notes: s
             }
         
         logger.info(f"Submission {submission_id} updated to '{new_status}' by {admin_email}")
+        record_status_changes([
+            build_audit_entry("document_submission", submission_id, submission.get("status"), new_status, admin_email, admin_notes.strip())
+        ])
         
-        # Send push notification to user
-        user = db["users"].find_one({"_id": submission["user_id"]})
+        # Send push notification to user (every registered device)
+        user_id = str(submission["user_id"])
+        fcm_tokens = get_user_tokens(user_id)
         
-        if user and user.get("fcm_token"):
+        if fcm_tokens:
             # Get document title
             doc_title = submission.get("base_document_title", "Document")
             
             # Customize message based on status
-            if new_status == "approved":
-                title = "Document Approved ✅"
-                body = f"Your '{doc_title}' has been approved!"
-            elif new_status == "rejected":
-                title = "Document Rejected ❌"
-                body = f"Your '{doc_title}' was rejected. {admin_notes}"
-            else:
-                title = "Document Needs Review 🔍"
-                body = f"Your '{doc_title}' needs review. {admin_notes}"
+            title, body = build_status_notification(doc_title, new_status, admin_notes)
             
-            # Send notification
-            send_notification(
-                fcm_token=user["fcm_token"],
-                title=title,
-                body=body
-            )
-            logger.info(f"Notification sent to user {user.get('email')}")
+            # Queue notification (sent in the background)
+            enqueue_notifications([
+                build_notification(token, title, body, user_id=user_id)
+                for token in fcm_tokens
+            ])
+            logger.info(f"Notification queued for user {user_id}")
         else:
             logger.warning(f"No FCM token found for user {submission['user_id']}")
         
@@ -242,4 +258,169 @@ def update_submission_status(submission_id: str, new_status: str, admin_notes: s
     
     except Exception as e:
         logger.error(f"Error updating submission status: {str(e)}")
-        return {"success": False, "error": str(e)}
\ No newline at end of file
+        return {"success": False, "error": str(e)}
+
+# Bulk status update (admin)
+def bulk_update_submission_status(submission_ids: list, new_status: str, admin_notes: str, admin_user: dict):
+    """Admin: Apply one status change to many submissions with a single bulk_write"""
+    try:
+        if new_status not in VALID_REVIEW_STATUSES:
+            return {
+                "success": False,
+                "error": f"Invalid status. Valid statuses are: {VALID_REVIEW_STATUSES}"
+            }
+        
+        if not admin_notes or admin_notes.strip() == "":
+            return {
+                "success": False,
+                "error": "Admin notes are required when updating submission status"
+            }
+        admin_notes = admin_notes.strip()
+        
+        admin_doc = db["users"].find_one({"_id": ObjectId(admin_user["_id"])}, {"email": 1})
+        if not admin_doc:
+            return {
+                "success": False,
+                "error": "Admin user not found"
+            }
+        admin_email = admin_doc.get("email", "unknown@admin.com")
+        
+        submission_ids = list(dict.fromkeys(submission_ids))
+        results = {}
+        valid_ids = []
+        for submission_id in submission_ids:
+            if ObjectId.is_valid(submission_id):
+                valid_ids.append(ObjectId(submission_id))
+            else:
+                results[submission_id] = {"success": False, "error": "Invalid submission ID format"}
+        
+        submissions = {
+            str(sub["_id"]): sub
+            for sub in db["document_submissions"].find(
+                {"_id": {"$in": valid_ids}},
+                {"status": 1, "user_id": 1, "base_document_title": 1}
+            )
+        }
+        
+        reviewed_at = datetime.now(timezone.utc)
+        update_data = {
+            "status": new_status,
+            "reviewed_at": reviewed_at,
+            "reviewed_by": admin_email,
+            "admin_notes": admin_notes
+        }
+        
+        if submissions:
+            db["document_submissions"].bulk_write(
+                [UpdateOne({"_id": sub["_id"]}, {"$set": update_data}) for sub in submissions.values()],
+                ordered=False
+            )
+        
+        logger.info(f"{len(submissions)} submissions updated to '{new_status}' by {admin_email}")
+        
+        record_status_changes([
+            build_audit_entry("document_submission", sub_id, sub.get("status"), new_status, admin_email, admin_notes)
+            for sub_id, sub in submissions.items()
+        ])
+        
+        # One batched token lookup for every recipient, then one enqueue
+        fcm_tokens = get_tokens_for_users([sub["user_id"] for sub in submissions.values()])
+        notifications = []
+        for sub in submissions.values():
+            user_id = str(sub["user_id"])
+            title, body = build_status_notification(sub.get("base_document_title", "Document"), new_status, admin_notes)
+            for token in fcm_tokens.get(user_id, []):
+                notifications.append(build_notification(token, title, body, user_id=user_id))
+        enqueue_notifications(notifications)
+        
+        for submission_id in submission_ids:
+            if submission_id in results:
+                continue
+            if submission_id in submissions:
+                results[submission_id] = {
+                    "success": True,
+                    "status": new_status,
+                    "notified": bool(fcm_tokens.get(str(submissions[submission_id]["user_id"])))
+                }
+            else:
+                results[submission_id] = {"success": False, "error": "Submission not found"}
+        
+        return {
+            "success": True,
+            "message": f"{len(submissions)} submissions updated to {new_status}",
+            "updated_data": {
+                "status": new_status,
+                "reviewed_at": reviewed_at.isoformat(),
+                "reviewed_by": admin_email,
+                "admin_notes": admin_notes
+            },
+            "results": results
+        }
+    
+    except Exception as e:
+        logger.error(f"Error bulk updating submission status: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+# Re-run AI verification (admin)
+def reverify_submission(submission_id: str):
+    """Admin: Re-run Gemini on every file of a submission, bypassing the verification cache"""
+    try:
+        submission = db["document_submissions"].find_one(
+            {"_id": ObjectId(submission_id)},
+            {"file_url_original": 1, "file_hash": 1, "filename": 1, "base_document_id": 1, "base_document_title": 1}
+        )
+        
+        if not submission:
+            return {
+                "success": False,
+                "error": "Submission not found"
+            }
+        
+        file_urls = submission.get("file_url_original", [])
+        file_hashes = submission.get("file_hash", [])
+        filenames = submission.get("filename", [])
+        
+        gemini_details = []
+        for index, file_url in enumerate(file_urls):
+            # Fresh model call; the new answer replaces the cached one
+            gemini_result = verify_document_with_gemini(
+                file_url,
+                submission["base_document_title"],
+                base_document_id=str(submission["base_document_id"]),
+                file_hash=file_hashes[index] if index < len(file_hashes) else None,
+                bypass_cache=True
+            )
+            gemini_details.append({
+                "filename": filenames[index] if index < len(filenames) else None,
+                "label": gemini_result["ai_prediction_label"],
+                "score": gemini_result["ai_confidence_score"],
+                "reason": gemini_result["reason"]
+            })
+        
+        labels = [d["label"] for d in gemini_details]
+        scores = [d["score"] for d in gemini_details]
+        update_data = {
+            "gemini_reason": "; ".join(d["reason"] for d in gemini_details),
+            "ai_prediction_label": 1 if labels and all(l == 1 for l in labels) else 0,
+            "ai_confidence_score": sum(scores) / len(scores) if scores else 0.0
+        }
+        
+        # Per-file details are an artifact; the summary keeps the aggregate
+        save_artifacts(ObjectId(submission_id), {"gemini_details": gemini_details})
+        db["document_submissions"].update_one(
+            {"_id": ObjectId(submission_id)},
+            {"$set": update_data, "$unset": {"gemini_details": ""}}
+        )
+        update_data["gemini_details"] = gemini_details
+        
+        logger.info(f"Re-verified submission {submission_id} ({len(file_urls)} files)")
+        
+        return {
+            "success": True,
+            "message": "Submission re-verified",
+            "updated_data": update_data
+        }
+    
+    except Exception as e:
+        logger.error(f"Error re-verifying submission: {str(e)}")
+        return {"success": False, "error": str(e)}
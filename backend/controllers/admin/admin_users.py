@@ -6,6 +6,11 @@ from datetime import datetime
 from config.db import db
 from bson import ObjectId
 from models.users import UserResponse
+from utils.search_index import add_search_filter, ranked_pipeline, refresh_user_search_fields
+from utils.vendor_directory import sync_vendor_user
+
+# Profile fields copied into the public vendor directory
+DIRECTORY_USER_FIELDS = {"firstname", "lastname", "barangay", "mobile_no"}
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -36,24 +41,18 @@ async def get_all_users(
         if is_verified is not None:
             query_filter["is_verified"] = is_verified
         
-        # Search by name or email
-        if search:
-            query_filter["$or"] = [
-                {"firstname": {"$regex": search, "$options": "i"}},
-                {"lastname": {"$regex": search, "$options": "i"}},
-                {"email": {"$regex": search, "$options": "i"}}
-            ]
+        # Search by name or email (prefix match on the search index)
+        search_terms = add_search_filter(query_filter, search)
         
         # Get total count before pagination
         total_users = db["users"].count_documents(query_filter)
         
-        # Get paginated users
+        # Get paginated users, best matches first when searching
         users = list(
-            db["users"]
-            .find(query_filter)
-            .skip(skip)
-            .limit(limit)
-            .sort("created_at", -1)  # Newest first
+            db["users"].aggregate(
+                ranked_pipeline(query_filter, search_terms, {"created_at": -1}, skip, limit),
+                allowDiskUse=True
+            )
         )
         
         # Convert ObjectId to string for each user
@@ -250,6 +249,12 @@ async def update_user_details(user_id: str, update_data: dict):
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="User not found")
         
+        if "firstname" in filtered_data or "lastname" in filtered_data:
+            refresh_user_search_fields(ObjectId(user_id))
+        
+        if DIRECTORY_USER_FIELDS & filtered_data.keys():
+            sync_vendor_user(user_id)
+        
         logger.info(f"Updated details for user {user_id}")
         
         return {
@@ -4,6 +4,9 @@ from config.db import db
 from utils.utils import get_current_user
 from bson import ObjectId
 from controllers.vendor_application_controller import calculate_completeness
+from utils.vendor_directory import sync_vendor_application
+from utils.slot_ledger import record_application_change
+from pymongo import ReturnDocument
 
 
 def get_all_vendor_applications(
@@ -153,16 +156,20 @@ def approve_application(
         raise HTTPException(status_code=404, detail="Application not found")
 
     # Update application status
-    db.vendor_applications.update_one(
+    status_update = {
+        "status": "approved",
+        "reviewed_at": datetime.utcnow(),
+        "rejection_reason": None,
+    }
+    previous = db.vendor_applications.find_one_and_update(
         {"_id": ObjectId(application_id)},
-        {
-            "$set": {
-                "status": "approved",
-                "reviewed_at": datetime.utcnow(),
-                "rejection_reason": None,
-            }
-        },
+        {"$set": status_update},
+        return_document=ReturnDocument.BEFORE,
     )
+    if previous:
+        record_application_change(previous, {**previous, **status_update})
+
+    sync_vendor_application(application_id)
 
     return {
         "message": "Application approved successfully",
@@ -189,16 +196,20 @@ def reject_application(
         raise HTTPException(status_code=404, detail="Application not found")
 
     # Update application status
-    db.vendor_applications.update_one(
+    status_update = {
+        "status": "rejected",
+        "reviewed_at": datetime.utcnow(),
+        "rejection_reason": rejection_reason,
+    }
+    previous = db.vendor_applications.find_one_and_update(
         {"_id": ObjectId(application_id)},
-        {
-            "$set": {
-                "status": "rejected",
-                "reviewed_at": datetime.utcnow(),
-                "rejection_reason": rejection_reason,
-            }
-        },
+        {"$set": status_update},
+        return_document=ReturnDocument.BEFORE,
     )
+    if previous:
+        record_application_change(previous, {**previous, **status_update})
+
+    sync_vendor_application(application_id)
 
     return {
         "message": "Application rejected successfully",
@@ -224,17 +235,21 @@ def request_missing_documents(
         raise HTTPException(status_code=404, detail="Application not found")
 
     # Update with pending review status and missing fields
-    db.vendor_applications.update_one(
+    status_update = {
+        "status": "pending_review",
+        "missing_fields": missing_fields,
+        "admin_message": message,
+        "message_sent_at": datetime.utcnow(),
+    }
+    previous = db.vendor_applications.find_one_and_update(
         {"_id": ObjectId(application_id)},
-        {
-            "$set": {
-                "status": "pending_review",
-                "missing_fields": missing_fields,
-                "admin_message": message,
-                "message_sent_at": datetime.utcnow(),
-            }
-        },
+        {"$set": status_update},
+        return_document=ReturnDocument.BEFORE,
     )
+    if previous:
+        record_application_change(previous, {**previous, **status_update})
+
+    sync_vendor_application(application_id)
 
     return {
         "message": "Request sent to vendor",
@@ -2,7 +2,19 @@ from config.db import db
 from bson import ObjectId
 from typing import Dict, List, Optional
 from datetime import datetime
+import copy
+import logging
+import threading
+import time
 from models.vendor_slots import VendorSlotConfig, VendorCartCreate, VendorCartUpdate
+from models.vendor_carts import CART_LIST_PROJECTION
+from utils.cart_stats import CART_STATUSES, record_cart_change, record_cart_changes, get_cart_counters, format_cart_stats
+from utils.status_audit import build_audit_entry, record_status_changes
+from utils.slot_ledger import get_slot_ledger
+from utils.render_cache import with_public_urls
+from pymongo import ReturnDocument, UpdateOne
+
+logger = logging.getLogger(__name__)
 
 # ==================== SLOT CONFIGURATION ====================
 
@@ -20,18 +32,40 @@ DEFAULT_SLOT_CONFIG = {
     "updated_by": None
 }
 
+# In-process copy of the slot config. It is refreshed by update_slot_config
+# in this worker and by the config watcher (change stream, or version poll
+# as a fallback) for writes made by other workers.
+CONFIG_POLL_INTERVAL = 5  # seconds, only used when change streams are unavailable
+
+_slot_config_cache = {"config": None, "version": None}
+_slot_config_lock = threading.Lock()
+_config_watcher_thread = None
+
+def _store_slot_config(config: dict):
+    config = dict(config)
+    config["_id"] = str(config["_id"])
+    with _slot_config_lock:
+        _slot_config_cache["config"] = config
+        _slot_config_cache["version"] = config.get("version", 0)
+
+def load_slot_config():
+    """Read slot configuration from Mongo into the cache"""
+    config = db["slot_config"].find_one_and_update(
+        {"type": "vendor_slots"},
+        # Initialize with default config on first use
+        {"$setOnInsert": {**DEFAULT_SLOT_CONFIG, "version": 0}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    _store_slot_config(config)
+    return config
+
 def get_slot_config():
     """Get current slot configuration"""
     try:
-        config = db["slot_config"].find_one({"type": "vendor_slots"})
-        if not config:
-            # Initialize with default config
-            config = {**DEFAULT_SLOT_CONFIG, "type": "vendor_slots"}
-            db["slot_config"].insert_one(config)
-            config = db["slot_config"].find_one({"type": "vendor_slots"})
-        
-        config["_id"] = str(config["_id"])
-        return config
+        if _slot_config_cache["config"] is None:
+            load_slot_config()
+        return copy.deepcopy(_slot_config_cache["config"])
     except Exception as e:
         raise Exception(f"Failed to get slot config: {str(e)}")
 
@@ -47,26 +81,66 @@ def update_slot_config(config_data: dict, admin_id: str):
             "updated_by": admin_id
         }
         
-        result = db["slot_config"].update_one(
+        # Version lets other workers notice the change
+        config = db["slot_config"].find_one_and_update(
             {"type": "vendor_slots"},
-            {"$set": update_data},
-            upsert=True
+            {"$set": update_data, "$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
         )
+        _store_slot_config(config)
         
         return {"success": True, "message": "Slot configuration updated", "config": update_data}
     except Exception as e:
         raise Exception(f"Failed to update slot config: {str(e)}")
 
+def _watch_slot_config():
+    """Keep the cached config coherent with writes from other workers"""
+    while True:
+        try:
+            # Change streams need a replica set; fall through to polling otherwise
+            with db["slot_config"].watch(
+                [{"$match": {"fullDocument.type": "vendor_slots"}}],
+                full_document="updateLookup"
+            ) as stream:
+                for change in stream:
+                    if change.get("fullDocument"):
+                        _store_slot_config(change["fullDocument"])
+        except Exception as e:
+            logger.info(f"Slot config change stream unavailable, polling instead: {str(e)}")
+            break
+
+    while True:
+        time.sleep(CONFIG_POLL_INTERVAL)
+        try:
+            latest = db["slot_config"].find_one({"type": "vendor_slots"}, {"version": 1})
+            if latest and latest.get("version", 0) != _slot_config_cache["version"]:
+                load_slot_config()
+        except Exception as e:
+            logger.error(f"Failed to poll slot config: {str(e)}")
+
+def start_slot_config_watcher():
+    """Load the slot config and start watching it (background thread)"""
+    global _config_watcher_thread
+    if _config_watcher_thread and _config_watcher_thread.is_alive():
+        return
+    try:
+        load_slot_config()
+    except Exception as e:
+        logger.error(f"Failed to load slot config: {str(e)}")
+    _config_watcher_thread = threading.Thread(target=_watch_slot_config, name="slot-config-watcher", daemon=True)
+    _config_watcher_thread.start()
+
 def get_slot_availability():
     """Get current slot availability statistics"""
     try:
         config = get_slot_config()
         
-        # Count approved vendors
-        approved_vendors = db["vendor_applications"].count_documents({"status": "approved"})
-        
-        # Count pending applications (reserved slots)
-        pending_applications = db["vendor_applications"].count_documents({"status": "pending"})
+        # Approved/pending and per-area usage come from the slot ledger (one read)
+        ledger = get_slot_ledger()
+        approved_vendors = ledger.get("approved", 0)
+        pending_applications = ledger.get("pending", 0)
+        area_usage = ledger.get("areas", {})
         
         # Calculate availability
         max_slots = config.get("max_slots", 100)
@@ -79,11 +153,7 @@ def get_slot_availability():
         area_availability = {}
         
         for area, total in area_slots.items():
-            # Count vendors in this area
-            area_vendors = db["vendor_applications"].count_documents({
-                "status": {"$in": ["approved", "pending"]},
-                "area_of_operation": {"$in": [area]}
-            })
+            area_vendors = area_usage.get(area, 0)
             area_availability[area] = {
                 "total": total,
                 "used": area_vendors,
@@ -105,72 +175,110 @@ def get_slot_availability():
 
 # ==================== ELIGIBILITY CHECK ====================
 
+def _user_id_forms(user_id: str) -> list:
+    """A user id as stored across collections (ObjectId in some, string in others)"""
+    return [ObjectId(user_id), user_id] if ObjectId.is_valid(user_id) else [user_id]
+
+def _evaluate_user_eligibility(availability: dict, cart_scan: Optional[dict], existing_app: Optional[dict], docs: Optional[dict]):
+    """Build the eligibility result from already-fetched records"""
+    eligibility = {
+        "is_eligible": False,
+        "criteria": {
+            "slots_available": False,
+            "valid_cart_scan": False,
+            "has_registry_number": False,
+            "no_existing_application": False,
+            "documents_submitted": False
+        },
+        "missing_requirements": [],
+        "message": ""
+    }
+    
+    # 1. Check slot availability
+    eligibility["criteria"]["slots_available"] = availability["available_slots"] > 0 and availability["is_accepting"]
+    if not eligibility["criteria"]["slots_available"]:
+        eligibility["missing_requirements"].append("No vendor slots currently available")
+    
+    # 2. Check for valid cart scan (Pasig cart)
+    eligibility["criteria"]["valid_cart_scan"] = cart_scan is not None
+    if not eligibility["criteria"]["valid_cart_scan"]:
+        eligibility["missing_requirements"].append("Valid Pasig cart scan required")
+    
+    # 3. Check for cart registry number
+    if cart_scan:
+        eligibility["criteria"]["has_registry_number"] = bool(cart_scan.get("cart_registry_no"))
+    if not eligibility["criteria"]["has_registry_number"]:
+        eligibility["missing_requirements"].append("Cart registry number required")
+    
+    # 4. Check for existing application
+    eligibility["criteria"]["no_existing_application"] = existing_app is None
+    if not eligibility["criteria"]["no_existing_application"]:
+        eligibility["missing_requirements"].append(f"You already have a {existing_app['status']} application")
+    
+    # 5. Check for document submissions (optional but recommended)
+    eligibility["criteria"]["documents_submitted"] = docs is not None
+    if not eligibility["criteria"]["documents_submitted"]:
+        eligibility["missing_requirements"].append("Document submission recommended (optional)")
+    
+    # Determine overall eligibility (documents are optional)
+    required_criteria = ["slots_available", "no_existing_application"]
+    eligibility["is_eligible"] = all(eligibility["criteria"][c] for c in required_criteria)
+    
+    # Generate message
+    if eligibility["is_eligible"]:
+        eligibility["message"] = "You are eligible to apply as a vendor!"
+    else:
+        eligibility["message"] = f"Not eligible: {', '.join(eligibility['missing_requirements'][:2])}"
+    
+    return eligibility
+
+def _evaluate_cart_eligibility(cart_id: str, cart: dict):
+    """Build the cart eligibility result from an already-fetched cart"""
+    eligibility = {
+        "cart_id": cart_id,
+        "is_eligible": False,
+        "criteria": {
+            "is_pasig_cart": cart.get("is_pasig_cart", False),
+            "has_registry_number": bool(cart.get("cart_registry_no")),
+            "has_required_info": cart.get("has_required_info", False),
+            "valid_classification": cart.get("classification") in ["with_cart", "vendor_cart", "valid"]
+        },
+        "cart_details": {
+            "registry_no": cart.get("cart_registry_no"),
+            "classification": cart.get("classification"),
+            "confidence": cart.get("confidence"),
+            "status": cart.get("status", "Pending")
+        }
+    }
+    
+    eligibility["is_eligible"] = (
+        eligibility["criteria"]["is_pasig_cart"] and
+        eligibility["criteria"]["has_registry_number"]
+    )
+    
+    return eligibility
+
 def check_user_eligibility(user_id: str):
     """Check if a user is eligible to apply as a vendor"""
     try:
-        eligibility = {
-            "is_eligible": False,
-            "criteria": {
-                "slots_available": False,
-                "valid_cart_scan": False,
-                "has_registry_number": False,
-                "no_existing_application": False,
-                "documents_submitted": False
-            },
-            "missing_requirements": [],
-            "message": ""
-        }
-        
-        # 1. Check slot availability
         availability = get_slot_availability()
-        eligibility["criteria"]["slots_available"] = availability["available_slots"] > 0 and availability["is_accepting"]
-        if not eligibility["criteria"]["slots_available"]:
-            eligibility["missing_requirements"].append("No vendor slots currently available")
         
-        # 2. Check for valid cart scan (Pasig cart)
         cart_scan = db["vendor_carts"].find_one({
             "user_id": user_id,
             "is_pasig_cart": True
         })
-        eligibility["criteria"]["valid_cart_scan"] = cart_scan is not None
-        if not eligibility["criteria"]["valid_cart_scan"]:
-            eligibility["missing_requirements"].append("Valid Pasig cart scan required")
         
-        # 3. Check for cart registry number
-        if cart_scan:
-            eligibility["criteria"]["has_registry_number"] = bool(cart_scan.get("cart_registry_no"))
-        if not eligibility["criteria"]["has_registry_number"]:
-            eligibility["missing_requirements"].append("Cart registry number required")
-        
-        # 4. Check for existing application
         existing_app = db["vendor_applications"].find_one({
-            "user_id": ObjectId(user_id) if ObjectId.is_valid(user_id) else user_id,
+            "user_id": {"$in": _user_id_forms(user_id)},
             "status": {"$in": ["pending", "approved"]}
         })
-        eligibility["criteria"]["no_existing_application"] = existing_app is None
-        if not eligibility["criteria"]["no_existing_application"]:
-            eligibility["missing_requirements"].append(f"You already have a {existing_app['status']} application")
         
-        # 5. Check for document submissions (optional but recommended)
         docs = db["document_submissions"].find_one({
-            "user_id": user_id,
+            "user_id": {"$in": _user_id_forms(user_id)},
             "status": "approved"
         })
-        eligibility["criteria"]["documents_submitted"] = docs is not None
-        if not eligibility["criteria"]["documents_submitted"]:
-            eligibility["missing_requirements"].append("Document submission recommended (optional)")
-        
-        # Determine overall eligibility (documents are optional)
-        required_criteria = ["slots_available", "no_existing_application"]
-        eligibility["is_eligible"] = all(eligibility["criteria"][c] for c in required_criteria)
-        
-        # Generate message
-        if eligibility["is_eligible"]:
-            eligibility["message"] = "You are eligible to apply as a vendor!"
-        else:
-            eligibility["message"] = f"Not eligible: {', '.join(eligibility['missing_requirements'][:2])}"
         
-        return eligibility
+        return _evaluate_user_eligibility(availability, cart_scan, existing_app, docs)
     except Exception as e:
         raise Exception(f"Failed to check eligibility: {str(e)}")
 
@@ -184,31 +292,94 @@ def check_cart_eligibility(cart_id: str):
         if not cart:
             raise Exception("Cart not found")
         
-        eligibility = {
-            "cart_id": cart_id,
-            "is_eligible": False,
-            "criteria": {
-                "is_pasig_cart": cart.get("is_pasig_cart", False),
-                "has_registry_number": bool(cart.get("cart_registry_no")),
-                "has_required_info": cart.get("has_required_info", False),
-                "valid_classification": cart.get("classification") in ["with_cart", "vendor_cart", "valid"]
-            },
-            "cart_details": {
-                "registry_no": cart.get("cart_registry_no"),
-                "classification": cart.get("classification"),
-                "confidence": cart.get("confidence"),
-                "status": cart.get("status", "Pending")
-            }
+        return _evaluate_cart_eligibility(cart_id, cart)
+    except Exception as e:
+        raise Exception(f"Failed to check cart eligibility: {str(e)}")
+
+def check_users_eligibility_bulk(user_ids: List[str]):
+    """Check eligibility for many users with one availability snapshot and $in queries"""
+    try:
+        user_ids = list(dict.fromkeys(user_ids))
+        availability = get_slot_availability()
+        
+        # Any stored form of a user id maps back to the requested id
+        id_lookup = {}
+        for user_id in user_ids:
+            for form in _user_id_forms(user_id):
+                id_lookup[form] = user_id
+        all_forms = list(id_lookup.keys())
+        
+        cart_scans = {}
+        for cart in db["vendor_carts"].find(
+            {"user_id": {"$in": user_ids}, "is_pasig_cart": True},
+            {"user_id": 1, "cart_registry_no": 1}
+        ):
+            cart_scans.setdefault(cart["user_id"], cart)
+        
+        existing_apps = {}
+        for app in db["vendor_applications"].find(
+            {"user_id": {"$in": all_forms}, "status": {"$in": ["pending", "approved"]}},
+            {"user_id": 1, "status": 1}
+        ):
+            existing_apps.setdefault(id_lookup.get(app["user_id"]), app)
+        
+        approved_docs = {}
+        for doc in db["document_submissions"].find(
+            {"user_id": {"$in": all_forms}, "status": "approved"},
+            {"user_id": 1}
+        ):
+            approved_docs.setdefault(id_lookup.get(doc["user_id"]), doc)
+        
+        results = {
+            user_id: _evaluate_user_eligibility(
+                availability,
+                cart_scans.get(user_id),
+                existing_apps.get(user_id),
+                approved_docs.get(user_id)
+            )
+            for user_id in user_ids
         }
         
-        eligibility["is_eligible"] = (
-            eligibility["criteria"]["is_pasig_cart"] and
-            eligibility["criteria"]["has_registry_number"]
-        )
+        return {
+            "total": len(results),
+            "eligible": sum(1 for r in results.values() if r["is_eligible"]),
+            "availability": availability,
+            "results": results
+        }
+    except Exception as e:
+        raise Exception(f"Failed to check bulk eligibility: {str(e)}")
+
+def check_carts_eligibility_bulk(cart_ids: List[str]):
+    """Check eligibility for many cart records with a single $in query"""
+    try:
+        cart_ids = list(dict.fromkeys(cart_ids))
+        valid_ids = [ObjectId(cid) for cid in cart_ids if ObjectId.is_valid(cid)]
+        
+        carts = {
+            str(cart["_id"]): cart
+            for cart in db["vendor_carts"].find(
+                {"_id": {"$in": valid_ids}},
+                {"is_pasig_cart": 1, "cart_registry_no": 1, "has_required_info": 1,
+                 "classification": 1, "confidence": 1, "status": 1}
+            )
+        }
         
-        return eligibility
+        results = {}
+        for cart_id in cart_ids:
+            if not ObjectId.is_valid(cart_id):
+                results[cart_id] = {"cart_id": cart_id, "is_eligible": False, "error": "Invalid cart ID format"}
+            elif cart_id not in carts:
+                results[cart_id] = {"cart_id": cart_id, "is_eligible": False, "error": "Cart not found"}
+            else:
+                results[cart_id] = _evaluate_cart_eligibility(cart_id, carts[cart_id])
+        
+        return {
+            "total": len(results),
+            "eligible": sum(1 for r in results.values() if r["is_eligible"]),
+            "results": results
+        }
     except Exception as e:
-        raise Exception(f"Failed to check cart eligibility: {str(e)}")
+        raise Exception(f"Failed to check bulk cart eligibility: {str(e)}")
 
 # ==================== CRUD OPERATIONS ====================
 
@@ -217,18 +388,16 @@ def fetch_vendor_carts(filters: dict = None, limit: int = 100, skip: int = 0):
     try:
         query = filters or {}
         
-        # Fetch vendor cart records
+        # Fetch vendor cart records (ObjectIds are serialized by MongoJSONResponse)
         vendor_carts = list(
             db["vendor_carts"]
-            .find(query)
+            .find(query, CART_LIST_PROJECTION)
             .sort("created_at", -1)
             .skip(skip)
             .limit(limit)
         )
-
-        # Transform ObjectId to string
         for cart in vendor_carts:
-            cart["_id"] = str(cart["_id"])
+            with_public_urls(cart, "postprocessed_image_url")
 
         total = db["vendor_carts"].count_documents(query)
         
@@ -251,8 +420,7 @@ def get_vendor_cart_by_id(cart_id: str):
         if not cart:
             raise Exception("Cart record not found")
         
-        cart["_id"] = str(cart["_id"])
-        return cart
+        return with_public_urls(cart, "postprocessed_image_url")
     except Exception as e:
         raise Exception(f"Failed to fetch cart: {str(e)}")
 
@@ -277,12 +445,17 @@ def create_vendor_cart(data: VendorCartCreate):
         }
         
         result = db["vendor_carts"].insert_one(cart_data)
+        record_cart_change(None, cart_data)
         cart_data["_id"] = str(result.inserted_id)
         
         return {"success": True, "message": "Cart record created", "cart": cart_data}
     except Exception as e:
         raise Exception(f"Failed to create cart: {str(e)}")
 
+def _present_expr(field: str) -> dict:
+    """Aggregation expression: field is set and not empty"""
+    return {"$not": [{"$in": [{"$ifNull": [field, None]}, [None, ""]]}]}
+
 def update_vendor_cart(cart_id: str, data: VendorCartUpdate):
     """Update a vendor cart record"""
     try:
@@ -292,92 +465,156 @@ def update_vendor_cart(cart_id: str, data: VendorCartUpdate):
         update_data = {k: v for k, v in data.dict().items() if v is not None}
         update_data["updated_at"] = datetime.utcnow().isoformat()
         
-        # Recalculate has_required_info if relevant fields are updated
-        if "cart_registry_no" in update_data or "sanitary_email" in update_data:
-            cart = db["vendor_carts"].find_one({"_id": ObjectId(cart_id)})
-            if cart:
-                registry = update_data.get("cart_registry_no", cart.get("cart_registry_no"))
-                email = update_data.get("sanitary_email", cart.get("sanitary_email"))
-                update_data["has_required_info"] = bool(registry and email)
+        # One atomic update; values are $literal so user text is never read as a field path
+        stages = [{"$set": {k: {"$literal": v} for k, v in update_data.items()}}]
         
-        result = db["vendor_carts"].update_one(
+        # Recalculate has_required_info from the merged values if relevant fields are updated
+        recalculate = "cart_registry_no" in update_data or "sanitary_email" in update_data
+        if recalculate:
+            stages.append({"$set": {"has_required_info": {"$and": [
+                _present_expr("$cart_registry_no"), _present_expr("$sanitary_email")
+            ]}}})
+        
+        previous = db["vendor_carts"].find_one_and_update(
             {"_id": ObjectId(cart_id)},
-            {"$set": update_data}
+            stages,
+            return_document=ReturnDocument.BEFORE
         )
         
-        if result.matched_count == 0:
+        if previous is None:
             raise Exception("Cart record not found")
         
-        return {"success": True, "message": "Cart record updated", "modified": result.modified_count}
+        updated = {**previous, **update_data}
+        if recalculate:
+            updated["has_required_info"] = bool(updated.get("cart_registry_no") and updated.get("sanitary_email"))
+        record_cart_change(previous, updated)
+        
+        return {"success": True, "message": "Cart record updated", "modified": 1}
     except Exception as e:
         raise Exception(f"Failed to update cart: {str(e)}")
 
-def update_vendor_cart_status(cart_id: str, status: str):
+def _audit_actor(admin_user: dict) -> str:
+    """Email of the authenticated admin for audit entries (user id if the account has none)"""
+    admin_doc = db["users"].find_one({"_id": ObjectId(admin_user["_id"])}, {"email": 1})
+    return (admin_doc or {}).get("email") or str(admin_user["_id"])
+
+def update_vendor_cart_status(cart_id: str, status: str, admin_user: dict):
     """Update only the status of a vendor cart"""
     try:
-        print(f"[DEBUG] Connected to database: {db.name}")
-        print(f"[DEBUG] vendor_carts count: {db['vendor_carts'].count_documents({})}")
-        
-        result = db["vendor_carts"].update_one(
+        previous = db["vendor_carts"].find_one_and_update(
             {"_id": ObjectId(cart_id)},
-            {"$set": {"status": status, "updated_at": datetime.utcnow().isoformat()}}
+            {"$set": {"status": status, "updated_at": datetime.utcnow().isoformat()}},
+            return_document=ReturnDocument.BEFORE
         )
         
-        print(f"[DEBUG] update_one matched_count: {result.matched_count}, modified_count: {result.modified_count}")
-        
-        if result.matched_count == 0:
-            print(f"[DEBUG] No vendor cart found with _id={cart_id}")
+        if previous is None:
+            logger.debug(f"No vendor cart found with _id={cart_id}")
             raise Exception("Vendor cart report not found")
         
+        record_cart_change(previous, {**previous, "status": status})
+        record_status_changes([build_audit_entry("vendor_cart", cart_id, previous.get("status"), status, _audit_actor(admin_user))])
+        
         return {"success": True, "status": status}
     except Exception as e:
-        print(f"[DEBUG] Exception in update_vendor_cart_status: {e}")
         raise Exception(f"Failed to update status: {str(e)}")
 
+def bulk_update_vendor_cart_status(cart_ids: List[str], status: str, admin_user: dict):
+    """Update the status of many vendor carts with one bulk_write"""
+    try:
+        if status not in CART_STATUSES:
+            raise Exception(f"Invalid status. Valid statuses are: {CART_STATUSES}")
+        
+        cart_ids = list(dict.fromkeys(cart_ids))
+        results = {}
+        valid_ids = []
+        for cart_id in cart_ids:
+            if ObjectId.is_valid(cart_id):
+                valid_ids.append(ObjectId(cart_id))
+            else:
+                results[cart_id] = {"success": False, "error": "Invalid cart ID format"}
+        
+        previous = {
+            str(cart["_id"]): cart
+            for cart in db["vendor_carts"].find(
+                {"_id": {"$in": valid_ids}},
+                {"status": 1, "is_pasig_cart": 1, "cart_registry_no": 1, "has_required_info": 1}
+            )
+        }
+        
+        # Each update only applies if the cart still has the status we read,
+        # so the counter deltas below stay exact under concurrent edits
+        updated_at = datetime.utcnow().isoformat()
+        operations = []
+        for cart_id, cart in previous.items():
+            operations.append(UpdateOne(
+                {"_id": cart["_id"], "status": cart.get("status")},
+                {"$set": {"status": status, "updated_at": updated_at}}
+            ))
+        
+        applied = set(previous)
+        if operations:
+            result = db["vendor_carts"].bulk_write(operations, ordered=False)
+            if result.matched_count < len(operations):
+                applied = {
+                    str(cart["_id"])
+                    for cart in db["vendor_carts"].find(
+                        {"_id": {"$in": [c["_id"] for c in previous.values()]}, "updated_at": updated_at},
+                        {"_id": 1}
+                    )
+                }
+        
+        record_cart_changes([
+            (previous[cart_id], {**previous[cart_id], "status": status}) for cart_id in applied
+        ])
+        changed_by = _audit_actor(admin_user) if applied else None
+        record_status_changes([
+            build_audit_entry("vendor_cart", cart_id, previous[cart_id].get("status"), status, changed_by)
+            for cart_id in applied
+        ])
+        
+        for cart_id in cart_ids:
+            if cart_id in results:
+                continue
+            if cart_id not in previous:
+                results[cart_id] = {"success": False, "error": "Vendor cart report not found"}
+            elif cart_id not in applied:
+                results[cart_id] = {"success": False, "error": "Cart was modified concurrently, retry"}
+            else:
+                results[cart_id] = {"success": True, "status": status}
+        
+        return {
+            "total": len(results),
+            "updated": len(applied),
+            "failed": len(results) - len(applied),
+            "results": results
+        }
+    except Exception as e:
+        raise Exception(f"Failed to bulk update status: {str(e)}")
+
 def delete_vendor_cart(cart_id: str):
     """Delete a vendor cart record"""
     try:
         if not ObjectId.is_valid(cart_id):
             raise Exception("Invalid cart ID format")
         
-        result = db["vendor_carts"].delete_one({"_id": ObjectId(cart_id)})
+        deleted = db["vendor_carts"].find_one_and_delete({"_id": ObjectId(cart_id)})
         
-        if result.deleted_count == 0:
+        if deleted is None:
             raise Exception("Cart record not found")
         
+        record_cart_change(deleted, None)
+        
         return {"success": True, "message": "Cart record deleted"}
     except Exception as e:
         raise Exception(f"Failed to delete cart: {str(e)}")
 
 # ==================== STATISTICS ====================
 
-def get_vendor_cart_stats():
+def get_vendor_cart_stats(fresh: bool = False):
     """Get statistics for vendor carts"""
     try:
-        total = db["vendor_carts"].count_documents({})
-        
-        # Status breakdown
-        status_counts = {}
-        for status in ["Pending", "Investigating", "Located", "Permit Processing", "Resolved", "Ignored"]:
-            status_counts[status] = db["vendor_carts"].count_documents({"status": status})
-        
-        # Pasig cart count
-        pasig_carts = db["vendor_carts"].count_documents({"is_pasig_cart": True})
-        
-        # With registry number
-        with_registry = db["vendor_carts"].count_documents({
-            "cart_registry_no": {"$ne": None, "$ne": ""}
-        })
-        
-        # With required info
-        with_required_info = db["vendor_carts"].count_documents({"has_required_info": True})
-        
-        return {
-            "total": total,
-            "status_breakdown": status_counts,
-            "pasig_carts": pasig_carts,
-            "with_registry_number": with_registry,
-            "with_required_info": with_required_info
-        }
+        # One read of the maintained counters document; `fresh` recomputes
+        # every counter in a single aggregation pass and reconciles it
+        return format_cart_stats(get_cart_counters(fresh))
     except Exception as e:
-        raise Exception(f"Failed to get stats: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Failed to get stats: {str(e)}")
@@ -2,6 +2,7 @@ from fastapi import HTTPException, Depends
 from datetime import datetime
 from config.db import db
 from utils.utils import get_current_user
+from utils.search_index import add_search_filter, ranked_pipeline, GOODS_TYPE_SCOPE, AREA_SCOPE
 from bson import ObjectId
 from typing import Optional, List
 
@@ -27,18 +28,17 @@ def get_vendor_report(
     if status and status != "all":
         query["status"] = status
     
-    if vendor_type:
-        query["goods_type"] = {"$regex": vendor_type, "$options": "i"}
-    
-    if area_of_operation:
-        query["area_of_operation"] = {"$elemMatch": {"$regex": area_of_operation, "$options": "i"}}
+    # Filters and search use the prefix search index instead of $regex scans
+    add_search_filter(query, vendor_type, scope=GOODS_TYPE_SCOPE)
+    add_search_filter(query, area_of_operation, scope=AREA_SCOPE)
+    search_terms = add_search_filter(query, search)
 
-    # Get vendor applications
+    # Get vendor applications, best name matches first when searching
     applications = list(
-        db.vendor_applications.find(query)
-        .sort("submitted_at", -1)
-        .skip(skip)
-        .limit(limit)
+        db.vendor_applications.aggregate(
+            ranked_pipeline(query, search_terms, {"submitted_at": -1}, skip, limit),
+            allowDiskUse=True
+        )
     )
 
     total = db.vendor_applications.count_documents(query)
@@ -48,15 +48,6 @@ def get_vendor_report(
     for app in applications:
         vendor_user = db.users.find_one({"_id": app.get("user_id")})
         
-        # Apply search filter on vendor name or business name
-        if search:
-            search_lower = search.lower()
-            vendor_name = f"{vendor_user.get('firstname', '')} {vendor_user.get('lastname', '')}".lower() if vendor_user else ""
-            business_name = (app.get("business_name") or "").lower()
-            
-            if search_lower not in vendor_name and search_lower not in business_name:
-                continue
-        
         report_data.append({
             "id": str(app.get("_id")),
             "user_id": str(app.get("user_id")),
@@ -88,7 +79,7 @@ def get_vendor_report(
     summary = get_report_summary(current_user)
 
     return {
-        "total": len(report_data) if search else total,
+        "total": total,
         "skip": skip,
         "limit": limit,
         "vendors": report_data,
@@ -177,13 +168,12 @@ def export_vendor_report(
 
     query = {"status": "approved"}
     
-    if vendor_type:
-        query["goods_type"] = {"$regex": vendor_type, "$options": "i"}
-    
-    if area_of_operation:
-        query["area_of_operation"] = {"$elemMatch": {"$regex": area_of_operation, "$options": "i"}}
+    add_search_filter(query, vendor_type, scope=GOODS_TYPE_SCOPE)
+    add_search_filter(query, area_of_operation, scope=AREA_SCOPE)
 
-    applications = list(db.vendor_applications.find(query).sort("submitted_at", -1))
+    applications = list(
+        db.vendor_applications.find(query, {"search_words": 0, "search_tokens": 0, "search_version": 0}).sort("submitted_at", -1)
+    )
 
     export_data = []
     for app in applications:
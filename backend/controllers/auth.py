@@ -48,6 +48,15 @@ from datetime import timedelta, datetime, date
 # Pydantic Models
 from models.users import User, UserResponse, Role, Gender
 
+# Search index
+from utils.search_index import user_search_fields, refresh_user_search_fields
+
+# Public vendor directory
+from utils.vendor_directory import sync_vendor_user
+
+# FCM token registry
+from utils.token_registry import invalidate_user_tokens
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -166,6 +175,7 @@ async def register(
             "is_verified": False,
             "created_at": datetime.now().isoformat()
         })
+        user_dict.update(user_search_fields(user_dict))
 
         # Insert user
         inserted_user = db["users"].insert_one(user_dict)
@@ -352,6 +362,8 @@ async def login(
             {"_id": user["_id"]},
             {"$set": update_data}
         )
+        if fcm_token:
+            invalidate_user_tokens(user["_id"])
 
         user["_id"] = str(user["_id"])
 
@@ -409,6 +421,8 @@ async def google_login(
                 {"_id": existing_user["_id"]},
                 {"$set": update_data}
             )
+            if fcm_token:
+                invalidate_user_tokens(existing_user["_id"])
             
             existing_user["_id"] = str(existing_user["_id"])
             
@@ -450,6 +464,7 @@ async def google_login(
             # Convert to dict
             user_dict = user_model.model_dump()
             user_dict["created_at"] = datetime.now().isoformat()
+            user_dict.update(user_search_fields(user_dict))
             
             # Insert into database
             inserted_user = db["users"].insert_one(user_dict)
@@ -564,6 +579,8 @@ async def facebook_login(
                 {"_id": existing_user["_id"]},
                 {"$set": update_data}
             )
+            if fcm_token:
+                invalidate_user_tokens(existing_user["_id"])
             
             existing_user["_id"] = str(existing_user["_id"])
             
@@ -613,6 +630,7 @@ async def facebook_login(
                 user_dict["facebook_id"] = facebookId
             if fcm_token:
                 user_dict["fcm_token"] = fcm_token
+            user_dict.update(user_search_fields(user_dict))
             
             # Insert into database
             inserted_user = db["users"].insert_one(user_dict)
@@ -763,6 +781,12 @@ async def update_user_profile(
             {"$set": update_data}
         )
         
+        if "firstname" in update_data or "lastname" in update_data:
+            refresh_user_search_fields(ObjectId(user_id))
+        
+        if {"firstname", "lastname", "mobile_no", "barangay"} & update_data.keys():
+            sync_vendor_user(user_id)
+        
         # Get updated user
         updated_user = db["users"].find_one({"_id": ObjectId(user_id)})
         updated_user["_id"] = str(updated_user["_id"])
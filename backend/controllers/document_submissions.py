@@ -8,12 +8,21 @@ from typing import List
 import numpy as np # Required for calculating average
 
 from utils.document_comparison import compare_documents_with_vision
-from models.document_submissions import DocumentSubmission, SubmissionStatus
+from models.document_submissions import DocumentSubmission, DocumentSubmissionArtifacts, SubmissionStatus
 from utils.gemini_util import verify_document_with_gemini
-from utils.cloud_vision_util import generate_visual_evidence
+from utils.verification_cache import file_content_hash
+from utils.cloud_vision_util import generate_visual_evidence, evidence_source_url, draw_visual_evidence
+from utils.render_cache import render_key, api_path, download_image
+from utils.bbox_codec import encode_bounding_boxes, decode_bounding_boxes
+from utils.submission_artifacts import (
+    save_artifacts, load_artifacts, attach_artifacts, evidence_path, evidence_urls, SUMMARY_PROJECTION
+)
 
 logger = logging.getLogger(__name__)
 
+# Bump when the evidence drawing changes so cached renders are replaced
+EVIDENCE_VERSION = 1
+
 
 async def submit_document(files: List[UploadFile], base_document_id: str, notes: str, current_user: dict):
     """
@@ -30,6 +39,9 @@ async def submit_document(files: List[UploadFile], base_document_id: str, notes:
         if not user:
             return {"success": False, "error": "User not found"}
         
+        # Known up front so evidence URLs can point at the record
+        submission_oid = ObjectId()
+        
         base_doc = db["base_documents"].find_one({"_id": base_doc_oid})
         if not base_doc:
             return {"success": False, "error": "Base document not found"}
@@ -38,7 +50,8 @@ async def submit_document(files: List[UploadFile], base_document_id: str, notes:
         filenames = []
         file_types = []
         file_urls_original = []   # Private URLs (DB)
-        file_urls_processed = []  # Green Box Images (DB)
+        file_hashes = []          # Content hashes (verification cache keys)
+        file_urls_processed = []  # Green Box Images, rendered on first view (DB)
         bounding_boxes_list = []  # Raw Coordinates (DB)
         gemini_details_list = []  # Per-file AI analysis
         
@@ -55,6 +68,8 @@ async def submit_document(files: List[UploadFile], base_document_id: str, notes:
             
             # A. Upload Original (Private)
             try:
+                file_hash = file_content_hash(file)
+                file_hashes.append(file_hash)
                 uploaded_url = upload_file(file, folder="user_submissions")
                 file_urls_original.append(uploaded_url)
             except Exception as e:
@@ -62,7 +77,13 @@ async def submit_document(files: List[UploadFile], base_document_id: str, notes:
 
             # B. PHASE A: Gemini Analysis (Logic & Scoring)
             # We pass the URL + Template Title to the AI
-            gemini_result = verify_document_with_gemini(uploaded_url, base_doc["title"])
+            # (resubmitting the same file for the same base document hits the cache)
+            gemini_result = verify_document_with_gemini(
+                uploaded_url,
+                base_doc["title"],
+                base_document_id=base_document_id,
+                file_hash=file_hash
+            )
             
             # Store details for this specific file
             gemini_details_list.append({
@@ -78,12 +99,12 @@ async def submit_document(files: List[UploadFile], base_document_id: str, notes:
             reasons.append(gemini_result["reason"])
 
             # C. PHASE C: Visual Evidence (Cloud Vision)
-            # Generates the image with green bounding boxes
+            # Stores the boxes; the image with green boxes is drawn when first opened
             vision_result = await generate_visual_evidence(uploaded_url)
             
             if vision_result["success"]:
-                file_urls_processed.append(vision_result["file_url_processed"])
-                bounding_boxes_list.append(vision_result["bounding_boxes"])
+                file_urls_processed.append(api_path(evidence_path(str(submission_oid), index)))
+                bounding_boxes_list.append(encode_bounding_boxes(vision_result["bounding_boxes"]))
             else:
                 # Fallback if vision fails (don't break the whole submission)
                 file_urls_processed.append(None)
@@ -111,17 +132,13 @@ async def submit_document(files: List[UploadFile], base_document_id: str, notes:
             filename=filenames,
             file_type=file_types,
             file_url_original=file_urls_original,
-            file_url_processed=file_urls_processed,
+            file_hash=file_hashes,
             
             # Phase A: Gemini Data (Logic)
-            gemini_details=gemini_details_list,
             gemini_reason=root_reason,
             ai_prediction_label=root_prediction_label,
             ai_confidence_score=root_confidence_score,
             
-            # Phase C: Vision Data (Visuals)
-            bounding_boxes=bounding_boxes_list,
-            
             # Phase B: Ground Truth (Waiting for Admin)
             status=SubmissionStatus.pending,
             
@@ -130,8 +147,17 @@ async def submit_document(files: List[UploadFile], base_document_id: str, notes:
             admin_notes=notes or ""
         )
         
-        # Insert into MongoDB
+        # Heavy per-file output goes to the artifacts collection (detail views only)
+        artifacts = DocumentSubmissionArtifacts(
+            gemini_details=gemini_details_list,
+            file_url_processed=file_urls_processed,
+            bounding_boxes=bounding_boxes_list
+        )
+        
+        # Insert into MongoDB (artifacts first, so a summary never points at missing details)
+        save_artifacts(submission_oid, artifacts.dict())
         submission_dict = submission.dict(by_alias=True)
+        submission_dict["_id"] = submission_oid
         result = db["document_submissions"].insert_one(submission_dict)
         
         logger.info(f"✅ SUBMISSION COMPLETE: ID {result.inserted_id}")
@@ -149,7 +175,7 @@ async def submit_document(files: List[UploadFile], base_document_id: str, notes:
                 "file_count": len(files),
                 # Frontend Display Data
                 "file_url_original": signed_original_urls,
-                "file_url_processed": file_urls_processed,
+                "file_url_processed": evidence_urls(submission_oid, file_urls_processed),
                 "status": SubmissionStatus.needs_review.value,
                 "ai_prediction_label": root_prediction_label,
                 "ai_confidence_score": root_confidence_score
@@ -163,6 +189,40 @@ async def submit_document(files: List[UploadFile], base_document_id: str, notes:
 
 
 
+def get_submission_evidence(submission_id: str, index: int):
+    """Cache key and renderer for the evidence image of one submitted file"""
+    try:
+        if not ObjectId.is_valid(submission_id):
+            return {"success": False, "error": "Invalid submission ID"}
+        
+        submission = db["document_submissions"].find_one(
+            {"_id": ObjectId(submission_id)},
+            {"file_url_original": 1, "bounding_boxes": 1}
+        )
+        if not submission:
+            return {"success": False, "error": "Submission not found"}
+        
+        file_urls = submission.get("file_url_original", [])
+        boxes_list = submission.get("bounding_boxes") or load_artifacts(submission["_id"], ("bounding_boxes",)).get("bounding_boxes", [])
+        if index < 0 or index >= len(file_urls) or index >= len(boxes_list) or not boxes_list[index]:
+            return {"success": False, "error": "No visual evidence for this file"}
+        
+        source_url = evidence_source_url(file_urls[index])
+        boxes = decode_bounding_boxes(boxes_list[index])
+        
+        # Boxes never change after submission, so the key only covers the source
+        key = render_key("document_evidence", submission_id, index, EVIDENCE_VERSION, source_url)
+        return {
+            "success": True,
+            "key": key,
+            "render": lambda: draw_visual_evidence(download_image(source_url), boxes)
+        }
+    
+    except Exception as e:
+        logger.error(f"Error loading visual evidence: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
 def get_user_submissions(current_user: dict):
     """Get all submissions by authenticated user"""
     try:
@@ -171,21 +231,11 @@ def get_user_submissions(current_user: dict):
         
         submissions = list(
             db["document_submissions"]
-            .find({"user_id": user_oid})
+            .find({"user_id": user_oid}, SUMMARY_PROJECTION)
             .sort("submitted_at", -1)
         )
         
-        # Convert ObjectIds and datetimes to strings
-        for sub in submissions:
-            sub["_id"] = str(sub["_id"])
-            sub["user_id"] = str(sub["user_id"])
-            sub["base_document_id"] = str(sub["base_document_id"])
-            sub["submitted_at"] = sub["submitted_at"].isoformat()
-            if sub.get("reviewed_at"):
-                sub["reviewed_at"] = sub["reviewed_at"].isoformat()
-            if sub.get("reviewed_by"):
-                sub["reviewed_by"] = str(sub["reviewed_by"])
-        
+        # ObjectIds and datetimes are serialized by MongoJSONResponse
         logger.info(f"Retrieved {len(submissions)} submissions for user")
         
         return {
@@ -204,10 +254,10 @@ def get_submission_by_id(submission_id: str, current_user: dict):
         user_id = current_user["_id"]
         user_oid = ObjectId(user_id)
         
-        submission = db["document_submissions"].find_one({
-            "_id": ObjectId(submission_id),
-            "user_id": user_oid
-        })
+        submission = db["document_submissions"].find_one(
+            {"_id": ObjectId(submission_id), "user_id": user_oid},
+            {"file_hash": 0}
+        )
         
         if not submission:
             return {
@@ -215,15 +265,8 @@ def get_submission_by_id(submission_id: str, current_user: dict):
                 "error": "Submission not found or you don't have permission to view it"
             }
         
-        # Convert ObjectIds and datetimes to strings
-        submission["_id"] = str(submission["_id"])
-        submission["user_id"] = str(submission["user_id"])
-        submission["base_document_id"] = str(submission["base_document_id"])
-        submission["submitted_at"] = submission["submitted_at"].isoformat()
-        if submission.get("reviewed_at"):
-            submission["reviewed_at"] = submission["reviewed_at"].isoformat()
-        if submission.get("reviewed_by"):
-            submission["reviewed_by"] = str(submission["reviewed_by"])
+        # Detail view: load the AI artifacts
+        attach_artifacts(submission)
         
         logger.info(f"Retrieved submission {submission_id}")
         
@@ -1,8 +1,26 @@
 from fastapi import HTTPException, Query
 from typing import Optional
+from datetime import datetime, timedelta
 from config.db import db
 from bson import ObjectId
-from controllers.vendor_application_controller import calculate_completeness
+from bson.errors import InvalidId
+import base64
+import json
+from utils.vendor_directory import DIRECTORY_COLLECTION
+
+# Fields returned by the public listing
+LIST_PROJECTION = {
+    "business_name": 1,
+    "goods_type": 1,
+    "cart_type": 1,
+    "operating_hours": 1,
+    "area_of_operation": 1,
+    "delivery_capability": 1,
+    "years_in_operation": 1,
+    "business_logo_url": 1,
+    "vendor_barangay": 1,
+    "completeness_percentage": 1,
+}
 
 
 def get_approved_vendors(
@@ -14,8 +32,8 @@ def get_approved_vendors(
 ):
     """Get all approved vendors with filters (public access)"""
     
-    # Query only approved applications with 90%+ completeness
-    query = {"status": "approved"}
+    # The directory only holds approved vendors with 90%+ completeness
+    query = {}
     
     if goods_type:
         query["goods_type"] = goods_type
@@ -23,48 +41,25 @@ def get_approved_vendors(
     if delivery_capable is not None:
         query["delivery_capability"] = delivery_capable
     
-    applications = list(
-        db.vendor_applications.find(query)
+    if barangay:
+        query["vendor_barangay"] = barangay
+    
+    vendors = list(
+        db[DIRECTORY_COLLECTION].find(query, LIST_PROJECTION)
         .sort("business_name", 1)
         .skip(skip)
         .limit(limit)
     )
     
-    total = db.vendor_applications.count_documents(query)
+    total = db[DIRECTORY_COLLECTION].count_documents(query)
     
-    # Build response with vendor details
     result_vendors = []
-    for app in applications:
-        # Calculate completeness
-        completeness = calculate_completeness(app)
-        
-        # Only include vendors with 90%+ completeness (activated vendors)
-        if completeness < 90:
-            continue
-            
-        # Get vendor user details
-        vendor_user = db.users.find_one({"_id": app.get("user_id")})
-        
-        # Filter by barangay if specified
-        if barangay and vendor_user and vendor_user.get("barangay") != barangay:
-            continue
-        
-        result_vendors.append({
-            "id": str(app.get("_id")),
-            "business_name": app.get("business_name"),
-            "goods_type": app.get("goods_type"),
-            "cart_type": app.get("cart_type"),
-            "operating_hours": app.get("operating_hours"),
-            "area_of_operation": app.get("area_of_operation"),
-            "delivery_capability": app.get("delivery_capability"),
-            "years_in_operation": app.get("years_in_operation"),
-            "business_logo_url": app.get("business_logo_url"),
-            "vendor_barangay": vendor_user.get("barangay") if vendor_user else None,
-            "completeness_percentage": completeness,
-        })
+    for vendor in vendors:
+        vendor["id"] = str(vendor.pop("_id"))
+        result_vendors.append(vendor)
     
     return {
-        "total": len(result_vendors),
+        "total": total,
         "vendors": result_vendors,
     }
 
@@ -72,54 +67,159 @@ def get_approved_vendors(
 def get_vendor_detail(vendor_id: str):
     """Get detailed vendor information (public access)"""
     
-    application = db.vendor_applications.find_one({"_id": ObjectId(vendor_id)})
-    
-    if not application:
+    if not ObjectId.is_valid(vendor_id):
         raise HTTPException(status_code=404, detail="Vendor not found")
     
-    # Only show approved vendors
-    if application.get("status") != "approved":
+    # Only approved, activated vendors are in the directory
+    vendor = db[DIRECTORY_COLLECTION].find_one(
+        {"_id": ObjectId(vendor_id)},
+        # Live location is served by /nearby only (it changes without a directory version bump)
+        {"user_id": 0, "synced_at": 0, "location": 0, "location_updated_at": 0},
+    )
+    
+    if not vendor:
         raise HTTPException(status_code=404, detail="Vendor not found")
     
-    # Calculate completeness
-    completeness = calculate_completeness(application)
+    vendor["id"] = str(vendor.pop("_id"))
+    return vendor
+
+
+def get_vendor_categories():
+    """Get all unique goods types/categories"""
     
-    # Only show activated vendors (90%+)
-    if completeness < 90:
-        raise HTTPException(status_code=404, detail="Vendor profile incomplete")
+    # Get distinct goods types from listed vendors
+    categories = db[DIRECTORY_COLLECTION].distinct("goods_type")
     
-    # Get vendor user details
-    vendor_user = db.users.find_one({"_id": application.get("user_id")})
+    return {
+        "categories": sorted([cat for cat in categories if cat])
+    }
+
+
+# ==================== PROXIMITY SEARCH ====================
+
+# A vendor drops off /nearby when they stop sharing, or when their last ping is older than this
+LOCATION_STALE_AFTER = timedelta(minutes=10)
+
+def encode_nearby_cursor(distance: float, vendor_id) -> str:
+    """Opaque cursor pointing after (distance, id)"""
+    raw = json.dumps({"d": distance, "id": str(vendor_id)}).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_nearby_cursor(cursor: str):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(data["d"]), ObjectId(data["id"])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def get_nearby_vendors(
+    lat: float,
+    lng: float,
+    radius_m: float = 2000,
+    limit: int = 20,
+    goods_type: Optional[str] = None,
+    cursor: Optional[str] = None,
+):
+    """Get activated vendors nearest to a point, paginated by distance (public access)"""
+    
+    # Only vendors currently sharing a recent location
+    query = {
+        "location_active": True,
+        "location_updated_at": {"$gte": datetime.utcnow() - LOCATION_STALE_AFTER},
+    }
+    if goods_type:
+        query["goods_type"] = goods_type
+    
+    geo_near = {
+        "near": {"type": "Point", "coordinates": [lng, lat]},
+        "distanceField": "distance_m",
+        "maxDistance": radius_m,
+        "spherical": True,
+        "query": query,
+    }
+    
+    pipeline = [{"$geoNear": geo_near}]
+    
+    # $geoNear already returns results by distance; _id only breaks ties at the cursor
+    if cursor:
+        last_distance, last_id = decode_nearby_cursor(cursor)
+        geo_near["minDistance"] = last_distance
+        pipeline.append({
+            "$match": {
+                "$or": [
+                    {"distance_m": {"$gt": last_distance}},
+                    {"distance_m": last_distance, "_id": {"$gt": last_id}},
+                ]
+            }
+        })
+    
+    pipeline += [
+        {"$limit": limit + 1},
+        {"$project": {
+            "business_name": 1,
+            "goods_type": 1,
+            "cart_type": 1,
+            "operating_hours": 1,
+            "delivery_capability": 1,
+            "business_logo_url": 1,
+            "vendor_barangay": 1,
+            "location": 1,
+            "location_updated_at": 1,
+            "distance_m": 1,
+        }},
+    ]
+    
+    vendors = list(db[DIRECTORY_COLLECTION].aggregate(pipeline))
+    
+    has_more = len(vendors) > limit
+    vendors = vendors[:limit]
+    next_cursor = (
+        encode_nearby_cursor(vendors[-1]["distance_m"], vendors[-1]["_id"])
+        if has_more else None
+    )
+    
+    result_vendors = []
+    for vendor in vendors:
+        vendor["id"] = str(vendor.pop("_id"))
+        vendor["distance_m"] = round(vendor["distance_m"], 1)
+        coordinates = (vendor.pop("location", None) or {}).get("coordinates") or [None, None]
+        vendor["lng"], vendor["lat"] = coordinates
+        result_vendors.append(vendor)
     
     return {
-        "id": str(application.get("_id")),
-        "business_name": application.get("business_name"),
-        "goods_type": application.get("goods_type"),
-        "cart_type": application.get("cart_type"),
-        "operating_hours": application.get("operating_hours"),
-        "years_in_operation": application.get("years_in_operation"),
-        "area_of_operation": application.get("area_of_operation"),
-        "delivery_capability": application.get("delivery_capability"),
-        "products": application.get("products"),
-        "specialty_items": application.get("specialty_items"),
-        "preferred_contact": application.get("preferred_contact"),
-        "social_media": application.get("social_media"),
-        "business_logo_url": application.get("business_logo_url"),
-        "cart_image_url": application.get("cart_image_url"),
-        "vendor_photo_url": application.get("vendor_photo_url"),
-        "vendor_name": f"{vendor_user.get('firstname')} {vendor_user.get('lastname')}" if vendor_user else "Unknown",
-        "vendor_barangay": vendor_user.get("barangay") if vendor_user else None,
-        "vendor_mobile_no": vendor_user.get("mobile_no") if vendor_user else None,
-        "completeness_percentage": completeness,
+        "count": len(result_vendors),
+        "vendors": result_vendors,
+        "next_cursor": next_cursor,
     }
 
 
-def get_vendor_categories():
-    """Get all unique goods types/categories"""
+def update_vendor_location(lat: Optional[float], lng: Optional[float], active: bool, current_user: dict):
+    """Store the authenticated vendor's current cart location (active=False stops sharing)"""
     
-    # Get distinct goods types from approved applications
-    categories = db.vendor_applications.distinct("goods_type", {"status": "approved"})
+    if active and (lat is None or lng is None):
+        raise HTTPException(status_code=400, detail="lat and lng are required while sharing location")
+    
+    application = db.vendor_applications.find_one(
+        {"user_id": current_user["_id"], "status": "approved"},
+        {"_id": 1},
+    )
+    if not application:
+        raise HTTPException(status_code=404, detail="No approved application found")
+    
+    location_data = {"location_active": active, "location_updated_at": datetime.utcnow()}
+    if active:
+        location_data["location"] = {"type": "Point", "coordinates": [lng, lat]}
+    
+    # Source of truth is the application; the directory copy is what /nearby queries.
+    # Location pings do not bump the directory version so cached listings stay valid.
+    db.vendor_applications.update_one({"_id": application["_id"]}, {"$set": location_data})
+    db[DIRECTORY_COLLECTION].update_one({"_id": application["_id"]}, {"$set": location_data})
     
     return {
-        "categories": sorted([cat for cat in categories if cat])
+        "message": "Location updated successfully" if active else "Location sharing stopped",
+        "active": active,
+        "lat": lat,
+        "lng": lng,
     }
@@ -3,7 +3,11 @@ from datetime import datetime
 from config.db import db
 from models.vendor_application_model import VendorApplicationCreate
 from utils.utils import get_current_user
+from utils.search_index import application_search_fields
+from utils.slot_ledger import reserve_application_slot, release_application_slot, record_application_change
+from controllers.admin.admin_vendor_carts import get_slot_config
 from bson import ObjectId
+from pymongo import ReturnDocument
 
 def apply_as_vendor(
     data: VendorApplicationCreate,
@@ -21,6 +25,8 @@ def apply_as_vendor(
             detail="You already have an existing application"
         )
 
+    config = get_slot_config()
+
     application = {
         "user_id": current_user["_id"],
         "business_name": data.business_name,
@@ -45,7 +51,23 @@ def apply_as_vendor(
     # Calculate and store completeness percentage
     application["completeness_percentage"] = calculate_completeness(application)
 
-    db.vendor_applications.insert_one(application)
+    # Maintain search index fields (vendor name + business details)
+    vendor_user = db.users.find_one({"_id": current_user["_id"]}, {"firstname": 1, "lastname": 1})
+    application.update(application_search_fields(application, vendor_user))
+
+    # Reserve a slot atomically before inserting (race-free under concurrent applications)
+    usable_slots = config.get("max_slots", 100) - config.get("reserved_slots", 10)
+    if not config.get("is_accepting_applications", True) or not reserve_application_slot(application, usable_slots):
+        raise HTTPException(
+            status_code=400,
+            detail="No vendor slots currently available"
+        )
+
+    try:
+        db.vendor_applications.insert_one(application)
+    except Exception:
+        release_application_slot(application)
+        raise
 
     return {
         "message": "Vendor application submitted successfully",
@@ -167,12 +189,21 @@ def update_vendor_application(
     updated_app = {**application, **update_data}
     update_data["completeness_percentage"] = calculate_completeness(updated_app)
 
+    # Maintain search index fields (vendor name + business details)
+    vendor_user = db.users.find_one({"_id": current_user["_id"]}, {"firstname": 1, "lastname": 1})
+    update_data.update(application_search_fields(updated_app, vendor_user))
+
     # Update the application
-    db.vendor_applications.update_one(
+    previous = db.vendor_applications.find_one_and_update(
         {"_id": application["_id"]},
-        {"$set": update_data}
+        {"$set": update_data},
+        return_document=ReturnDocument.BEFORE
     )
 
+    # Pending applications hold area slots; keep the ledger in step with area changes
+    if previous:
+        record_application_change(previous, {**previous, **update_data})
+
     return {
         "message": "Vendor application updated successfully",
         "status": application["status"]
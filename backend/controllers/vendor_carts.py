@@ -1,170 +1,96 @@
 from fastapi import HTTPException
 from config.db import db
 from datetime import datetime
-import base64
-from ultralytics import YOLO
 import cv2
 import numpy as np
+import io
+from PIL import Image
+from bson import ObjectId
 from config.cloudinary_config import upload_image_cart
 from models.vendor_carts import VendorCart
+from utils.cart_stats import record_cart_change
+from utils.ocr_backends import run_ocr
+from utils.cart_text_extractor import cart_text_extractor
+from utils.cart_detector import load_cart_model, cart_model_imgsz
+from utils.render_cache import render_key, api_path, public_api_url, download_image
 import os
-import requests
 import logging
-import re
 from dotenv import load_dotenv
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-# Initialize YOLO model
-model = YOLO(os.path.join(os.path.dirname(__file__), '../secrets_backend/best.pt'))
+# Initialize YOLO model (PyTorch, ONNX Runtime or OpenVINO - see utils/cart_detector.py)
+model = load_cart_model()
 
-# Text Extraction - Google Vision API
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+# Preprocessing - large JPEGs are decoded at reduced resolution, then letterboxed
+# (aspect ratio kept, padded) to the model inference size, cart_model_imgsz(),
+# so the detector gets a frame it does not need to resize again
+DECODE_MIN_SIDE = int(os.getenv("CART_DECODE_MIN_SIDE", "1600"))  # never decode below this longest side
+LETTERBOX_COLOR = (114, 114, 114)
+REDUCED_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# Text Extraction - pluggable OCR backend (see utils/ocr_backends.py)
+# Only the detected region (mapped back to original resolution) is sent to OCR.
+OCR_ROI_CLASSES = [c.strip() for c in os.getenv("OCR_ROI_CLASSES", "").split(",") if c.strip()]  # empty = every detection
+OCR_ROI_PADDING = 0.15   # fraction of the box size added on each side
+OCR_MAX_SIDE = 1600      # longest side sent to OCR
+OCR_JPEG_QUALITY = 85
+
+# Annotated images - rendered when first opened instead of uploaded on every scan
+ANNOTATED_MAX_SIDE = 1280
+ANNOTATED_JPEG_QUALITY = 85
+ANNOTATION_VERSION = 1   # bump when the drawing changes so cached renders are replaced
+LEGACY_MODEL_INPUT_SIZE = 512  # squashed model frame that older scans stored boxes in
 
 def extract_cart_registry_and_email(full_text: str, detected_texts: list):
     """
     Extract specific information: Cart Registry Number and Email from detected text.
     """
-    cart_registry_no = None
-    sanitary_email = None
-    
-    # More specific pattern for Cart Registry No - looks for 4-digit numbers near "CART REGISTRY"
-    cart_registry_pattern = r'CART\s*REGISTRY\s*(?:NO|NUMBER)\.?\s*:?\s*(\d{4})'
-    
-    # Alternative: look for 4-digit number standalone
-    standalone_number_pattern = r'\b(\d{4})\b'
-    
-    # Pattern for email
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    
-    # Pattern for PASIG text
-    pasig_pattern = r'PASIG'
-    
-    # First, try to find cart number with context
-    cart_match = re.search(cart_registry_pattern, full_text, re.IGNORECASE)
-    if cart_match:
-        cart_registry_no = cart_match.group(1)
-    
-    # If not found, search in individual detected texts with bounding box analysis
-    if not cart_registry_no:
-        # Sort detected texts by position (top to bottom, left to right)
-        sorted_texts = sorted(detected_texts, key=lambda x: (x.get('box', [0,0,0,0])[1], x.get('box', [0,0,0,0])[0]))
-        
-        found_cart_label = False
-        for i, text_obj in enumerate(sorted_texts):
-            text = text_obj.get("text", "")
-            
-            # Look for "CART REGISTRY" label
-            if re.search(r'CART\s*REGISTRY', text, re.IGNORECASE):
-                found_cart_label = True
-                # Check next 3 text blocks for 4-digit number
-                for j in range(i+1, min(i+4, len(sorted_texts))):
-                    next_text = sorted_texts[j].get("text", "")
-                    number_match = re.search(standalone_number_pattern, next_text)
-                    if number_match:
-                        cart_registry_no = number_match.group(1)
-                        break
-                if cart_registry_no:
-                    break
-    
-    # Fallback: find any 4-digit number (last resort)
-    if not cart_registry_no:
-        all_numbers = re.findall(standalone_number_pattern, full_text)
-        # Filter out phone numbers and find most likely cart number
-        for num in all_numbers:
-            if num != '8643' and num != '1111' and num != '1531':  # Exclude known phone numbers
-                cart_registry_no = num
-                break
-    
-    # Email detection
-    email_match = re.search(email_pattern, full_text)
-    if email_match:
-        sanitary_email = email_match.group(0).lower()
-    
-    pasig_match = re.search(pasig_pattern, full_text, re.IGNORECASE)
-    is_pasig_cart = bool(pasig_match)
-    
-    logger.info(f"Full detected text: {full_text}")
-    logger.info(f"All detected numbers: {re.findall(standalone_number_pattern, full_text)}")
-    
-    return {
-        "cart_registry_no": cart_registry_no,
-        "sanitary_email": sanitary_email,
-        "is_pasig_cart": is_pasig_cart,
-        "has_required_info": bool(cart_registry_no and sanitary_email)
-    }
-
-def extract_text_with_google_vision(image_bytes: bytes):
+    return cart_text_extractor.extract(full_text, detected_texts)
+
+async def extract_cart_text(image_bytes: bytes, fallback_image_bytes: bytes = None, transforms: tuple = None):
     """
-    Extract text from image using Google Cloud Vision API (REST).
+    Extract text from a cart image with the configured OCR backend
+    (Google Vision or a local engine with Vision fallback).
     Then filter for specific information.
+    `transforms` maps text boxes of (image, fallback image) back to
+    original-resolution coordinates: (offset_x, offset_y, scale) each.
     """
     try:
-        vision_url = f"https://vision.googleapis.com/v1/images:annotate?key={GOOGLE_API_KEY}"
-        encoded_image = base64.b64encode(image_bytes).decode('utf-8')
-        
-        payload = {
-            "requests": [
-                {
-                    "image": {"content": encoded_image},
-                    "features": [
-                        {"type": "TEXT_DETECTION", "maxResults": 1}
-                    ]
-                }
-            ]
-        }
-        
-        vision_response = requests.post(vision_url, json=payload)
-        vision_data = vision_response.json()
-        
-        if "error" in vision_data:
-            logger.error(f"Vision API error: {vision_data['error']}")
-            return {
-                "full_text": "",
-                "detected_texts": [],
-                "cart_registry_no": None,
-                "sanitary_email": None
-            }
-        
-        annotations = vision_data["responses"][0]
-        
-        detected_texts = []
-        full_text = ""
-        
-        if "textAnnotations" in annotations and len(annotations["textAnnotations"]) > 0:
-            # First annotation contains full text
-            full_text = annotations["textAnnotations"][0]["description"]
-            
-            # Individual text annotations with bounding boxes
-            for text in annotations["textAnnotations"][1:]:  # Skip the first one (full text)
-                vertices = text.get("boundingPoly", {}).get("vertices", [])
-                if len(vertices) >= 4:
-                    detected_texts.append({
-                        "text": text.get("description", ""),
-                        "confidence": 95.0,
-                        "box": [
-                            vertices[0].get("x", 0),
-                            vertices[0].get("y", 0),
-                            vertices[2].get("x", 0),
-                            vertices[2].get("y", 0)
-                        ]
-                    })
+        # A local result without a registry number is treated as low confidence
+        ocr_result = await run_ocr(
+            image_bytes,
+            accept=lambda r: extract_cart_registry_and_email(r["full_text"], r["detected_texts"])["cart_registry_no"] is not None,
+            fallback_image_bytes=fallback_image_bytes
+        )
+        full_text = ocr_result["full_text"]
+        detected_texts = ocr_result["detected_texts"]
+        if transforms:
+            transform = transforms[1] if ocr_result.get("fallback") else transforms[0]
+            for text in detected_texts:
+                text["box"] = map_point_box(text["box"], *transform)
         
         # Extract specific information
         specific_info = extract_cart_registry_and_email(full_text, detected_texts)
         
-        logger.info(f"Extracted text - Cart Registry: {specific_info['cart_registry_no']}, Email: {specific_info['sanitary_email']}")
+        logger.info(f"Extracted text ({ocr_result['engine']}) - Cart Registry: {specific_info['cart_registry_no']}, Email: {specific_info['sanitary_email']}")
         
         return {
             "full_text": full_text.strip(),
             "detected_texts": detected_texts,
             "cart_registry_no": specific_info["cart_registry_no"],
-            "sanitary_email": specific_info["sanitary_email"]
+            "sanitary_email": specific_info["sanitary_email"],
+            "ocr_engine": ocr_result["engine"]
         }
     except Exception as e:
-        logger.error(f"Error during text extraction with Google Vision: {e}")
+        logger.error(f"Error during text extraction: {e}")
         return {
             "full_text": "",
             "detected_texts": [],
@@ -172,27 +98,124 @@ def extract_text_with_google_vision(image_bytes: bytes):
             "sanitary_email": None
         }
 
-def preprocess_image(image_bytes: bytes):
+def decode_image(image_bytes: bytes):
     """
-    Preprocess the image using OpenCV.
-    Converts image bytes to a resized OpenCV image.
+    Decode image bytes to an OpenCV image.
+    Large JPEGs are decoded at 1/2, 1/4 or 1/8 resolution (IMREAD_REDUCED_COLOR_*)
+    as long as the longest side stays >= DECODE_MIN_SIDE.
+    Returns (image, decode_factor) where original pixels = decoded pixels * decode_factor.
     """
+    factor = 1
     try:
-        image_array = np.frombuffer(image_bytes, np.uint8)
+        with Image.open(io.BytesIO(image_bytes)) as header:
+            if header.format == "JPEG":
+                longest = max(header.size)
+                while factor < 8 and longest / (factor * 2) >= DECODE_MIN_SIDE:
+                    factor *= 2
+    except Exception:
+        factor = 1
+
+    image_array = np.frombuffer(image_bytes, np.uint8)
+    image = cv2.imdecode(image_array, REDUCED_DECODE_FLAGS[factor])
+    if image is None and factor > 1:
         image = cv2.imdecode(image_array, cv2.IMREAD_COLOR)
-        if image is None:
-            raise ValueError("Invalid image data")
-        image = cv2.resize(image, (512, 512))
-        return image
+        factor = 1
+    if image is None:
+        raise ValueError("Invalid image data")
+    return image, factor
+
+def letterbox(image, size: int = None):
+    """
+    Resize keeping the aspect ratio and pad to a size x size square (default: the model inference size).
+    Returns (image, transform) with transform = {"scale", "pad_x", "pad_y"}.
+    """
+    size = size or cart_model_imgsz()
+    height, width = image.shape[:2]
+    scale = min(size / width, size / height)
+    new_width, new_height = max(1, round(width * scale)), max(1, round(height * scale))
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+    resized = cv2.resize(image, (new_width, new_height), interpolation=interpolation)
+
+    pad_x, pad_y = (size - new_width) // 2, (size - new_height) // 2
+    canvas = np.full((size, size, 3), LETTERBOX_COLOR, dtype=np.uint8)
+    canvas[pad_y:pad_y + new_height, pad_x:pad_x + new_width] = resized
+    return canvas, {"scale": scale, "pad_x": pad_x, "pad_y": pad_y}
+
+def preprocess_image(image):
+    """
+    Preprocess the image using OpenCV.
+    Letterboxes a decoded image to the model input size; returns (image, transform).
+    """
+    try:
+        return letterbox(image, cart_model_imgsz())
     except Exception as e:
         raise ValueError(f"Error during image preprocessing: {e}")
 
+def map_box_to_original(box, transform: dict, width: int, height: int, padding: float = 0.0):
+    """Map a model-space box to decoded-frame pixels, padded by a fraction of its size and clamped"""
+    scale, pad_x, pad_y = transform["scale"], transform["pad_x"], transform["pad_y"]
+    x1, y1 = (box[0] - pad_x) / scale, (box[1] - pad_y) / scale
+    x2, y2 = (box[2] - pad_x) / scale, (box[3] - pad_y) / scale
+    grow_x, grow_y = (x2 - x1) * padding, (y2 - y1) * padding
+    return [
+        max(0, int(x1 - grow_x)),
+        max(0, int(y1 - grow_y)),
+        min(width, int(x2 + grow_x)),
+        min(height, int(y2 + grow_y))
+    ]
+
+def map_point_box(box, offset_x: int, offset_y: int, scale: float):
+    """Map a box from an OCR input image back to original pixels"""
+    return [
+        int(offset_x + box[0] / scale),
+        int(offset_y + box[1] / scale),
+        int(offset_x + box[2] / scale),
+        int(offset_y + box[3] / scale)
+    ]
+
+def encode_for_ocr(image):
+    """Downscale to OCR_MAX_SIDE and JPEG-compress; returns (bytes, scale)"""
+    height, width = image.shape[:2]
+    scale = min(1.0, OCR_MAX_SIDE / max(height, width))
+    if scale < 1.0:
+        image = cv2.resize(image, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+    _, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, OCR_JPEG_QUALITY])
+    return encoded.tobytes(), scale
+
+def build_ocr_inputs(original, predictions: list, transform: dict, decode_factor: int = 1):
+    """
+    OCR inputs for a scan: the detected region cropped from the decoded frame
+    (falls back to the whole frame when nothing relevant was detected) and a
+    compressed full frame for retries. Returns (region_bytes, full_bytes, transforms, roi);
+    transforms and roi are in original-resolution pixels.
+    """
+    height, width = original.shape[:2]
+    full_bytes, full_scale = encode_for_ocr(original)
+    full_transform = (0, 0, full_scale / decode_factor)
+
+    relevant = [
+        p for p in predictions
+        if not OCR_ROI_CLASSES or model.names.get(p["class_id"]) in OCR_ROI_CLASSES
+    ]
+    if not relevant:
+        return full_bytes, None, (full_transform, full_transform), None
+
+    boxes = [map_box_to_original(p["box"], transform, width, height, OCR_ROI_PADDING) for p in relevant]
+    roi = [min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes)]
+    if roi[2] - roi[0] < 8 or roi[3] - roi[1] < 8:
+        return full_bytes, None, (full_transform, full_transform), None
+
+    region_bytes, region_scale = encode_for_ocr(original[roi[1]:roi[3], roi[0]:roi[2]])
+    region_transform = (roi[0] * decode_factor, roi[1] * decode_factor, region_scale / decode_factor)
+    return region_bytes, full_bytes, (region_transform, full_transform), [v * decode_factor for v in roi]
+
 def postprocess_predictions(image, predictions):
     """
     Postprocess predictions using OpenCV.
-    Draw bounding boxes and labels on the image.
+    Draw bounding boxes and labels on the image (boxes in the image's own pixels).
     """
     try:
+        thickness = max(2, round(max(image.shape[:2]) / 500))
         for pred in predictions:
             box = pred["box"]
             confidence = pred["confidence"]
@@ -200,14 +223,70 @@ def postprocess_predictions(image, predictions):
             start_point = (int(box[0]), int(box[1]))
             end_point = (int(box[2]), int(box[3]))
             color = (0, 255, 0)
-            thickness = 2
             cv2.rectangle(image, start_point, end_point, color, thickness)
             label = f"{class_id}: {confidence:.2f}"
-            cv2.putText(image, label, start_point, cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, thickness)
+            cv2.putText(image, label, start_point, cv2.FONT_HERSHEY_SIMPLEX, thickness / 4, color, thickness)
         return image
     except Exception as e:
         raise RuntimeError(f"Error during postprocessing: {e}")
 
+# ==================== ANNOTATED IMAGES (rendered on demand) ====================
+
+def annotated_cart_url(cart_id: str) -> str:
+    """Stored API path of the lazily rendered annotated image of a scan"""
+    return api_path(f"/vendor/carts/vendor/cart-records/{cart_id}/annotated")
+
+def render_annotated_cart(record: dict) -> bytes:
+    """Draw a scan's stored predictions on its original image; returns JPEG bytes"""
+    image, decode_factor = decode_image(download_image(record["original_image_url"]))
+    height, width = image.shape[:2]
+    if record.get("image_size"):
+        # Boxes in original-resolution pixels
+        box_scale_x = box_scale_y = 1 / decode_factor
+    else:
+        # Older scans stored boxes in the squashed 512x512 model frame
+        box_scale_x, box_scale_y = width / LEGACY_MODEL_INPUT_SIZE, height / LEGACY_MODEL_INPUT_SIZE
+
+    scale = min(1.0, ANNOTATED_MAX_SIDE / max(height, width))
+    if scale < 1.0:
+        image = cv2.resize(image, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+
+    predictions = [
+        {
+            **pred,
+            "box": [
+                pred["box"][0] * box_scale_x * scale,
+                pred["box"][1] * box_scale_y * scale,
+                pred["box"][2] * box_scale_x * scale,
+                pred["box"][3] * box_scale_y * scale
+            ]
+        }
+        for pred in record.get("predictions") or []
+    ]
+    annotated = postprocess_predictions(image, predictions)
+    _, encoded = cv2.imencode(".jpg", annotated, [cv2.IMWRITE_JPEG_QUALITY, ANNOTATED_JPEG_QUALITY])
+    return encoded.tobytes()
+
+def get_annotated_cart(cart_id: str):
+    """Cache key and renderer for a scan's annotated image"""
+    if not ObjectId.is_valid(cart_id):
+        raise HTTPException(status_code=400, detail="Invalid cart ID format.")
+
+    record = db["vendor_carts"].find_one(
+        {"_id": ObjectId(cart_id)},
+        {"original_image_url": 1, "predictions": 1, "image_size": 1}
+    )
+    if not record:
+        raise HTTPException(status_code=404, detail="Cart record not found.")
+    if not record.get("original_image_url"):
+        raise HTTPException(status_code=404, detail="Cart record has no image.")
+
+    key = render_key(
+        "vendor_cart", cart_id, ANNOTATION_VERSION, record["original_image_url"],
+        record.get("image_size"), record.get("predictions")
+    )
+    return key, lambda: render_annotated_cart(record)
+
 async def predict_vendor_cart(image_bytes: bytes, email: str):
     try:
         # Retrieve user ID based on email
@@ -217,11 +296,13 @@ async def predict_vendor_cart(image_bytes: bytes, email: str):
 
         user_id = str(user["_id"])
 
-        # Preprocess image
-        preprocessed_image = preprocess_image(image_bytes)
+        # Preprocess image (reduced-resolution decode + letterbox)
+        original_image, decode_factor = decode_image(image_bytes)
+        preprocessed_image, transform = preprocess_image(original_image)
+        frame_height, frame_width = original_image.shape[:2]
 
         # Run prediction
-        results = model(preprocessed_image)
+        results = model(preprocessed_image, imgsz=cart_model_imgsz())
         predictions = []
         classification = None
         confidence = 0.0 
@@ -242,25 +323,31 @@ async def predict_vendor_cart(image_bytes: bytes, email: str):
                     confidence = conf
                     classification = model.names[int(cls)] if hasattr(model, 'names') else str(cls)
 
-        # Extract text using Google Cloud Vision REST API
-        text_detection_result = extract_text_with_google_vision(image_bytes)
+        # Extract text from the detected region only (full frame as fallback)
+        region_bytes, full_frame_bytes, transforms, roi = build_ocr_inputs(original_image, predictions, transform, decode_factor)
+        text_detection_result = await extract_cart_text(region_bytes, full_frame_bytes, transforms)
+        text_detection_result["roi"] = roi
 
-        # Postprocess predictions
-        postprocessed_image = postprocess_predictions(preprocessed_image, predictions)
+        # Stored boxes are in original-resolution pixels (out of the letterboxed model space)
+        for pred in predictions:
+            frame_box = map_box_to_original(pred["box"], transform, frame_width, frame_height)
+            pred["box"] = [v * decode_factor for v in frame_box]
 
         # Upload original image to Cloudinary
         original_image_url = upload_image_cart(image_bytes, folder="vendor_carts/original")
 
-        # Upload postprocessed image to Cloudinary
-        _, encoded_image = cv2.imencode(".jpg", postprocessed_image)
-        postprocessed_image_url = upload_image_cart(encoded_image.tobytes(), folder="vendor_carts/postprocessed")
+        # Annotated image is rendered on first view (see get_annotated_cart)
+        cart_id = ObjectId()
+        postprocessed_image_url = annotated_cart_url(str(cart_id))
 
         # Save to database with user ID and text detection
         vendor_cart_data = {
+            "_id": cart_id,
             "user_id": user_id,
             "original_image_url": original_image_url,
             "postprocessed_image_url": postprocessed_image_url,
             "predictions": predictions,
+            "image_size": [frame_width * decode_factor, frame_height * decode_factor],
             "classification": classification,
             "confidence": confidence,
             "text_detection": text_detection_result,
@@ -273,16 +360,18 @@ async def predict_vendor_cart(image_bytes: bytes, email: str):
 
         try:
             inserted_cart = db["vendor_carts"].insert_one(vendor_cart_data)
+            record_cart_change(None, vendor_cart_data)
             vendor_cart_data["_id"] = str(inserted_cart.inserted_id)
-            logger.info(f"Data successfully inserted into MongoDB: {vendor_cart_data}")
+            logger.info(f"Vendor cart scan saved: {vendor_cart_data['_id']}")
         except Exception as e:
             raise HTTPException(status_code=500, detail="Failed to save vendor cart data.")
 
         return {
             "success": True,
             "original_image_url": original_image_url,
-            "postprocessed_image_url": postprocessed_image_url,
+            "postprocessed_image_url": public_api_url(postprocessed_image_url),
             "predictions": predictions or [],
+            "image_size": vendor_cart_data["image_size"],
             "classification": classification,
             "confidence": confidence,
             "text_detection": text_detection_result,
@@ -63,6 +63,8 @@ class SubmissionStatus(str, Enum):
     
     
 
+# Summary record (document_submissions) - what user/admin listings read.
+# Heavy AI output lives in DocumentSubmissionArtifacts (see utils/submission_artifacts.py).
 class DocumentSubmission(BaseModel):
     user_id: ObjectId
     
@@ -71,9 +73,9 @@ class DocumentSubmission(BaseModel):
     file_type: List[str]
     file_url_original: List[str]
     
-    # Stores the URL of the image with Green Boxes drawn on it
-    file_url_processed: List[Optional[str]] = []
-
+    # SHA-256 of each original file (key for the Gemini verification cache)
+    file_hash: List[str] = []
+    
     # --- 2. STATUS (The "Ground Truth" for Scikit) ---
     # When Admin changes this, it becomes your 'y_true'.
     status: SubmissionStatus = SubmissionStatus.pending
@@ -85,9 +87,6 @@ class DocumentSubmission(BaseModel):
     base_document_file_url: Optional[str] = None
 
     # --- 4. GEMINI VERIFICATION (The "Why") ---
-    # Detailed breakdown per file (optional)
-    gemini_details: List[Dict[str, Any]] = Field(default_factory=list)
-    
     #  NEW: Main explanation from Gemini for the overall decision
     gemini_reason: Optional[str] = ""
 
@@ -105,11 +104,7 @@ class DocumentSubmission(BaseModel):
     # Legacy field (optional to keep if you use it for UI display)
     similarity_percentage: float = 0.0
 
-    # --- 6. VISUALIZATION ONLY (Cloud Vision) ---
-    # We keep this ONLY to draw boxes on the UI. No math calculations.
-    bounding_boxes: List[Dict[str, Any]] = Field(default_factory=list) 
-
-    # --- 7. METADATA ---
+    # --- 6. METADATA ---
     submitted_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     
     # Optional admin review fields
@@ -122,4 +117,18 @@ class DocumentSubmission(BaseModel):
         json_encoders = {
             ObjectId: str,
             datetime: lambda v: v.isoformat()
-        }
\ No newline at end of file
+        }
+
+
+# AI artifacts of a submission (document_submission_artifacts, same _id as the summary)
+# Only loaded by detail views.
+class DocumentSubmissionArtifacts(BaseModel):
+    # Detailed Gemini breakdown per file
+    gemini_details: List[Dict[str, Any]] = Field(default_factory=list)
+
+    # URL of the image with Green Boxes drawn on it, per file (rendered on demand)
+    file_url_processed: List[Optional[str]] = []
+
+    # VISUALIZATION ONLY (Cloud Vision) - draws boxes on the UI. No math calculations.
+    # Stored packed per file (see utils/bbox_codec.py)
+    bounding_boxes: List[Dict[str, Any]] = Field(default_factory=list)
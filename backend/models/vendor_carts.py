@@ -4,7 +4,7 @@ from typing import Dict, List, Optional
 class VendorCart(BaseModel):
     user_id: str  
     original_image_url: str  
-    postprocessed_image_url: str  
+    postprocessed_image_url: Optional[str] = None  # rendered on demand
     predictions: List[Dict]  
     classification: str
     confidence: float
@@ -12,4 +12,7 @@ class VendorCart(BaseModel):
 
     def to_dict(self):
         return self.dict()
-    
\ No newline at end of file
+
+
+# Listing projection for vendor_carts: per-word OCR tokens are only needed by the detail view
+CART_LIST_PROJECTION = {"text_detection.detected_texts": 0}
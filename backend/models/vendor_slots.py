@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Dict, Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
 from datetime import datetime
 
 class VendorSlotConfig(BaseModel):
@@ -38,6 +38,11 @@ class EligibilityCriteria(BaseModel):
     message: str
 
 
+class BulkEligibilityRequest(BaseModel):
+    """Ids to evaluate in one bulk eligibility check"""
+    ids: List[str] = Field(..., min_length=1, max_length=1000)
+
+
 class VendorCartCreate(BaseModel):
     """Model for manually creating a vendor cart record"""
     user_id: str
@@ -60,3 +65,9 @@ class VendorCartUpdate(BaseModel):
     status: Optional[str] = None
     notes: Optional[str] = None
     has_required_info: Optional[bool] = None
+
+
+class VendorCartBulkStatusUpdate(BaseModel):
+    """Model for updating the status of many vendor carts at once"""
+    cart_ids: List[str] = Field(..., min_length=1, max_length=500)
+    status: str
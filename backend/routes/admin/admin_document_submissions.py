@@ -1,13 +1,18 @@
 from fastapi import APIRouter, HTTPException, Depends
 from controllers.admin.admin_document_submissions import (
     get_submission_by_id,
+    get_submission_details,
     get_all_submissions,
     delete_submission,
-    update_submission_status
+    update_submission_status,
+    bulk_update_submission_status,
+    reverify_submission
 )
 from utils.utils import get_current_user
+from utils.json_response import MongoJSONResponse
 import logging
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import List
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,6 +23,11 @@ class StatusUpdateRequest(BaseModel):
     status: str
     admin_notes: str
 
+class BulkStatusUpdateRequest(BaseModel):
+    submission_ids: List[str] = Field(..., min_length=1, max_length=500)
+    status: str
+    admin_notes: str
+
  # Route for getting single submission details of users for management
 @router.get("/get-single/{submission_id}")
 async def get_submission(
@@ -31,7 +41,7 @@ async def get_submission(
         if not result["success"]:
             raise HTTPException(status_code=404, detail=result["error"])
         
-        return {"submission": result["submission"]}
+        return MongoJSONResponse({"submission": result["submission"]})
     
     except HTTPException as e:
         raise e
@@ -39,6 +49,27 @@ async def get_submission(
         logger.error(f"Fetch error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
     
+# Admin Route to get one submission with its AI artifacts (listings only return summaries)
+@router.get("/details/{submission_id}")
+async def admin_get_submission_details(
+    submission_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Admin: Get submission details with Gemini breakdown, bounding boxes and evidence images"""
+    try:
+        result = get_submission_details(submission_id)
+        
+        if not result["success"]:
+            raise HTTPException(status_code=404, detail=result["error"])
+        
+        return MongoJSONResponse({"submission": result["submission"]})
+    
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error(f"Details fetch error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Admin Route to get all document submissions 
 @router.get("/get-all")
 async def admin_get_all_submissions():
@@ -49,7 +80,7 @@ async def admin_get_all_submissions():
         if not result["success"]:
             raise HTTPException(status_code=500, detail=result["error"])
         
-        return {"submissions": result["submissions"]}
+        return MongoJSONResponse({"submissions": result["submissions"]})
     
     except HTTPException as e:
         raise e
@@ -91,4 +122,33 @@ async def admin_update_status(
     )
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
-    return result
\ No newline at end of file
+    return result
+
+# Admin Route to update the status of many submissions at once
+@router.patch("/bulk/update-status")
+async def admin_bulk_update_status(
+    request: BulkStatusUpdateRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """Admin: Update the status of many submissions (approve/reject)"""
+    result = bulk_update_submission_status(
+        request.submission_ids,
+        request.status,
+        request.admin_notes,
+        current_user
+    )
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+# Admin Route to re-run AI verification without the cache
+@router.post("/reverify/{submission_id}")
+async def admin_reverify_submission(
+    submission_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Admin: Re-run Gemini verification for a submission (bypasses the cache)"""
+    result = reverify_submission(submission_id)
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
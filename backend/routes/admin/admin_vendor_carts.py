@@ -1,19 +1,24 @@
-from fastapi import APIRouter, HTTPException, Body, Query
+from fastapi import APIRouter, HTTPException, Body, Query, Depends
 from controllers.admin.admin_vendor_carts import (
     fetch_vendor_carts,
     get_vendor_cart_by_id,
     create_vendor_cart,
     update_vendor_cart,
     update_vendor_cart_status,
+    bulk_update_vendor_cart_status,
     delete_vendor_cart,
     get_slot_config,
     update_slot_config,
     get_slot_availability,
     check_user_eligibility,
     check_cart_eligibility,
+    check_users_eligibility_bulk,
+    check_carts_eligibility_bulk,
     get_vendor_cart_stats
 )
-from models.vendor_slots import VendorCartCreate, VendorCartUpdate
+from utils.json_response import MongoJSONResponse
+from utils.utils import get_current_user
+from models.vendor_slots import VendorCartCreate, VendorCartUpdate, BulkEligibilityRequest, VendorCartBulkStatusUpdate
 
 # Initialize router ONCE at the top
 router = APIRouter()
@@ -78,6 +83,22 @@ def check_cart_eligibility_endpoint(cart_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/eligibility/users/bulk")
+def check_users_eligibility_bulk_endpoint(data: BulkEligibilityRequest):
+    """Check vendor eligibility for many users at once"""
+    try:
+        return check_users_eligibility_bulk(data.ids)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/eligibility/carts/bulk")
+def check_carts_eligibility_bulk_endpoint(data: BulkEligibilityRequest):
+    """Check eligibility for many cart records at once"""
+    try:
+        return check_carts_eligibility_bulk(data.ids)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 # ==================== CRUD OPERATIONS ====================
 
 @router.get("/get-all")
@@ -100,7 +121,7 @@ def get_vendor_carts(
         
         result = fetch_vendor_carts(filters, limit, skip)
         # Return just records for backward compatibility
-        return result["records"]
+        return MongoJSONResponse(result["records"])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -122,15 +143,15 @@ def list_vendor_carts(
         if has_required_info is not None:
             filters["has_required_info"] = has_required_info
         
-        return fetch_vendor_carts(filters, limit, skip)
+        return MongoJSONResponse(fetch_vendor_carts(filters, limit, skip))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/stats")
-def get_stats():
+def get_stats(fresh: bool = Query(False, description="Recompute counters from vendor_carts")):
     """Get vendor cart statistics"""
     try:
-        return get_vendor_cart_stats()
+        return get_vendor_cart_stats(fresh)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -138,7 +159,7 @@ def get_stats():
 def get_cart_by_id(cart_id: str):
     """Get a single vendor cart by ID"""
     try:
-        return get_vendor_cart_by_id(cart_id)
+        return MongoJSONResponse(get_vendor_cart_by_id(cart_id))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -159,7 +180,7 @@ def update_cart(cart_id: str, data: VendorCartUpdate):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/update-status/{cart_id}")
-def update_status(cart_id: str, data: dict = Body(...)):
+def update_status(cart_id: str, data: dict = Body(...), current_user: dict = Depends(get_current_user)):
     """Update vendor cart status"""
     status = data.get("status")
     print(f"[DEBUG] Received update-status request: cart_id={cart_id}, status={status}")
@@ -167,13 +188,21 @@ def update_status(cart_id: str, data: dict = Body(...)):
         print("[DEBUG] Status missing in request body")
         raise HTTPException(status_code=400, detail="Status is required")
     try:
-        result = update_vendor_cart_status(cart_id, status)
+        result = update_vendor_cart_status(cart_id, status, current_user)
         print(f"[DEBUG] Update result: {result}")
         return result
     except Exception as e:
         print(f"[DEBUG] Exception in update_vendor_cart_status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.put("/bulk/update-status")
+def bulk_update_status(data: VendorCartBulkStatusUpdate, current_user: dict = Depends(get_current_user)):
+    """Update the status of many vendor carts at once"""
+    try:
+        return bulk_update_vendor_cart_status(data.cart_ids, data.status, current_user)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.delete("/{cart_id}")
 def delete_cart(cart_id: str):
     """Delete a vendor cart record"""
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, HTTPException, File, UploadFile, Form, Depends
+from fastapi import APIRouter, HTTPException, File, UploadFile, Form, Depends, Request, Query
 from controllers.document_submissions import (
     submit_document,
     get_user_submissions,
     get_submission_by_id,
+    get_submission_evidence,
+    evidence_path,
 )
+from utils.render_cache import rendered_image_response, verify_render_signature
+from utils.json_response import MongoJSONResponse
 from utils.utils import get_current_user
 from typing import List
 import logging
@@ -58,7 +62,7 @@ async def get_submissions(current_user: dict = Depends(get_current_user)):
         if not result["success"]:
             raise HTTPException(status_code=500, detail=result["error"])
         
-        return {"submissions": result["submissions"]}
+        return MongoJSONResponse({"submissions": result["submissions"]})
     
     except HTTPException as e:
         raise e
@@ -80,7 +84,7 @@ async def get_submission(
         if not result["success"]:
             raise HTTPException(status_code=404, detail=result["error"])
         
-        return {"submission": result["submission"]}
+        return MongoJSONResponse({"submission": result["submission"]})
     
     except HTTPException as e:
         raise e
@@ -89,3 +93,30 @@ async def get_submission(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Route for the visual evidence image of one submitted file (rendered on first view)
+# Opened from <img> tags, so it is authorized by the expiring signed URL returned with the submission details
+@router.get("/evidence/{submission_id}/{index}")
+def get_evidence_image(
+    submission_id: str,
+    index: int,
+    request: Request,
+    exp: int = Query(0),
+    sig: str = Query("")
+):
+    """Evidence image with green key terms and red text blocks"""
+    try:
+        if not verify_render_signature(evidence_path(submission_id, index), exp, sig):
+            raise HTTPException(status_code=403, detail="Invalid evidence link")
+        
+        result = get_submission_evidence(submission_id, index)
+        
+        if not result["success"]:
+            raise HTTPException(status_code=404, detail=result["error"])
+        
+        return rendered_image_response(request, "document_evidence", result["key"], result["render"])
+    
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error(f"Evidence render error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
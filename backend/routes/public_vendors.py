@@ -1,22 +1,33 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Request
 from typing import Optional
 from controllers.public_vendors import (
     get_approved_vendors,
     get_vendor_detail,
     get_vendor_categories,
+    get_nearby_vendors,
 )
+from utils.vendor_directory import get_directory_version
+from utils.http_cache import cached_json_response
 
 router = APIRouter()
 
 
 @router.get("/categories")
-def list_vendor_categories():
+def list_vendor_categories(request: Request):
     """Get all vendor categories (goods types)"""
-    return get_vendor_categories()
+    version, updated_at = get_directory_version()
+    return cached_json_response(
+        request,
+        "vendors:categories",
+        version,
+        get_vendor_categories,
+        last_modified=updated_at,
+    )
 
 
 @router.get("/list")
 def list_vendors(
+    request: Request,
     goods_type: Optional[str] = Query(None, description="Filter by goods type"),
     delivery_capable: Optional[bool] = Query(None, description="Filter by delivery capability"),
     barangay: Optional[str] = Query(None, description="Filter by barangay"),
@@ -24,10 +35,37 @@ def list_vendors(
     limit: int = Query(50, ge=1, le=100),
 ):
     """Get approved vendors with filters (public access)"""
-    return get_approved_vendors(goods_type, delivery_capable, barangay, skip, limit)
+    version, updated_at = get_directory_version()
+    return cached_json_response(
+        request,
+        f"vendors:list:{goods_type}:{delivery_capable}:{barangay}:{skip}:{limit}",
+        version,
+        lambda: get_approved_vendors(goods_type, delivery_capable, barangay, skip, limit),
+        last_modified=updated_at,
+    )
+
+
+@router.get("/nearby")
+def list_nearby_vendors(
+    lat: float = Query(..., ge=-90, le=90, description="User latitude"),
+    lng: float = Query(..., ge=-180, le=180, description="User longitude"),
+    radius_m: float = Query(2000, gt=0, le=50000, description="Search radius in meters"),
+    limit: int = Query(20, ge=1, le=100),
+    goods_type: Optional[str] = Query(None, description="Filter by goods type"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+):
+    """Get vendors nearest to a location, ordered by distance (public access)"""
+    return get_nearby_vendors(lat, lng, radius_m, limit, goods_type, cursor)
 
 
 @router.get("/{vendor_id}")
-def get_vendor(vendor_id: str):
+def get_vendor(request: Request, vendor_id: str):
     """Get vendor details (public access)"""
-    return get_vendor_detail(vendor_id)
+    version, updated_at = get_directory_version()
+    return cached_json_response(
+        request,
+        f"vendors:detail:{vendor_id}",
+        version,
+        lambda: get_vendor_detail(vendor_id),
+        last_modified=updated_at,
+    )
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from secrets_backend.controllers.firestore_monitor import log_user_interaction
+from pydantic import BaseModel, Field
+from typing import List
+from utils.interaction_buffer import build_interaction_record, enqueue_interactions, write_interaction
 
 router = APIRouter()
 
@@ -11,16 +12,43 @@ class UserInteractionRequest(BaseModel):
     user_lng: float
     timestamp: str = None  # Optional, ISO format
 
+class UserInteractionBatchRequest(BaseModel):
+    interactions: List[UserInteractionRequest] = Field(..., min_length=1, max_length=500)
+
 @router.post("/log-user-interaction")
 def log_user_interaction_endpoint(payload: UserInteractionRequest):
     try:
-        log_user_interaction(
+        write_interaction(build_interaction_record(
             user_id=payload.user_id,
             action=payload.action,
             user_lat=payload.user_lat,
             user_lng=payload.user_lng,
             timestamp=payload.timestamp
-        )
+        ))
         return {"status": "success"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/log-user-interactions", status_code=202)
+def log_user_interactions_batch_endpoint(payload: UserInteractionBatchRequest):
+    """Buffered batch ingestion: pings go to the same sink as /log-user-interaction, in the background"""
+    records = [
+        build_interaction_record(
+            user_id=item.user_id,
+            action=item.action,
+            user_lat=item.user_lat,
+            user_lng=item.user_lng,
+            timestamp=item.timestamp
+        )
+        for item in payload.interactions
+    ]
+
+    if not enqueue_interactions(records):
+        # Backpressure: the client should keep its pings and retry later
+        raise HTTPException(
+            status_code=503,
+            detail="Interaction buffer is full, retry later",
+            headers={"Retry-After": "2"}
+        )
+
+    return {"status": "accepted", "accepted": len(records)}
@@ -1,11 +1,20 @@
 from fastapi import APIRouter, Depends
 from controllers.vendor_application_controller import apply_as_vendor, get_vendor_application, update_vendor_application, activate_vendor_role
 from controllers.admin.admin_vendor_carts import get_slot_availability, check_user_eligibility
+from controllers.public_vendors import update_vendor_location
 from models.vendor_application_model import VendorApplicationCreate
 from utils.utils import get_current_user
+from pydantic import BaseModel, Field
+from typing import Optional
 
 router = APIRouter()
 
+
+class VendorLocationRequest(BaseModel):
+    lat: Optional[float] = Field(None, ge=-90, le=90)
+    lng: Optional[float] = Field(None, ge=-180, le=180)
+    active: bool = True  # False when the vendor stops sharing
+
 # ==================== SLOT & ELIGIBILITY (Public for Mobile Users) ====================
 
 @router.get("/slots/availability")
@@ -45,3 +54,14 @@ def update_vendor(
 @router.post("/activate")
 def activate_vendor(current_user=Depends(get_current_user)):
     return activate_vendor_role(current_user)
+
+
+# ==================== LOCATION ====================
+
+@router.put("/location")
+def update_location(
+    data: VendorLocationRequest,
+    current_user=Depends(get_current_user)
+):
+    """Update the vendor's current cart location (used by /vendors/nearby); sent by the mobile location screen"""
+    return update_vendor_location(data.lat, data.lng, data.active, current_user)
@@ -1,6 +1,9 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Request
 from fastapi.responses import JSONResponse
-from controllers.vendor_carts import predict_vendor_cart
+from controllers.vendor_carts import predict_vendor_cart, get_annotated_cart
+from utils.render_cache import rendered_image_response, with_public_urls
+from utils.json_response import MongoJSONResponse
+from models.vendor_carts import CART_LIST_PROJECTION
 from datetime import datetime
 from config.db import db
 from bson import ObjectId
@@ -53,18 +56,16 @@ def get_scan_records(
         if has_required_info is not None:
             query["has_required_info"] = has_required_info
         
-        # Fetch records with limit
-        scan_records = list(db["vendor_carts"].find(query).limit(limit).sort("created_at", -1))
-
-        # Transform ObjectId to string for JSON serialization
+        # Fetch records with limit (ObjectIds are serialized by MongoJSONResponse)
+        scan_records = list(db["vendor_carts"].find(query, CART_LIST_PROJECTION).limit(limit).sort("created_at", -1))
         for record in scan_records:
-            record["_id"] = str(record["_id"])
+            with_public_urls(record, "postprocessed_image_url")
 
-        return {
+        return MongoJSONResponse({
             "success": True,
             "count": len(scan_records),
             "records": scan_records
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch scan records: {str(e)}")
 
@@ -82,13 +83,24 @@ def get_cart_by_id(cart_id: str):
         if not record:
             raise HTTPException(status_code=404, detail="Cart record not found.")
         
-        record["_id"] = str(record["_id"])
-        
-        return {
+        return MongoJSONResponse({
             "success": True,
-            "record": record
-        }
+            "record": with_public_urls(record, "postprocessed_image_url")
+        })
+    except HTTPException as http_err:
+        raise http_err
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch cart record: {str(e)}")
+
+@router.get("/vendor/cart-records/{cart_id}/annotated")
+def get_annotated_cart_image(cart_id: str, request: Request):
+    """
+    Annotated scan image (detections drawn on the original), rendered on first request and cached.
+    """
+    try:
+        key, render = get_annotated_cart(cart_id)
+        return rendered_image_response(request, "vendor_carts", key, render)
     except HTTPException as http_err:
         raise http_err
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch cart record: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to render annotated image: {str(e)}")
@@ -12,6 +12,19 @@ from routes.admin import admin_vendor_carts, admin_base_documents, admin_documen
 
 # Vendor Routes
 from routes.vendor_application_routes import router as vendor_application_router
+
+# Indexes
+from utils.search_index import ensure_search_indexes
+from utils.vendor_directory import ensure_directory_indexes
+from utils.verification_cache import ensure_verification_cache_indexes
+from utils.bbox_codec import ensure_bounding_box_format
+from utils.submission_artifacts import ensure_submission_artifacts
+
+# Background workers
+from utils.interaction_buffer import start_interaction_buffer
+from utils.slot_ledger import start_slot_reconciler
+from controllers.admin.admin_vendor_carts import start_slot_config_watcher
+from utils.notification_dispatcher import start_notification_dispatcher
  
 # Declaration
 app = FastAPI()
@@ -113,6 +126,16 @@ api_app.include_router(public_vendors.router, prefix="/vendors", tags=["Public V
 #     uvicorn.run("server:app", reload=True)
 
 start_firestore_monitor()  # This will listen for Firestore changes and log events to MongoDB
+start_interaction_buffer()  # Flushes batched user interaction pings to the interaction log
+start_slot_reconciler()  # Periodically rebuilds the vendor slot ledger from vendor_applications
+start_slot_config_watcher()  # Keeps the in-process slot config cache coherent across workers
+start_notification_dispatcher()  # Sends queued push notifications in FCM send_each batches
+
+ensure_search_indexes()  # Prefix search index for admin user/vendor search (backfill runs in the background)
+ensure_directory_indexes()  # Materialized public vendor directory for /vendors
+ensure_verification_cache_indexes()  # LRU eviction index for cached Gemini verifications
+ensure_bounding_box_format()  # Packs bounding boxes of older document submissions (once, in the background)
+ensure_submission_artifacts()  # Moves AI artifacts of older submissions to their side collection (once, in the background)
 
 # For Mobile Device Ip Testing / Deployment
 if __name__ == "__main__":
@@ -0,0 +1,141 @@
+import logging
+import numpy as np
+from bson.binary import Binary
+from pymongo import UpdateOne
+from config.db import db
+
+logger = logging.getLogger(__name__)
+
+# Compact bounding box storage for document_submissions
+# Cloud Vision boxes used to be stored as nested {"x", "y"} vertex dicts for
+# every word and block, which made dense documents several times larger than
+# the rest of the record. Each file's boxes are now stored as:
+#   {"format": "packed-v1",
+#    "words": Binary(int16 LE, 8 per word: x1 y1 x2 y2 x3 y3 x4 y4),
+#    "word_texts": [str, ...],            # parallel to words
+#    "word_confidence": Binary(uint8, 0-100 per word),
+#    "blocks": Binary(int16 LE, 8 per block),
+#    "block_confidence": Binary(uint8, 0-100 per block)}
+# decode_bounding_boxes() turns either format back into the vertex dicts the
+# UI and the evidence renderer expect.
+
+PACKED_FORMAT = "packed-v1"
+VERTICES = 4
+INT16_MIN, INT16_MAX = -32768, 32767
+
+# Records that still hold vertex dicts (arrays where packed records hold binary)
+LEGACY_QUERY = {
+    "$or": [
+        {"bounding_boxes": {"$elemMatch": {"words": {"$type": "array"}}}},
+        {"bounding_boxes": {"$elemMatch": {"blocks": {"$type": "array"}}}},
+    ]
+}
+
+
+def is_packed(boxes) -> bool:
+    return isinstance(boxes, dict) and boxes.get("format") == PACKED_FORMAT
+
+
+def _pack_vertices(items: list) -> Binary:
+    coords = np.zeros((len(items), VERTICES * 2), dtype="<i2")
+    for row, item in enumerate(items):
+        vertices = (item.get("vertices") or [])[:VERTICES]
+        for col, vertex in enumerate(vertices):
+            coords[row, col * 2] = min(INT16_MAX, max(INT16_MIN, int(vertex.get("x", 0))))
+            coords[row, col * 2 + 1] = min(INT16_MAX, max(INT16_MIN, int(vertex.get("y", 0))))
+        # Pad short polygons with their last vertex
+        for col in range(len(vertices), VERTICES if vertices else 0):
+            coords[row, col * 2:col * 2 + 2] = coords[row, (len(vertices) - 1) * 2:len(vertices) * 2]
+    return Binary(coords.tobytes())
+
+
+def _pack_confidence(items: list) -> Binary:
+    values = [round(float(item.get("confidence") or 0) * 100) for item in items]
+    return Binary(np.clip(np.array(values, dtype=np.int32), 0, 100).astype(np.uint8).tobytes())
+
+
+def _unpack_vertices(data) -> list:
+    coords = np.frombuffer(bytes(data or b""), dtype="<i2").reshape(-1, VERTICES * 2).tolist()
+    return [
+        [{"x": row[i], "y": row[i + 1]} for i in range(0, VERTICES * 2, 2)]
+        for row in coords
+    ]
+
+
+def _unpack_confidence(data) -> list:
+    return [v / 100 for v in np.frombuffer(bytes(data or b""), dtype=np.uint8).tolist()]
+
+
+def encode_bounding_boxes(boxes: dict) -> dict:
+    """Packed form of one file's {"blocks", "words"} boxes (empty / packed input is returned as is)"""
+    if not boxes or is_packed(boxes):
+        return boxes or {}
+    words = boxes.get("words", [])
+    blocks = boxes.get("blocks", [])
+    return {
+        "format": PACKED_FORMAT,
+        "words": _pack_vertices(words),
+        "word_texts": [w.get("text", "") for w in words],
+        "word_confidence": _pack_confidence(words),
+        "blocks": _pack_vertices(blocks),
+        "block_confidence": _pack_confidence(blocks),
+    }
+
+
+def decode_bounding_boxes(boxes: dict) -> dict:
+    """Vertex-dict form of one file's boxes, from either storage format"""
+    if not is_packed(boxes):
+        return boxes or {}
+    word_vertices = _unpack_vertices(boxes.get("words"))
+    word_confidence = _unpack_confidence(boxes.get("word_confidence"))
+    block_vertices = _unpack_vertices(boxes.get("blocks"))
+    block_confidence = _unpack_confidence(boxes.get("block_confidence"))
+    return {
+        "blocks": [
+            {"vertices": vertices, "confidence": confidence}
+            for vertices, confidence in zip(block_vertices, block_confidence)
+        ],
+        "words": [
+            {"text": text, "vertices": vertices, "confidence": confidence}
+            for text, vertices, confidence in zip(boxes.get("word_texts", []), word_vertices, word_confidence)
+        ],
+    }
+
+
+def decode_submission_boxes(submission: dict) -> dict:
+    """Decode the bounding_boxes list of a fetched submission in place"""
+    if submission.get("bounding_boxes"):
+        submission["bounding_boxes"] = [decode_bounding_boxes(b) for b in submission["bounding_boxes"]]
+    return submission
+
+
+# ==================== MIGRATION ====================
+
+def migrate_bounding_boxes(batch_size: int = 200) -> int:
+    """Re-encode submissions still stored with vertex dicts; returns the number migrated"""
+    migrated = 0
+    operations = []
+    for submission in db["document_submissions"].find(LEGACY_QUERY, {"bounding_boxes": 1}):
+        packed = [encode_bounding_boxes(b) for b in submission.get("bounding_boxes", [])]
+        # Only replace the exact list read, so a concurrent write is not overwritten
+        operations.append(UpdateOne(
+            {"_id": submission["_id"], "bounding_boxes": submission["bounding_boxes"]},
+            {"$set": {"bounding_boxes": packed}}
+        ))
+        if len(operations) >= batch_size:
+            migrated += db["document_submissions"].bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        migrated += db["document_submissions"].bulk_write(operations, ordered=False).modified_count
+    return migrated
+
+
+def ensure_bounding_box_format():
+    """Migrate older submissions to the packed format (startup; runs once, in the background)"""
+    # Imported here: schema_migrations is only needed at startup
+    from utils.schema_migrations import run_migration_in_background
+    run_migration_in_background(
+        "bounding_box_format",
+        PACKED_FORMAT,
+        lambda: f"packed bounding boxes of {migrate_bounding_boxes()} submissions",
+    )
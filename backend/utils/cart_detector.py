@@ -0,0 +1,169 @@
+import glob
+import hashlib
+import logging
+import os
+import shutil
+import numpy as np
+from ultralytics import YOLO
+
+logger = logging.getLogger(__name__)
+
+# Cart detector inference backend
+# CART_MODEL_BACKEND picks how best.pt is run on CPU:
+#   "pytorch"  - ultralytics + PyTorch (default)
+#   "onnx"     - ONNX Runtime
+#   "openvino" - OpenVINO
+# Exported models are written next to best.pt on first use and reused
+# afterwards. Their names carry a hash of best.pt and the inference size, so
+# retrained weights or a new CART_MODEL_IMGSZ produce a fresh export (older
+# exports for the same backend are deleted). CART_MODEL_INT8=true quantizes them (OpenVINO: post-training
+# INT8 via ultralytics; ONNX: dynamic INT8 with onnxruntime). When
+# CART_MODEL_PARITY_IMAGE is set the export is checked against PyTorch on that
+# image; INT8 requires it. A parity mismatch or any other failure falls back
+# to the PyTorch model.
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), '../secrets_backend')
+PYTORCH_MODEL_PATH = os.path.join(MODEL_DIR, 'best.pt')
+
+CART_MODEL_BACKEND = os.getenv("CART_MODEL_BACKEND", "pytorch").lower()
+CART_MODEL_INT8 = os.getenv("CART_MODEL_INT8", "false").lower() == "true"
+CART_MODEL_IMGSZ = int(os.getenv("CART_MODEL_IMGSZ", "0"))  # 0 = the size best.pt was trained at
+CART_MODEL_CALIBRATION_DATA = os.getenv("CART_MODEL_CALIBRATION_DATA")  # dataset yaml for OpenVINO INT8
+CART_MODEL_PARITY_IMAGE = os.getenv("CART_MODEL_PARITY_IMAGE")  # sample image checked after export
+
+# Tolerances for exported vs PyTorch detections
+BOX_TOLERANCE = 3.0     # pixels
+CONF_TOLERANCE = 0.05
+
+_imgsz = None
+_weights_hash = None
+
+
+def cart_model_imgsz() -> int:
+    """Inference size shared by export and every predict call (static exported models need it fixed)"""
+    global _imgsz
+    if _imgsz is None:
+        imgsz = CART_MODEL_IMGSZ or YOLO(PYTORCH_MODEL_PATH).overrides.get("imgsz", 640)
+        _imgsz = int(max(imgsz) if isinstance(imgsz, (list, tuple)) else imgsz)
+    return _imgsz
+
+
+def weights_hash() -> str:
+    """Short SHA-1 of best.pt (identifies the weights an export was made from)"""
+    global _weights_hash
+    if _weights_hash is None:
+        digest = hashlib.sha1()
+        with open(PYTORCH_MODEL_PATH, "rb") as weights:
+            for chunk in iter(lambda: weights.read(1024 * 1024), b""):
+                digest.update(chunk)
+        _weights_hash = digest.hexdigest()[:12]
+    return _weights_hash
+
+
+def _export_name(backend: str, int8: bool, tag: str) -> str:
+    suffix = "_int8" if int8 else ""
+    if backend == "onnx":
+        return f"best_{tag}{suffix}.onnx"
+    return f"best_{tag}{suffix}_openvino_model"
+
+
+def _exported_path(backend: str, int8: bool) -> str:
+    return os.path.join(MODEL_DIR, _export_name(backend, int8, f"{weights_hash()}_{cart_model_imgsz()}"))
+
+
+def _remove_stale_exports(backend: str, int8: bool, keep: str):
+    """Delete exports of this backend made from other weights or at another size"""
+    for path in glob.glob(os.path.join(MODEL_DIR, _export_name(backend, int8, "*"))):
+        if os.path.abspath(path) == os.path.abspath(keep):
+            continue
+        # "*" also matches the INT8 variant of a float export name
+        if not int8 and "_int8" in os.path.basename(path):
+            continue
+        try:
+            shutil.rmtree(path) if os.path.isdir(path) else os.remove(path)
+            logger.info(f"Removed stale cart model export: {path}")
+        except OSError as e:
+            logger.warning(f"Could not remove stale cart model export {path}: {str(e)}")
+
+
+def export_cart_model(backend: str, int8: bool = False) -> str:
+    """Export best.pt for a backend (once per weights and size) and return the artifact path"""
+    target = _exported_path(backend, int8)
+    if os.path.exists(target):
+        return target
+
+    source = YOLO(PYTORCH_MODEL_PATH)
+    if backend == "onnx":
+        exported = source.export(format="onnx", imgsz=cart_model_imgsz(), simplify=True)
+        if int8:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            quantize_dynamic(exported, target, weight_type=QuantType.QUInt8)
+            exported = target
+    elif backend == "openvino":
+        export_args = {"format": "openvino", "imgsz": cart_model_imgsz(), "int8": int8}
+        if int8 and CART_MODEL_CALIBRATION_DATA:
+            export_args["data"] = CART_MODEL_CALIBRATION_DATA
+        exported = source.export(**export_args)
+    else:
+        raise ValueError(f"Unknown cart model backend: {backend}")
+
+    if os.path.abspath(exported) != os.path.abspath(target):
+        os.replace(exported, target)
+    _remove_stale_exports(backend, int8, target)
+    logger.info(f"Exported cart model for {backend}{' (INT8)' if int8 else ''}: {target}")
+    return target
+
+
+def _detections(model, image) -> list:
+    detections = []
+    for result in model(image, imgsz=cart_model_imgsz(), verbose=False):
+        for box, conf, cls in zip(result.boxes.xyxy.tolist(), result.boxes.conf.tolist(), result.boxes.cls.tolist()):
+            detections.append((int(cls), float(conf), box))
+    return sorted(detections, key=lambda d: -d[1])
+
+
+def compare_with_pytorch(model, image, pytorch_model=None) -> dict:
+    """Check an exported model's detections against PyTorch on one image"""
+    pytorch_model = pytorch_model or YOLO(PYTORCH_MODEL_PATH)
+    expected = _detections(pytorch_model, image)
+    actual = _detections(model, image)
+
+    mismatches = []
+    if len(expected) != len(actual):
+        mismatches.append(f"{len(actual)} detections vs {len(expected)}")
+    for (e_cls, e_conf, e_box), (a_cls, a_conf, a_box) in zip(expected, actual):
+        box_diff = float(np.max(np.abs(np.array(e_box) - np.array(a_box))))
+        if e_cls != a_cls or abs(e_conf - a_conf) > CONF_TOLERANCE or box_diff > BOX_TOLERANCE:
+            mismatches.append(f"class {a_cls}/{e_cls}, conf {a_conf:.3f}/{e_conf:.3f}, box diff {box_diff:.1f}px")
+    return {"matches": not mismatches, "mismatches": mismatches}
+
+
+def load_cart_model():
+    """YOLO model for the configured backend (PyTorch if export, load or parity check fails)"""
+    if CART_MODEL_BACKEND == "pytorch":
+        return YOLO(PYTORCH_MODEL_PATH)
+
+    if CART_MODEL_INT8 and not CART_MODEL_PARITY_IMAGE:
+        logger.error("CART_MODEL_INT8 requires CART_MODEL_PARITY_IMAGE, using PyTorch")
+        return YOLO(PYTORCH_MODEL_PATH)
+
+    try:
+        path = export_cart_model(CART_MODEL_BACKEND, CART_MODEL_INT8)
+        model = YOLO(path, task="detect")
+
+        if CART_MODEL_PARITY_IMAGE:
+            import cv2
+            image = cv2.imread(CART_MODEL_PARITY_IMAGE)
+            if image is None:
+                raise ValueError(f"Could not read parity image: {CART_MODEL_PARITY_IMAGE}")
+            pytorch_model = YOLO(PYTORCH_MODEL_PATH)
+            parity = compare_with_pytorch(model, image, pytorch_model)
+            if not parity["matches"]:
+                logger.error(f"Cart model {CART_MODEL_BACKEND} differs from PyTorch, using PyTorch: {parity['mismatches']}")
+                return pytorch_model
+
+        logger.info(f"Cart detector running on {CART_MODEL_BACKEND}{' (INT8)' if CART_MODEL_INT8 else ''}")
+        return model
+    except Exception as e:
+        logger.error(f"Failed to load {CART_MODEL_BACKEND} cart model, using PyTorch: {str(e)}")
+        return YOLO(PYTORCH_MODEL_PATH)
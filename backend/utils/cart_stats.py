@@ -0,0 +1,126 @@
+import logging
+from datetime import datetime
+from config.db import db
+
+logger = logging.getLogger(__name__)
+
+# Vendor cart statistics
+# Counters are computed in one aggregation pass and mirrored into a single
+# counters document that is adjusted with $inc on every cart insert, update
+# and delete, so the stats endpoint is a single document read.
+
+CART_STATUSES = ["Pending", "Investigating", "Located", "Permit Processing", "Resolved", "Ignored"]
+
+COUNTERS_COLLECTION = "stats_counters"
+COUNTERS_ID = "vendor_carts"
+
+
+def _status_key(status: str) -> str:
+    return f"status_{status.lower().replace(' ', '_')}"
+
+
+def cart_counter_values(cart: dict) -> dict:
+    """Counters a single cart record contributes to (0/1 per counter)"""
+    if not cart:
+        return {}
+
+    registry = cart.get("cart_registry_no")
+    values = {
+        "total": 1,
+        "pasig_carts": 1 if cart.get("is_pasig_cart") is True else 0,
+        "with_registry_number": 1 if registry not in (None, "") else 0,
+        "with_required_info": 1 if cart.get("has_required_info") is True else 0,
+    }
+    for status in CART_STATUSES:
+        values[_status_key(status)] = 1 if cart.get("status") == status else 0
+    return values
+
+
+def _cart_delta(before: dict = None, after: dict = None) -> dict:
+    old = cart_counter_values(before)
+    new = cart_counter_values(after)
+    return {k: new.get(k, 0) - old.get(k, 0) for k in set(old) | set(new)}
+
+
+def record_cart_change(before: dict = None, after: dict = None):
+    """
+    Apply the counter delta between two versions of a cart.
+    Use before=None for inserts and after=None for deletes.
+    """
+    record_cart_changes([(before, after)])
+
+
+def record_cart_changes(changes: list):
+    """Apply the summed counter delta of many (before, after) pairs in one $inc"""
+    delta = {}
+    for before, after in changes:
+        for k, v in _cart_delta(before, after).items():
+            delta[k] = delta.get(k, 0) + v
+    delta = {k: v for k, v in delta.items() if v}
+    if not delta:
+        return
+
+    try:
+        result = db[COUNTERS_COLLECTION].update_one(
+            {"_id": COUNTERS_ID},
+            {"$inc": delta, "$set": {"updated_at": datetime.utcnow()}},
+        )
+        if result.matched_count == 0:
+            # First write since the counters existed: seed them from the collection
+            # (the cart write has already happened, so it is included)
+            rebuild_cart_counters()
+    except Exception as e:
+        # Counters are reconciled by rebuild_cart_counters; never fail the cart write
+        logger.error(f"Failed to update vendor cart counters: {str(e)}")
+
+
+def compute_cart_counters() -> dict:
+    """Compute every counter in a single $group pass over vendor_carts"""
+    def count_if(condition):
+        return {"$sum": {"$cond": [condition, 1, 0]}}
+
+    group = {
+        "_id": None,
+        "total": {"$sum": 1},
+        "pasig_carts": count_if({"$eq": ["$is_pasig_cart", True]}),
+        "with_registry_number": count_if({
+            "$not": [{"$in": [{"$ifNull": ["$cart_registry_no", None]}, [None, ""]]}]
+        }),
+        "with_required_info": count_if({"$eq": ["$has_required_info", True]}),
+    }
+    for status in CART_STATUSES:
+        group[_status_key(status)] = count_if({"$eq": ["$status", status]})
+
+    result = next(db["vendor_carts"].aggregate([{"$group": group}]), None) or {}
+    return {k: result.get(k, 0) for k in group if k != "_id"}
+
+
+def rebuild_cart_counters() -> dict:
+    """Recompute counters from scratch and store them (reconciliation)"""
+    counters = compute_cart_counters()
+    db[COUNTERS_COLLECTION].replace_one(
+        {"_id": COUNTERS_ID},
+        {**counters, "updated_at": datetime.utcnow()},
+        upsert=True,
+    )
+    return counters
+
+
+def format_cart_stats(counters: dict) -> dict:
+    """Shape counters like the stats endpoint response"""
+    return {
+        "total": counters.get("total", 0),
+        "status_breakdown": {s: counters.get(_status_key(s), 0) for s in CART_STATUSES},
+        "pasig_carts": counters.get("pasig_carts", 0),
+        "with_registry_number": counters.get("with_registry_number", 0),
+        "with_required_info": counters.get("with_required_info", 0),
+    }
+
+
+def get_cart_counters(fresh: bool = False) -> dict:
+    """Read the maintained counters document, rebuilding it if missing or requested"""
+    if not fresh:
+        counters = db[COUNTERS_COLLECTION].find_one({"_id": COUNTERS_ID})
+        if counters:
+            return counters
+    return rebuild_cart_counters()
@@ -0,0 +1,86 @@
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+# Cart registry / sanitary email extraction
+# Patterns are compiled once. The OCR full text is searched for the labelled
+# number and the email; bare numbers are only scanned when nothing better is
+# found, and the detected tokens are walked once in reading order.
+
+DEFAULT_PHONE_EXCLUSIONS = "8643,1111,1531"  # known 4-digit phone fragments printed on carts
+
+
+def _phone_exclusions() -> frozenset:
+    raw = os.getenv("CART_PHONE_EXCLUSIONS", DEFAULT_PHONE_EXCLUSIONS)
+    return frozenset(n.strip() for n in raw.split(",") if n.strip())
+
+
+class CartTextExtractor:
+    """Extracts cart registry number, sanitary email and the PASIG marker from OCR output"""
+
+    # Separate precompiled patterns: a literal-prefixed search is much faster than one
+    # alternation that tries every branch at every position (benchmarks/bench_cart_text.py)
+    LABELLED_PATTERN = re.compile(r"CART\s*REGISTRY\s*(?:NO|NUMBER)\.?\s*:?\s*(\d{4})", re.IGNORECASE)
+    EMAIL_PATTERN = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b")
+    LABEL_PATTERN = re.compile(r"CART\s*REGISTRY", re.IGNORECASE)
+    NUMBER_PATTERN = re.compile(r"\b(\d{4})\b")
+
+    # How many tokens after a "CART REGISTRY" label may hold its number (reading order)
+    LABEL_WINDOW = 3
+
+    def __init__(self, phone_exclusions=None):
+        self.phone_exclusions = frozenset(phone_exclusions) if phone_exclusions is not None else _phone_exclusions()
+
+    def _fallback_number(self, full_text: str):
+        """First bare 4-digit number that is not inside an email address or a known phone fragment"""
+        emails = [match.span() for match in self.EMAIL_PATTERN.finditer(full_text)]
+        for match in self.NUMBER_PATTERN.finditer(full_text):
+            if any(start <= match.start() < end for start, end in emails):
+                continue
+            if match.group(1) not in self.phone_exclusions:
+                return match.group(1)
+        return None
+
+    def _scan_tokens(self, detected_texts: list):
+        """Number in the tokens right after a CART REGISTRY label (tokens sorted top-to-bottom, left-to-right)"""
+        ordered = sorted(detected_texts, key=lambda t: (t.get("box", [0, 0, 0, 0])[1], t.get("box", [0, 0, 0, 0])[0]))
+        remaining = 0
+        for token in ordered:
+            text = token.get("text", "")
+            if remaining:
+                number = self.NUMBER_PATTERN.search(text)
+                if number:
+                    return number.group(1)
+                remaining -= 1
+            if self.LABEL_PATTERN.search(text):
+                remaining = self.LABEL_WINDOW
+        return None
+
+    def extract(self, full_text: str, detected_texts: list) -> dict:
+        full_text = full_text or ""
+        labelled = self.LABELLED_PATTERN.search(full_text)
+        email = self.EMAIL_PATTERN.search(full_text)
+
+        # Labelled number in the text, then a number next to the label token, then any 4-digit number
+        cart_registry_no = labelled.group(1) if labelled else None
+        if not cart_registry_no and detected_texts:
+            cart_registry_no = self._scan_tokens(detected_texts)
+        if not cart_registry_no:
+            cart_registry_no = self._fallback_number(full_text)
+
+        sanitary_email = email.group(0).lower() if email else None
+        is_pasig_cart = "PASIG" in full_text.upper()
+
+        logger.debug(f"Cart text scan: {len(full_text)} chars, labelled number {'found' if labelled else 'not found'}")
+
+        return {
+            "cart_registry_no": cart_registry_no,
+            "sanitary_email": sanitary_email,
+            "is_pasig_cart": is_pasig_cart,
+            "has_required_info": bool(cart_registry_no and sanitary_email)
+        }
+
+
+cart_text_extractor = CartTextExtractor()
@@ -5,7 +5,6 @@ import logging
 import io
 from PIL import Image, ImageDraw
 from dotenv import load_dotenv
-import cloudinary.uploader
 
 # Load environment variables
 load_dotenv()
@@ -72,22 +71,29 @@ def extract_bounding_boxes(annotations: dict) -> dict:
         return bounding_boxes
 
 # ==========================================
-# 2. CORE: Analyze & Draw
+# 2. CORE: Analyze
 # ==========================================
+def evidence_source_url(image_url: str) -> str:
+    """
+    URL of the image the boxes are measured on.
+    PDFs are downloaded as a PNG of page 1 (Cloudinary converts on extension change).
+    """
+    if image_url.lower().endswith('.pdf'):
+        return image_url.replace('.pdf', '.png')
+    return image_url
+
 async def generate_visual_evidence(image_url: str) -> dict:
     """
-    Orchestrates the entire Visual Evidence process.
+    Runs Cloud Vision on a file and returns its bounding boxes.
     HANDLES PDFs by converting them to PNGs first.
+    The evidence image itself is drawn on demand (see draw_visual_evidence).
     """
     try:
         logger.info(f"🔍 Starting visual analysis for: {image_url}")
 
         # --- STEP A: Handle PDF vs Image ---
-        # If it's a PDF, we change the URL to download a PNG version of Page 1.
-        # Cloudinary allows this by changing the extension.
-        download_url = image_url
-        if image_url.lower().endswith('.pdf'):
-            download_url = image_url.replace('.pdf', '.png')
+        download_url = evidence_source_url(image_url)
+        if download_url != image_url:
             logger.info(f"📄 Detected PDF. Downloading as PNG for visualization: {download_url}")
 
         # --- STEP B: Download Image for Analysis ---
@@ -121,59 +127,48 @@ async def generate_visual_evidence(image_url: str) -> dict:
         annotations = vision_data["responses"][0]
         boxes = extract_bounding_boxes(annotations)
 
-        # --- STEP D: Draw Bounding Boxes (The Visualization) ---
-        logger.info("🎨 Drawing bounding boxes...")
-        
-        try:
-            image = Image.open(io.BytesIO(image_content))
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            draw = ImageDraw.Draw(image)
-
-            # 1. Draw Words (Green for Keywords)
-            for word in boxes["words"]:
-                text_content = word.get("text", "").upper()
-                is_key_term = any(k in text_content for k in POSITIVE_KEYWORDS)
-                
-                vertices = word["vertices"]
-                points = [(v.get("x",0), v.get("y",0)) for v in vertices]
-                
-                # Highlight Key Terms in GREEN
-                if is_key_term:
-                    draw.line(points + [points[0]], fill=(0, 255, 0), width=3)
-
-            # 2. Draw Blocks (Red for Structure)
-            for block in boxes["blocks"]:
-                vertices = block["vertices"]
-                points = [(v.get("x",0), v.get("y",0)) for v in vertices]
-                draw.line(points + [points[0]], fill=(255, 0, 0), width=2)
-
-        except Exception as e:
-            logger.error(f"Error processing image with PIL: {e}")
-            return {"success": False, "error": "Image processing failed"}
-
-        # --- STEP E: Upload Processed Image to Cloudinary ---
-        logger.info("☁️ Uploading evidence image...")
-        
-        buffered = io.BytesIO()
-        image.save(buffered, format="JPEG", quality=85)
-        buffered.seek(0)
-
-        upload_result = cloudinary.uploader.upload(
-            buffered,
-            folder="processed_submissions",
-            resource_type="image"
-        )
-        
-        processed_url = upload_result.get('secure_url')
-
         return {
             "success": True,
-            "file_url_processed": processed_url,
             "bounding_boxes": boxes 
         }
 
     except Exception as e:
         logger.error(f"❌ Visual Evidence Generation Failed: {str(e)}")
-        return {"success": False, "error": str(e)}
\ No newline at end of file
+        return {"success": False, "error": str(e)}
+
+# ==========================================
+# 3. RENDER: Draw (on demand)
+# ==========================================
+def draw_visual_evidence(image_content: bytes, boxes: dict) -> bytes:
+    """
+    Draws key terms (green) and text blocks (red) on the source image.
+    Returns JPEG bytes.
+    """
+    image = Image.open(io.BytesIO(image_content))
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    
+    draw = ImageDraw.Draw(image)
+
+    # 1. Draw Words (Green for Keywords)
+    for word in boxes.get("words", []):
+        text_content = word.get("text", "").upper()
+        is_key_term = any(k in text_content for k in POSITIVE_KEYWORDS)
+        
+        vertices = word["vertices"]
+        points = [(v.get("x",0), v.get("y",0)) for v in vertices]
+        
+        # Highlight Key Terms in GREEN
+        if is_key_term and points:
+            draw.line(points + [points[0]], fill=(0, 255, 0), width=3)
+
+    # 2. Draw Blocks (Red for Structure)
+    for block in boxes.get("blocks", []):
+        vertices = block["vertices"]
+        points = [(v.get("x",0), v.get("y",0)) for v in vertices]
+        if points:
+            draw.line(points + [points[0]], fill=(255, 0, 0), width=2)
+
+    buffered = io.BytesIO()
+    image.save(buffered, format="JPEG", quality=85)
+    return buffered.getvalue()
@@ -0,0 +1,130 @@
+import logging
+import os
+import re
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Local document pre-screen
+# Cheap checks that run before Gemini: blank pages and heavy blur are
+# rejected locally. A keyword match of local OCR text against the base
+# document requirement is recorded in the metrics only; a miss still
+# escalates, since OCR on a phone photo can miss terms Gemini reads fine.
+# Gemini is still the only stage that judges forgery and the document type.
+
+PRESCREEN_ENABLED = os.getenv("DOCUMENT_PRESCREEN_ENABLED", "true").lower() == "true"
+
+MAX_SIDE = 1600            # downscale before analysis
+BLANK_STDDEV = 6.0         # grayscale std-dev below this = empty page
+# Variance of Laplacian below this = unreadable blur. Check the false-reject
+# rate on admin-approved uploads before changing it:
+#   python -m benchmarks.calibrate_prescreen --approved 500
+BLUR_THRESHOLD = float(os.getenv("DOCUMENT_BLUR_THRESHOLD", "25.0"))
+MIN_OCR_WORDS = 25         # enough legible text to judge the document type
+MIN_WORD_CONFIDENCE = 60   # tesseract word confidence (0-100)
+
+ESCALATE = "escalate"
+REJECT = "reject"
+
+# Words that don't identify a document type
+STOPWORDS = {
+    "THE", "AND", "FOR", "FROM", "WITH", "COPY", "CERTIFIED", "TRUE", "VALID",
+    "DOCUMENT", "FORM", "OFFICIAL", "RECEIPT", "PROOF",
+}
+
+_WORD_PATTERN = re.compile(r"[A-Z0-9]{3,}")
+
+
+def requirement_keywords(template_requirements: str) -> list:
+    """Distinctive words of a base document requirement (e.g. BARANGAY, CLEARANCE)"""
+    words = _WORD_PATTERN.findall((template_requirements or "").upper())
+    return [w for w in dict.fromkeys(words) if w not in STOPWORDS and not w.isdigit()]
+
+
+def decode_document_image(content: bytes, mime_type: str):
+    """Grayscale image of an upload (first page for PDFs), or None if it can't be decoded"""
+    try:
+        if mime_type == "application/pdf":
+            import pypdfium2 as pdfium
+            pdf = pdfium.PdfDocument(content)
+            if len(pdf) == 0:
+                return None
+            page = pdf[0].render(scale=150 / 72).to_pil().convert("L")
+            image = np.array(page)
+        else:
+            image = cv2.imdecode(np.frombuffer(content, np.uint8), cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            return None
+        height, width = image.shape[:2]
+        scale = MAX_SIDE / max(height, width)
+        if scale < 1:
+            image = cv2.resize(image, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+        return image
+    except Exception as e:
+        logger.warning(f"Pre-screen could not decode document: {str(e)}")
+        return None
+
+
+def ocr_words(image) -> list:
+    """Confident words found by local OCR (empty when OCR is unavailable)"""
+    try:
+        import pytesseract
+        data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+    except Exception as e:
+        logger.warning(f"Pre-screen OCR unavailable: {str(e)}")
+        return []
+    words = []
+    for text, conf in zip(data.get("text", []), data.get("conf", [])):
+        try:
+            confident = float(conf) >= MIN_WORD_CONFIDENCE
+        except (TypeError, ValueError):
+            confident = False
+        if confident:
+            words.extend(_WORD_PATTERN.findall(text.upper()))
+    return words
+
+
+def image_sharpness(image) -> float:
+    """Variance of the Laplacian (low = blurry)"""
+    return float(cv2.Laplacian(image, cv2.CV_64F).var())
+
+
+def _reject(check: str, score: float, reason: str, metrics: dict) -> dict:
+    return {"decision": REJECT, "check": check, "score": score, "reason": reason, "metrics": metrics}
+
+
+def prescreen_document(content: bytes, mime_type: str, template_requirements: str) -> dict:
+    """
+    Run the local checks on a downloaded file.
+    Returns {"decision": "reject" | "escalate", "check", "score", "reason", "metrics"}.
+    """
+    metrics = {}
+    if not PRESCREEN_ENABLED:
+        return {"decision": ESCALATE, "check": None, "score": None, "reason": "Pre-screen disabled", "metrics": metrics}
+
+    image = decode_document_image(content, mime_type)
+    if image is None:
+        return {"decision": ESCALATE, "check": "decode", "score": None, "reason": "Could not decode locally", "metrics": metrics}
+
+    # 1. Blank page
+    stddev = float(image.std())
+    metrics["stddev"] = round(stddev, 2)
+    if stddev < BLANK_STDDEV:
+        return _reject("blank", 0.0, "Pre-screen: the uploaded page is blank.", metrics)
+
+    # 2. Blur
+    sharpness = image_sharpness(image)
+    metrics["sharpness"] = round(sharpness, 2)
+    if sharpness < BLUR_THRESHOLD:
+        return _reject("blur", 0.1, "Pre-screen: the image is too blurry to read. Please upload a clearer copy.", metrics)
+
+    # 3. Keywords (informational; only recorded when OCR found enough legible text)
+    keywords = requirement_keywords(template_requirements)
+    words = ocr_words(image)
+    metrics["ocr_words"] = len(words)
+    if keywords and len(words) >= MIN_OCR_WORDS:
+        found = set(words)
+        metrics["keywords_matched"] = [k for k in keywords if k in found]
+
+    return {"decision": ESCALATE, "check": None, "score": None, "reason": "Passed local checks", "metrics": metrics}
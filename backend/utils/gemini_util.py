@@ -4,42 +4,204 @@ import json
 import requests
 import base64
 import logging
+import threading
+import time
+from functools import lru_cache
+from typing_extensions import TypedDict
+from utils.document_prescreen import prescreen_document, REJECT
+from utils.verification_cache import (
+    content_hash,
+    verification_cache_key,
+    get_cached_verification,
+    store_verification,
+)
 
 logger = logging.getLogger(__name__)
 
 # 1. PRESERVED YOUR API KEY NAME
 genai.configure(api_key=os.getenv("GOOGLE_GEMINI_API_KEY"))
 
-def verify_document_with_gemini(file_url: str, template_requirements: str):
+# 2. MODEL NAME (configurable)
+# Note: If this errors with "404 Not Found", it means Google hasn't released
+# 'gemini-2.5-pro' to your account yet. Set GEMINI_MODEL_NAME=gemini-1.5-pro instead.
+GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-2.5-pro")
+
+# Bump whenever the prompt or output format changes so cached verifications are not reused
+PROMPT_VERSION = "v2"
+
+
+class VerificationResult(TypedDict):
+    """JSON schema Gemini must answer with"""
+    ai_prediction_label: int
+    ai_confidence_score: float
+    reason: str
+
+
+# STRICT PROMPT ({requirements} is filled once per base document)
+PROMPT_TEMPLATE = """
+        Act as a strict Document Verification Officer. Compare the User Document against this requirement: "{requirements}".
+
+        STEP 1: ANALYZE VISUAL EVIDENCE.
+        - Check for specific headers, logos, and text clarity.
+        - Check for signs of forgery or wrong document type.
+
+        STEP 2: CALCULATE CONFIDENCE SCORE (0.0 to 1.0).
+        - 0.90 - 1.00: Perfect Match. Clear text, correct headers.
+        - 0.70 - 0.89: Good Match. Minor blur but legible.
+        - 0.40 - 0.69: Ambiguous. Hard to read or missing some headers.
+        - 0.00 - 0.39: Reject. Wrong document, blank, or completely unreadable.
+
+        STEP 3: DETERMINE FINAL LABEL.
+        - If Score >= 0.70 -> 1 (Verified)
+        - If Score < 0.70  -> 0 (Rejected)
+
+        RETURN JSON ONLY:
+        {{
+            "ai_prediction_label": 0 or 1,
+            "ai_confidence_score": float,
+            "reason": "Short explanation for the admin."
+        }}
+        """
+
+# ==================== MODEL REGISTRY ====================
+
+_models = {}
+_models_lock = threading.Lock()
+
+def get_model(model_name: str = None):
+    """Configured GenerativeModel for a name, created once and reused"""
+    model_name = model_name or GEMINI_MODEL_NAME
+    with _models_lock:
+        model = _models.get(model_name)
+        if model is None:
+            model = genai.GenerativeModel(
+                model_name,
+                generation_config=genai.GenerationConfig(
+                    response_mime_type="application/json",
+                    response_schema=VerificationResult,
+                    temperature=0.0,
+                ),
+            )
+            _models[model_name] = model
+    return model
+
+def cache_version() -> str:
+    """Verification cache version: prompt version + model (answers differ per model)"""
+    return f"{PROMPT_VERSION}:{GEMINI_MODEL_NAME}"
+
+@lru_cache(maxsize=256)
+def build_verification_prompt(template_requirements: str) -> str:
+    """Prompt for a base document, built once per requirement text"""
+    return PROMPT_TEMPLATE.format(requirements=template_requirements)
+
+# ==================== METRICS ====================
+
+_metrics = {
+    "calls": 0,
+    "errors": 0,
+    "prompt_tokens": 0,
+    "output_tokens": 0,
+    "total_tokens": 0,
+    "latency_ms_total": 0.0,
+}
+_metrics_lock = threading.Lock()
+
+def _record_call(model_name: str, latency_ms: float, usage=None, error: bool = False):
+    prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+    output_tokens = getattr(usage, "candidates_token_count", 0) or 0
+    total_tokens = getattr(usage, "total_token_count", 0) or 0
+    with _metrics_lock:
+        _metrics["calls"] += 1
+        _metrics["errors"] += 1 if error else 0
+        _metrics["prompt_tokens"] += prompt_tokens
+        _metrics["output_tokens"] += output_tokens
+        _metrics["total_tokens"] += total_tokens
+        _metrics["latency_ms_total"] += latency_ms
+    logger.info(
+        f"📊 Gemini {model_name}: {latency_ms:.0f} ms, tokens in={prompt_tokens} "
+        f"out={output_tokens} total={total_tokens}{' (error)' if error else ''}"
+    )
+
+def gemini_metrics() -> dict:
+    """Aggregated token usage and latency since startup"""
+    with _metrics_lock:
+        metrics = dict(_metrics)
+    metrics["avg_latency_ms"] = metrics["latency_ms_total"] / metrics["calls"] if metrics["calls"] else 0.0
+    return metrics
+
+def _parse_result(response) -> dict:
+    # JSON mode returns bare JSON; keep stripping fences for older models
+    try:
+        return json.loads(response.text)
+    except json.JSONDecodeError:
+        clean_text = response.text.replace("```json", "").replace("```", "").strip()
+        return json.loads(clean_text)
+
+# ==================== VERIFICATION ====================
+
+def _cache_result(cache_key: str, result: dict, base_document_id, source: str):
+    if not cache_key:
+        return
+    store_verification(
+        cache_key,
+        {
+            "ai_prediction_label": result.get("ai_prediction_label", 0),
+            "ai_confidence_score": result.get("ai_confidence_score", 0.0),
+            "reason": result.get("reason", "")
+        },
+        {"base_document_id": str(base_document_id), "prompt_version": cache_version(), "source": source}
+    )
+
+def verify_document_with_gemini(
+    file_url: str,
+    template_requirements: str,
+    base_document_id: str = None,
+    file_hash: str = None,
+    bypass_cache: bool = False
+):
     """
     Analyzes a document (Image or PDF) and returns a structured classification result.
     Downloads the file from the URL and converts to Base64 for Gemini.
+    Results are cached per file content + base document + requirements + prompt version
+    (pass base_document_id to enable; bypass_cache forces a fresh model call).
     """
-    
-    # 2. PRESERVED YOUR MODEL NAME
-    # Note: If this errors with "404 Not Found", it means Google hasn't released 
-    # 'gemini-2.5-pro' to your account yet. You might need 'gemini-1.5-pro' instead.
-    model = genai.GenerativeModel('gemini-2.5-pro') 
+    cache_key = None
+    if base_document_id and file_hash:
+        cache_key = verification_cache_key(file_hash, base_document_id, template_requirements, cache_version())
+        if not bypass_cache:
+            cached = get_cached_verification(cache_key)
+            if cached:
+                logger.info(f"♻️ Using cached AI verification for: {file_url}")
+                return cached
 
     try:
         logger.info(f"🤖 AI Analysis starting for: {file_url}")
 
         # --- LOGIC FIX START ---
-        
+
         # 3. DOWNLOAD THE FILE (Crucial Step)
         # Gemini cannot visit the URL itself. Python must fetch the file first.
         doc_response = requests.get(file_url)
         if doc_response.status_code != 200:
             return {
-                "ai_prediction_label": 0, 
-                "ai_confidence_score": 0.0, 
+                "ai_prediction_label": 0,
+                "ai_confidence_score": 0.0,
                 "reason": f"Failed to download file (Status {doc_response.status_code})"
             }
-            
+
+        # Hash the downloaded bytes when the caller didn't provide one
+        if base_document_id and cache_key is None:
+            cache_key = verification_cache_key(content_hash(doc_response.content), base_document_id, template_requirements, cache_version())
+            if not bypass_cache:
+                cached = get_cached_verification(cache_key)
+                if cached:
+                    logger.info(f"♻️ Using cached AI verification for: {file_url}")
+                    return cached
+
         # 4. DETECT MIME TYPE AUTOMATICALLY
         # We need to tell Gemini if it's reading a PDF or an Image.
         content_type = doc_response.headers.get('Content-Type', '').lower()
-        
+
         if 'pdf' in content_type:
             mime_type = "application/pdf"
         elif 'png' in content_type:
@@ -55,50 +217,48 @@ def verify_document_with_gemini(file_url: str, template_requirements: str):
 
         logger.info(f"📂 Detected MIME Type: {mime_type}")
 
+        # 4b. LOCAL PRE-SCREEN
+        # Blank or blurry documents are rejected without calling Gemini.
+        # Admin re-verification (bypass_cache) always goes to the model.
+        if not bypass_cache:
+            screen = prescreen_document(doc_response.content, mime_type, template_requirements)
+            if screen["decision"] == REJECT:
+                logger.info(f"🚫 Pre-screen rejected ({screen['check']}): {file_url} {screen['metrics']}")
+                result = {
+                    "ai_prediction_label": 0,
+                    "ai_confidence_score": screen["score"],
+                    "reason": screen["reason"]
+                }
+                # Not cached: the cache key is the Gemini verdict's, and pre-screen
+                # thresholds can change without a prompt/model version bump
+                return result
+
         # 5. CONVERT TO BASE64
         # This fixes the "400 Unable to process input" error.
         doc_data = base64.b64encode(doc_response.content).decode('utf-8')
-        
+
         # --- LOGIC FIX END ---
 
-        # STRICT PROMPT
-        prompt = f"""
-        Act as a strict Document Verification Officer. Compare the User Document against this requirement: "{template_requirements}".
+        # 6. SEND REQUEST WITH BASE64 DATA (reused model, JSON schema output)
+        model = get_model()
+        started = time.perf_counter()
+        try:
+            response = model.generate_content([
+                build_verification_prompt(template_requirements),
+                {"mime_type": mime_type, "data": doc_data}
+            ])
+        except Exception:
+            _record_call(GEMINI_MODEL_NAME, (time.perf_counter() - started) * 1000, error=True)
+            raise
+        _record_call(GEMINI_MODEL_NAME, (time.perf_counter() - started) * 1000, getattr(response, "usage_metadata", None))
 
-        STEP 1: ANALYZE VISUAL EVIDENCE.
-        - Check for specific headers, logos, and text clarity.
-        - Check for signs of forgery or wrong document type.
+        result = _parse_result(response)
 
-        STEP 2: CALCULATE CONFIDENCE SCORE (0.0 to 1.0).
-        - 0.90 - 1.00: Perfect Match. Clear text, correct headers.
-        - 0.70 - 0.89: Good Match. Minor blur but legible.
-        - 0.40 - 0.69: Ambiguous. Hard to read or missing some headers.
-        - 0.00 - 0.39: Reject. Wrong document, blank, or completely unreadable.
+        # Only parsed model answers are cached (never download or API errors)
+        _cache_result(cache_key, result, base_document_id, "gemini")
 
-        STEP 3: DETERMINE FINAL LABEL.
-        - If Score >= 0.70 -> 1 (Verified)
-        - If Score < 0.70  -> 0 (Rejected)
-
-        RETURN JSON ONLY:
-        {{
-            "ai_prediction_label": 0 or 1,
-            "ai_confidence_score": float,
-            "reason": "Short explanation for the admin."
-        }}
-        """
-
-        # 6. SEND REQUEST WITH BASE64 DATA
-        response = model.generate_content([
-            prompt, 
-            {"mime_type": mime_type, "data": doc_data}
-        ])
-        
-        # Clean response
-        clean_text = response.text.replace("```json", "").replace("```", "").strip()
-        result = json.loads(clean_text)
-        
         return result
-        
+
     except Exception as e:
         logger.error(f"Gemini Error: {e}")
-        return {"ai_prediction_label": 0, "ai_confidence_score": 0.0, "reason": f"AI Error: {str(e)}"}
\ No newline at end of file
+        return {"ai_prediction_label": 0, "ai_confidence_score": 0.0, "reason": f"AI Error: {str(e)}"}
@@ -0,0 +1,101 @@
+import json
+import time
+import hashlib
+import threading
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+# HTTP response caching for anonymous, read-heavy endpoints
+# Responses are cached in-process for a short TTL and tagged with a strong
+# ETag built from a data version counter, so clients revalidate with
+# If-None-Match / If-Modified-Since and get a 304 without a Mongo round-trip.
+
+DEFAULT_TTL = 30  # seconds a worker serves a cached body
+DEFAULT_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=300"
+MAX_ENTRIES = 1024
+
+# cache key -> {"version", "body", "etag", "expires_at"}
+_response_cache = {}
+_cache_lock = threading.Lock()
+
+
+def make_etag(key: str, version) -> str:
+    """Strong ETag for a resource at a given data version"""
+    digest = hashlib.sha1(f"{key}|{version}".encode("utf-8")).hexdigest()[:16]
+    return f'"v{version}-{digest}"'
+
+
+def _not_modified(request: Request, etag: str, last_modified: datetime = None, exists: bool = False) -> bool:
+    """
+    Evaluate conditional request headers (If-None-Match wins over If-Modified-Since).
+    "*" only matches a resource known to exist (`exists`), i.e. after the loader succeeded.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return ("*" in candidates and exists) or etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates only have second precision
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def cached_json_response(
+    request: Request,
+    key: str,
+    version,
+    loader,
+    last_modified: datetime = None,
+    ttl: int = DEFAULT_TTL,
+    cache_control: str = DEFAULT_CACHE_CONTROL,
+) -> Response:
+    """
+    Serve `loader()` as JSON with ETag / Last-Modified / Cache-Control headers.
+    The body is recomputed only when the TTL expires or the version changes.
+    Exceptions raised by the loader (e.g. 404 HTTPException) are not cached,
+    and If-None-Match: * is only honoured once the loader has succeeded.
+    """
+    now = time.monotonic()
+    etag = make_etag(key, version)
+
+    if last_modified is not None and last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    entry = _response_cache.get(key)
+    cached = entry and entry["version"] == version and entry["expires_at"] > now
+    if not cached:
+        body = json.dumps(jsonable_encoder(loader()), separators=(",", ":")).encode("utf-8")
+        entry = {"version": version, "body": body, "etag": etag, "expires_at": now + ttl}
+        with _cache_lock:
+            if len(_response_cache) >= MAX_ENTRIES:
+                # Drop expired entries first, then the oldest ones
+                for stale_key in [k for k, v in _response_cache.items() if v["expires_at"] <= now]:
+                    _response_cache.pop(stale_key, None)
+                while len(_response_cache) >= MAX_ENTRIES:
+                    _response_cache.pop(next(iter(_response_cache)))
+            _response_cache[key] = entry
+
+    if _not_modified(request, etag, last_modified, exists=True):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry["body"], media_type="application/json", headers=headers)
+
+
+def clear_response_cache():
+    """Drop every cached response in this worker"""
+    with _cache_lock:
+        _response_cache.clear()
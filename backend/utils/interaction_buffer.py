@@ -0,0 +1,123 @@
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+from typing import List
+from secrets_backend.controllers.firestore_monitor import log_user_interaction
+
+logger = logging.getLogger(__name__)
+
+# Buffered ingestion for user interaction pings
+# Pings are queued in memory and handed to the existing log_user_interaction
+# sink by a background thread when either FLUSH_SIZE records are waiting or
+# FLUSH_INTERVAL seconds have passed, so request handlers return at once.
+# Single and batch pings share one record shape and one sink. The queue is
+# bounded: when it is full, callers are told to back off instead of piling
+# up unbounded memory.
+
+FLUSH_SIZE = 500          # records per flush
+FLUSH_INTERVAL = 1.0      # max seconds a record waits in memory
+MAX_QUEUE_SIZE = 20000    # backpressure threshold
+
+_queue = deque()
+_condition = threading.Condition()
+_flusher_thread = None
+_stopping = False
+
+
+def build_interaction_record(user_id: str, action: str, user_lat: float, user_lng: float, timestamp: str = None) -> dict:
+    """Shape a ping the same way for single and batch ingestion (log_user_interaction arguments)"""
+    return {
+        "user_id": user_id,
+        "action": action,
+        "user_lat": user_lat,
+        "user_lng": user_lng,
+        "timestamp": timestamp,
+    }
+
+
+def write_interaction(record: dict):
+    """Write one ping to the interaction log"""
+    log_user_interaction(**record)
+
+
+def enqueue_interactions(records: List[dict]) -> bool:
+    """
+    Queue records for the next flush.
+    Returns False (and queues nothing) when the buffer cannot take the whole batch.
+    """
+    with _condition:
+        if len(_queue) + len(records) > MAX_QUEUE_SIZE:
+            return False
+        _queue.extend(records)
+        if len(_queue) >= FLUSH_SIZE:
+            _condition.notify()
+    return True
+
+
+def _drain(max_items: int) -> list:
+    batch = []
+    while _queue and len(batch) < max_items:
+        batch.append(_queue.popleft())
+    return batch
+
+
+def _write(batch: list):
+    failed = 0
+    for record in batch:
+        try:
+            write_interaction(record)
+        except Exception as e:
+            failed += 1
+            last_error = str(e)
+    if failed:
+        logger.error(f"Failed to write {failed}/{len(batch)} user interactions: {last_error}")
+
+
+def flush_interactions():
+    """Write everything currently buffered (used on shutdown)"""
+    while True:
+        with _condition:
+            batch = _drain(FLUSH_SIZE)
+        if not batch:
+            return
+        _write(batch)
+
+
+def _flush_loop():
+    deadline = time.monotonic() + FLUSH_INTERVAL
+    while not _stopping:
+        with _condition:
+            while len(_queue) < FLUSH_SIZE and not _stopping:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                _condition.wait(remaining)
+            batch = _drain(FLUSH_SIZE)
+        deadline = time.monotonic() + FLUSH_INTERVAL
+        if batch:
+            _write(batch)
+
+
+def _stop():
+    global _stopping
+    with _condition:
+        _stopping = True
+        _condition.notify_all()
+    flush_interactions()
+
+
+def start_interaction_buffer():
+    """Start the background flusher (idempotent)"""
+    global _flusher_thread
+    if _flusher_thread and _flusher_thread.is_alive():
+        return
+    _flusher_thread = threading.Thread(target=_flush_loop, name="interaction-buffer", daemon=True)
+    _flusher_thread.start()
+    atexit.register(_stop)
+    logger.info("User interaction buffer started")
+
+
+def buffer_stats() -> dict:
+    return {"queued": len(_queue), "capacity": MAX_QUEUE_SIZE}
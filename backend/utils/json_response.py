@@ -0,0 +1,36 @@
+import orjson
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from fastapi.responses import Response
+
+# Fast JSON responses for Mongo documents
+# Controllers return documents as read from Mongo (with a projection, so
+# unused fields are never fetched) and routes wrap them in MongoJSONResponse.
+# orjson serializes datetimes natively (ISO 8601, same as .isoformat()) and
+# ObjectIds go through _default, so there is no per-document stringify loop
+# and no pass through FastAPI's jsonable_encoder.
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, Decimal128):
+        return float(obj.to_decimal())
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content) -> bytes:
+    """Serialize Mongo documents (ObjectId, datetime, numpy) to JSON bytes"""
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class MongoJSONResponse(Response):
+    """JSON response rendered with orjson; return it directly from a route"""
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
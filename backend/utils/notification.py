@@ -1,36 +1,48 @@
 from firebase_admin import messaging
 from secrets_backend.firebase_config import firebase_admin
 
-def send_notification(fcm_token, title, body):
-    """Send push notification - Simple!"""
-    try:
-        message = messaging.Message(
-            notification=messaging.Notification(
-                title=title, 
-                body=body
-            ),
-            token=fcm_token,
-            android=messaging.AndroidConfig(
-                priority='high',
-                notification=messaging.AndroidNotification(
+def build_message(fcm_token, title, body, data=None, channel_id=None, urgent=False):
+    """
+    Build the FCM message used for every push notification.
+    urgent: show on the lock screen, deliver immediately on iOS and wake the app.
+    """
+    return messaging.Message(
+        notification=messaging.Notification(
+            title=title, 
+            body=body
+        ),
+        data={str(k): str(v) for k, v in (data or {}).items()},
+        token=fcm_token,
+        android=messaging.AndroidConfig(
+            priority='high',
+            notification=messaging.AndroidNotification(
+                channel_id=channel_id,
+                priority='high' if urgent else None,
+                visibility='public' if urgent else None,
+                sound='default',
+                color='#1976D2',
+            )
+        ),
+        apns=messaging.APNSConfig(
+            headers={'apns-priority': '10'} if urgent else None,
+            payload=messaging.APNSPayload(
+                aps=messaging.Aps(
                     sound='default',
-                    color='#1976D2',
-                )
-            ),
-            apns=messaging.APNSConfig(
-                payload=messaging.APNSPayload(
-                    aps=messaging.Aps(
-                        sound='default',
-                        badge=1,
-                    )
+                    badge=1,
+                    content_available=True if urgent else None,
                 )
             )
         )
-        
+    )
+
+def send_notification(fcm_token, title, body):
+    """Send push notification - Simple!"""
+    try:
+        message = build_message(fcm_token, title, body)
         response = messaging.send(message)
         print(f"Notification sent: {response}")
         return True
         
     except Exception as e:
         print(f"Error sending notification: {e}")
-        return False
\ No newline at end of file
+        return False
@@ -0,0 +1,293 @@
+import atexit
+import heapq
+import logging
+import os
+import threading
+import time
+from collections import deque
+from firebase_admin import exceptions, messaging
+from config.db import db
+from utils.notification import build_message
+from utils.token_registry import forget_tokens
+
+logger = logging.getLogger(__name__)
+
+# Push notification dispatcher
+# Request handlers only enqueue notifications. A background worker drains
+# the queue, drops duplicates (same token/title/body), and sends up to
+# BATCH_SIZE messages per FCM send_each call. Tokens FCM reports as
+# unregistered (or registered to another sender) are pruned; transient
+# failures are retried with exponential backoff. A message FCM rejects as
+# invalid fails on its own, without touching the token. Set FCM_TRANSPORT=fake to record messages instead
+# of calling FCM (local development and tests).
+
+BATCH_SIZE = 500            # FCM send_each limit
+FLUSH_INTERVAL = 0.5        # max seconds a notification waits for a batch
+MAX_QUEUE_SIZE = 50000
+MAX_ATTEMPTS = 5
+BASE_BACKOFF = 1.0          # seconds, doubled per attempt
+MAX_BACKOFF = 60.0
+
+# Send outcomes reported by transports
+SENT = "sent"
+INVALID_TOKEN = "invalid_token"
+RETRY = "retry"
+FAILED = "failed"
+
+_queue = deque()
+_retries = []               # heap of (due_at, seq, notification)
+_retry_seq = 0
+_condition = threading.Condition()
+_worker_thread = None
+_stopping = False
+_stats = {"sent": 0, "failed": 0, "retried": 0, "pruned": 0, "dropped": 0}
+
+
+# ==================== TRANSPORTS ====================
+
+def _classify_error(error) -> str:
+    # INVALID_ARGUMENT is usually the payload, not the token: fail the message, keep the token
+    if isinstance(error, (messaging.UnregisteredError, messaging.SenderIdMismatchError)):
+        return INVALID_TOKEN
+    if isinstance(error, (messaging.QuotaExceededError, exceptions.UnavailableError, exceptions.InternalError, exceptions.DeadlineExceededError)):
+        return RETRY
+    return FAILED
+
+
+def fcm_transport(notifications: list) -> list:
+    """Send with one FCM send_each call; returns one outcome per notification"""
+    outcomes = [FAILED] * len(notifications)
+    messages, positions = [], []
+    for i, n in enumerate(notifications):
+        # A notification that can't be built fails alone, not the whole batch
+        try:
+            messages.append(build_message(
+                n["token"], n["title"], n["body"], n.get("data"), n.get("channel_id"), n.get("urgent", False)
+            ))
+            positions.append(i)
+        except Exception as e:
+            logger.error(f"Could not build notification for token {str(n.get('token'))[:12]}...: {str(e)}")
+    if not messages:
+        return outcomes
+
+    try:
+        response = messaging.send_each(messages)
+    except (exceptions.UnavailableError, exceptions.InternalError, exceptions.DeadlineExceededError) as e:
+        logger.warning(f"FCM batch failed, will retry: {str(e)}")
+        for i in positions:
+            outcomes[i] = RETRY
+        return outcomes
+    for i, r in zip(positions, response.responses):
+        outcomes[i] = SENT if r.success else _classify_error(r.exception)
+    return outcomes
+
+
+class FakeTransport:
+    """Records notifications instead of sending them"""
+
+    def __init__(self, invalid_tokens=None, transient_failures: int = 0):
+        self.sent = []
+        self.batches = 0
+        self.invalid_tokens = set(invalid_tokens or [])
+        self.transient_failures = transient_failures
+
+    def __call__(self, notifications: list) -> list:
+        self.batches += 1
+        if self.transient_failures > 0:
+            self.transient_failures -= 1
+            return [RETRY] * len(notifications)
+        outcomes = []
+        for n in notifications:
+            if n["token"] in self.invalid_tokens:
+                outcomes.append(INVALID_TOKEN)
+            else:
+                self.sent.append(n)
+                outcomes.append(SENT)
+        return outcomes
+
+
+_transport = FakeTransport() if os.getenv("FCM_TRANSPORT") == "fake" else fcm_transport
+
+
+def set_transport(transport):
+    """Swap the transport (e.g. a FakeTransport in tests); returns the previous one"""
+    global _transport
+    previous = _transport
+    _transport = transport
+    return previous
+
+
+# ==================== QUEUE ====================
+
+def build_notification(token: str, title: str, body: str, data: dict = None, user_id: str = None, channel_id: str = None, urgent: bool = False) -> dict:
+    """Shape a queued notification (user_id lets invalid tokens be pruned from Firestore)"""
+    return {
+        "token": token,
+        "title": title,
+        "body": body,
+        "data": data,
+        "user_id": str(user_id) if user_id else None,
+        "channel_id": channel_id,
+        "urgent": urgent,
+        "attempt": 0,
+    }
+
+
+def enqueue_notifications(notifications: list) -> bool:
+    """Queue notifications for the next batch; returns False when the queue is full"""
+    notifications = [n for n in notifications if n.get("token")]
+    if not notifications:
+        return True
+    with _condition:
+        if len(_queue) + len(notifications) > MAX_QUEUE_SIZE:
+            _stats["dropped"] += len(notifications)
+            logger.error(f"Notification queue full, dropped {len(notifications)} notifications")
+            return False
+        _queue.extend(notifications)
+        if len(_queue) >= BATCH_SIZE:
+            _condition.notify()
+    return True
+
+
+def enqueue_notification(token: str, title: str, body: str, data: dict = None, user_id: str = None, channel_id: str = None) -> bool:
+    """Queue a single notification"""
+    return enqueue_notifications([build_notification(token, title, body, data, user_id, channel_id)])
+
+
+def _move_due_retries():
+    now = time.monotonic()
+    while _retries and _retries[0][0] <= now:
+        _queue.append(heapq.heappop(_retries)[2])
+
+
+def _schedule_retry(notification: dict):
+    global _retry_seq
+    notification["attempt"] += 1
+    if notification["attempt"] >= MAX_ATTEMPTS:
+        _stats["failed"] += 1
+        logger.error(f"Giving up on notification to token {notification['token'][:12]}... after {MAX_ATTEMPTS} attempts")
+        return
+    delay = min(MAX_BACKOFF, BASE_BACKOFF * (2 ** (notification["attempt"] - 1)))
+    with _condition:
+        _retry_seq += 1
+        heapq.heappush(_retries, (time.monotonic() + delay, _retry_seq, notification))
+    _stats["retried"] += 1
+
+
+def _drain() -> list:
+    """Take up to BATCH_SIZE distinct notifications off the queue"""
+    batch = []
+    seen = set()
+    while _queue and len(batch) < BATCH_SIZE:
+        n = _queue.popleft()
+        key = (n["token"], n["title"], n["body"])
+        if key in seen:
+            continue
+        seen.add(key)
+        batch.append(n)
+    return batch
+
+
+# ==================== TOKEN PRUNING ====================
+
+def prune_tokens(notifications: list):
+    """Remove tokens FCM reported as invalid from Mongo users and Firestore"""
+    tokens = list({n["token"] for n in notifications})
+    forget_tokens(tokens)
+    try:
+        db["users"].update_many({"fcm_token": {"$in": tokens}}, {"$unset": {"fcm_token": ""}})
+    except Exception as e:
+        logger.error(f"Failed to prune FCM tokens from users: {str(e)}")
+
+    by_user = {}
+    for n in notifications:
+        if n.get("user_id"):
+            by_user.setdefault(n["user_id"], set()).add(n["token"])
+    if by_user:
+        try:
+            from firebase_admin import firestore
+            from secrets_backend.firebase_config import firestore_client
+            batch = firestore_client.batch()
+            for user_id, user_tokens in by_user.items():
+                ref = firestore_client.collection('user_fcm_tokens').document(user_id)
+                # set/merge: update() on a missing doc raises NotFound and loses the whole batch
+                batch.set(ref, {"tokens": firestore.ArrayRemove(list(user_tokens))}, merge=True)
+            batch.commit()
+        except Exception as e:
+            logger.error(f"Failed to prune FCM tokens from Firestore: {str(e)}")
+
+    _stats["pruned"] += len(tokens)
+    logger.info(f"Pruned {len(tokens)} invalid FCM tokens")
+
+
+# ==================== WORKER ====================
+
+def _send(batch: list):
+    try:
+        outcomes = _transport(batch)
+    except Exception as e:
+        logger.error(f"Notification transport error: {str(e)}")
+        outcomes = [RETRY] * len(batch)
+
+    invalid = []
+    for notification, outcome in zip(batch, outcomes):
+        if outcome == SENT:
+            _stats["sent"] += 1
+        elif outcome == INVALID_TOKEN:
+            invalid.append(notification)
+        elif outcome == RETRY:
+            _schedule_retry(notification)
+        else:
+            _stats["failed"] += 1
+    if invalid:
+        prune_tokens(invalid)
+
+
+def flush_notifications():
+    """Send everything currently queued (used on shutdown)"""
+    while True:
+        with _condition:
+            _move_due_retries()
+            batch = _drain()
+        if not batch:
+            return
+        _send(batch)
+
+
+def _dispatch_loop():
+    deadline = time.monotonic() + FLUSH_INTERVAL
+    while not _stopping:
+        with _condition:
+            while len(_queue) < BATCH_SIZE and not _stopping:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                _condition.wait(remaining)
+            _move_due_retries()
+            batch = _drain()
+        deadline = time.monotonic() + FLUSH_INTERVAL
+        if batch:
+            _send(batch)
+
+
+def _stop():
+    global _stopping
+    with _condition:
+        _stopping = True
+        _condition.notify_all()
+    flush_notifications()
+
+
+def start_notification_dispatcher():
+    """Start the background dispatcher (idempotent)"""
+    global _worker_thread
+    if _worker_thread and _worker_thread.is_alive():
+        return
+    _worker_thread = threading.Thread(target=_dispatch_loop, name="notification-dispatcher", daemon=True)
+    _worker_thread.start()
+    atexit.register(_stop)
+    logger.info("Notification dispatcher started")
+
+
+def dispatcher_stats() -> dict:
+    return {**_stats, "queued": len(_queue), "retrying": len(_retries), "capacity": MAX_QUEUE_SIZE}
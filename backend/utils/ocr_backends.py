@@ -0,0 +1,239 @@
+import asyncio
+import atexit
+import base64
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import requests
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# OCR backends for cart scans
+# Every backend returns the same shape as the Google Vision extraction:
+#   {"full_text": str, "detected_texts": [{"text", "confidence", "box"}], "confidence": float}
+# with confidences on a 0-100 scale and boxes as [x1, y1, x2, y2].
+# OCR_BACKEND selects the engine: "vision" (REST API, default), "tesseract"
+# or "paddle". run_ocr is async: local engines run in a process pool (spawned,
+# not forked, so workers don't inherit torch, Mongo or Firestore threads) and
+# Vision requests run in a thread, so the event loop keeps serving requests.
+# When a local result is weak the scan falls back to Vision.
+
+OCR_BACKEND = os.getenv("OCR_BACKEND", "vision").lower()
+OCR_MIN_CONFIDENCE = float(os.getenv("OCR_MIN_CONFIDENCE", "70"))
+OCR_VISION_FALLBACK = os.getenv("OCR_VISION_FALLBACK", "true").lower() == "true"
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "2"))
+OCR_TIMEOUT = 30  # seconds per local OCR job
+
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def empty_ocr_result() -> dict:
+    return {"full_text": "", "detected_texts": [], "confidence": 0.0}
+
+
+# ==================== GOOGLE VISION ====================
+
+def vision_ocr(image_bytes: bytes) -> dict:
+    """Text detection with the Google Cloud Vision REST API"""
+    vision_url = f"https://vision.googleapis.com/v1/images:annotate?key={GOOGLE_API_KEY}"
+    encoded_image = base64.b64encode(image_bytes).decode('utf-8')
+
+    payload = {
+        "requests": [
+            {
+                "image": {"content": encoded_image},
+                "features": [
+                    {"type": "TEXT_DETECTION", "maxResults": 1}
+                ]
+            }
+        ]
+    }
+
+    vision_response = requests.post(vision_url, json=payload)
+    vision_data = vision_response.json()
+
+    if "error" in vision_data:
+        logger.error(f"Vision API error: {vision_data['error']}")
+        return empty_ocr_result()
+
+    annotations = vision_data["responses"][0]
+
+    detected_texts = []
+    full_text = ""
+
+    if "textAnnotations" in annotations and len(annotations["textAnnotations"]) > 0:
+        # First annotation contains full text
+        full_text = annotations["textAnnotations"][0]["description"]
+
+        # Individual text annotations with bounding boxes
+        for text in annotations["textAnnotations"][1:]:  # Skip the first one (full text)
+            vertices = text.get("boundingPoly", {}).get("vertices", [])
+            if len(vertices) >= 4:
+                detected_texts.append({
+                    "text": text.get("description", ""),
+                    "confidence": 95.0,
+                    "box": [
+                        vertices[0].get("x", 0),
+                        vertices[0].get("y", 0),
+                        vertices[2].get("x", 0),
+                        vertices[2].get("y", 0)
+                    ]
+                })
+
+    return {"full_text": full_text.strip(), "detected_texts": detected_texts, "confidence": 95.0 if full_text else 0.0}
+
+
+# ==================== LOCAL ENGINES (run in worker processes) ====================
+
+_paddle_engine = None
+
+
+def _decode(image_bytes: bytes):
+    import cv2
+    import numpy as np
+    image = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Invalid image data")
+    return image
+
+
+def _mean_confidence(detected_texts: list) -> float:
+    if not detected_texts:
+        return 0.0
+    return sum(t["confidence"] for t in detected_texts) / len(detected_texts)
+
+
+def _tesseract_ocr(image_bytes: bytes) -> dict:
+    import cv2
+    import pytesseract
+    image = cv2.cvtColor(_decode(image_bytes), cv2.COLOR_BGR2GRAY)
+    data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+
+    detected_texts = []
+    lines = {}
+    for i, text in enumerate(data["text"]):
+        text = text.strip()
+        try:
+            conf = float(data["conf"][i])
+        except (TypeError, ValueError):
+            conf = -1
+        if not text or conf < 0:
+            continue
+        left, top, width, height = data["left"][i], data["top"][i], data["width"][i], data["height"][i]
+        detected_texts.append({"text": text, "confidence": conf, "box": [left, top, left + width, top + height]})
+        line_key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        lines.setdefault(line_key, []).append(text)
+
+    full_text = "\n".join(" ".join(words) for _, words in sorted(lines.items()))
+    return {"full_text": full_text, "detected_texts": detected_texts, "confidence": _mean_confidence(detected_texts)}
+
+
+def _paddle_ocr(image_bytes: bytes) -> dict:
+    global _paddle_engine
+    if _paddle_engine is None:
+        # Loaded once per worker process
+        from paddleocr import PaddleOCR
+        _paddle_engine = PaddleOCR(
+            lang="en",
+            use_doc_orientation_classify=False,
+            use_doc_unwarping=False,
+            use_textline_orientation=False,
+        )
+
+    detected_texts = []
+    for page in _paddle_engine.predict(_decode(image_bytes)):
+        texts = page.get("rec_texts", [])
+        scores = page.get("rec_scores", [])
+        boxes = page.get("rec_boxes", [])
+        for text, score, box in zip(texts, scores, boxes):
+            detected_texts.append({
+                "text": text,
+                "confidence": float(score) * 100,
+                "box": [int(v) for v in list(box)[:4]],
+            })
+
+    full_text = "\n".join(t["text"] for t in detected_texts)
+    return {"full_text": full_text, "detected_texts": detected_texts, "confidence": _mean_confidence(detected_texts)}
+
+
+LOCAL_ENGINES = {
+    "tesseract": _tesseract_ocr,
+    "paddle": _paddle_ocr,
+}
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=OCR_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+    return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Drop a broken pool so the next scan starts fresh workers"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def _run_local(engine, image_bytes: bytes) -> dict:
+    pool = _get_pool()
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(pool.submit(engine, image_bytes)), OCR_TIMEOUT)
+    except BrokenProcessPool:
+        # A worker died (e.g. a paddle crash); don't send every later scan to Vision
+        _discard_pool(pool)
+        raise
+
+
+# ==================== ENTRY POINT ====================
+
+async def run_ocr(image_bytes: bytes, accept=None, fallback_image_bytes: bytes = None) -> dict:
+    """
+    Run the configured OCR engine and return its result plus "engine".
+    Local results below OCR_MIN_CONFIDENCE, or rejected by `accept(result)`,
+    fall back to Vision on `fallback_image_bytes` (defaults to the same image).
+    With the Vision backend, a result rejected by `accept` is retried once on
+    `fallback_image_bytes` when given. "fallback" tells which image was read.
+    """
+    engine = LOCAL_ENGINES.get(OCR_BACKEND)
+    if engine is None:
+        result = {**await asyncio.to_thread(vision_ocr, image_bytes), "engine": "vision", "fallback": False}
+        if fallback_image_bytes is not None and accept is not None and not accept(result):
+            logger.info("Vision found nothing usable in the region, retrying on the full frame")
+            return {**await asyncio.to_thread(vision_ocr, fallback_image_bytes), "engine": "vision", "fallback": True}
+        return result
+
+    result = None
+    try:
+        result = await _run_local(engine, image_bytes)
+    except Exception as e:
+        logger.error(f"Local OCR ({OCR_BACKEND}) failed: {type(e).__name__} {str(e)}")
+
+    if result is not None:
+        good_enough = result["confidence"] >= OCR_MIN_CONFIDENCE and (accept is None or accept(result))
+        if good_enough or not OCR_VISION_FALLBACK:
+            return {**result, "engine": OCR_BACKEND, "fallback": False}
+        logger.info(f"Local OCR ({OCR_BACKEND}) confidence {result['confidence']:.1f} too low, falling back to Vision")
+    elif not OCR_VISION_FALLBACK:
+        return {**empty_ocr_result(), "engine": OCR_BACKEND, "fallback": False}
+
+    return {
+        **await asyncio.to_thread(vision_ocr, fallback_image_bytes or image_bytes),
+        "engine": "vision",
+        "fallback": fallback_image_bytes is not None
+    }
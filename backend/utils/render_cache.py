@@ -0,0 +1,158 @@
+import hashlib
+import hmac
+import logging
+import os
+import threading
+import time
+import requests
+from fastapi import Request, Response
+
+logger = logging.getLogger(__name__)
+
+# Lazily rendered images
+# Annotated images are no longer drawn and uploaded when a scan or submission
+# is saved. They are rendered the first time someone opens them, from the
+# stored original plus the stored boxes, and written to a local disk cache
+# shared by every worker on the host. The cache key covers all render inputs,
+# so a changed record gets a new file; old files are trimmed oldest-first.
+# Records store render endpoints as API paths ("/api/..."); responses turn
+# them into absolute URLs with public_api_url(), and private renders get a
+# short-lived signature with signed_api_url() at read time.
+
+RENDER_CACHE_DIR = os.getenv("RENDER_CACHE_DIR", os.path.join(os.path.dirname(__file__), '../render_cache'))
+RENDER_CACHE_MAX_FILES = int(os.getenv("RENDER_CACHE_MAX_FILES", "5000"))
+RENDER_CACHE_CONTROL = "private, max-age=86400"
+TRIM_EVERY = 50            # renders between trims
+DOWNLOAD_TIMEOUT = 20      # seconds to fetch an original
+
+# Public base of API URLs returned to clients (e.g. https://api.example.com)
+PUBLIC_API_BASE_URL = os.getenv("PUBLIC_API_BASE_URL", "").rstrip("/")
+
+if not PUBLIC_API_BASE_URL:
+    raise ValueError("PUBLIC_API_BASE_URL not found in environment variables")
+
+# Signs render URLs of private files (<img> tags can't send a bearer token)
+RENDER_URL_SECRET = os.getenv("RENDER_URL_SECRET") or os.getenv("SECRET_KEY")
+RENDER_URL_TTL = int(os.getenv("RENDER_URL_TTL", "3600"))  # seconds a signed URL stays valid
+
+_renders_since_trim = 0
+_trim_lock = threading.Lock()
+
+
+def render_key(*parts) -> str:
+    """Cache key / ETag for a render from its inputs"""
+    return hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+def api_path(path: str) -> str:
+    """Form stored on records for an API route path"""
+    return f"/api{path}"
+
+
+def public_api_url(stored: str) -> str:
+    """Absolute URL of a stored API path (absolute URLs, e.g. Cloudinary, are returned as is)"""
+    if not stored or not stored.startswith("/"):
+        return stored
+    return f"{PUBLIC_API_BASE_URL}{stored}"
+
+
+def with_public_urls(record: dict, *fields) -> dict:
+    """Turn stored API paths of a fetched record into absolute URLs in place"""
+    for field in fields:
+        if record.get(field):
+            record[field] = public_api_url(record[field])
+    return record
+
+
+def render_signature(path: str, expires: int) -> str:
+    """HMAC of an API path and its expiry time, appended to signed render URLs as ?sig="""
+    if not RENDER_URL_SECRET:
+        raise RuntimeError("RENDER_URL_SECRET (or SECRET_KEY) is not set, refusing to sign render URLs")
+    message = f"{path}|{expires}".encode("utf-8")
+    return hmac.new(RENDER_URL_SECRET.encode("utf-8"), message, hashlib.sha256).hexdigest()[:32]
+
+
+def signed_api_url(path: str) -> str:
+    """Absolute URL of a render endpoint, valid for RENDER_URL_TTL seconds (build at read time)"""
+    expires = int(time.time()) + RENDER_URL_TTL
+    return f"{public_api_url(api_path(path))}?exp={expires}&sig={render_signature(path, expires)}"
+
+
+def verify_render_signature(path: str, expires: int, signature: str) -> bool:
+    if not RENDER_URL_SECRET or not signature or expires < time.time():
+        return False
+    return hmac.compare_digest(render_signature(path, expires), signature)
+
+
+def download_image(url: str) -> bytes:
+    """Fetch a stored original (Cloudinary)"""
+    response = requests.get(url, timeout=DOWNLOAD_TIMEOUT)
+    response.raise_for_status()
+    return response.content
+
+
+def _cache_path(namespace: str, key: str) -> str:
+    return os.path.join(RENDER_CACHE_DIR, namespace, f"{key}.jpg")
+
+
+def trim_render_cache():
+    """Delete the oldest cached renders beyond RENDER_CACHE_MAX_FILES"""
+    files = []
+    for root, _, names in os.walk(RENDER_CACHE_DIR):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                files.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+    excess = len(files) - RENDER_CACHE_MAX_FILES
+    if excess <= 0:
+        return 0
+    for _, path in sorted(files)[:excess]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    logger.info(f"Trimmed {excess} cached renders")
+    return excess
+
+
+def get_or_render(namespace: str, key: str, render) -> bytes:
+    """Cached JPEG for a key, calling `render()` (returns JPEG bytes) on a miss"""
+    global _renders_since_trim
+    path = _cache_path(namespace, key)
+    try:
+        with open(path, "rb") as cached:
+            return cached.read()
+    except FileNotFoundError:
+        pass
+
+    content = render()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as out:
+            out.write(content)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not cache render {namespace}/{key}: {str(e)}")
+        return content
+
+    with _trim_lock:
+        _renders_since_trim += 1
+        should_trim = _renders_since_trim >= TRIM_EVERY
+        if should_trim:
+            _renders_since_trim = 0
+    if should_trim:
+        trim_render_cache()
+    return content
+
+
+def rendered_image_response(request: Request, namespace: str, key: str, render) -> Response:
+    """JPEG response for a lazily rendered image (304 when the client already has it)"""
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": RENDER_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=get_or_render(namespace, key, render), media_type="image/jpeg", headers=headers)
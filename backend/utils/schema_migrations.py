@@ -0,0 +1,63 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+from pymongo.errors import DuplicateKeyError
+from config.db import db
+
+logger = logging.getLogger(__name__)
+
+# One-time data migrations
+# Startup only reads the migration's schema_migrations record; when its
+# version is not the current one, the migration runs in a background thread
+# so startup time does not grow with collection size. A lease on the record
+# makes sure only one worker runs a migration at a time; if that worker
+# dies, the lease expires and the next startup picks the migration up again.
+# Migrations must be safe to re-run (each pass only touches records still in
+# the old shape).
+
+MIGRATIONS_COLLECTION = "schema_migrations"
+MIGRATION_LEASE = timedelta(minutes=30)
+
+
+def _claim(name: str, version) -> bool:
+    """Take the lease on a pending migration; False if it is done or running elsewhere"""
+    now = datetime.utcnow()
+    try:
+        db[MIGRATIONS_COLLECTION].update_one(
+            {
+                "_id": name,
+                "version": {"$ne": version},
+                "$or": [{"running_until": {"$exists": False}}, {"running_until": {"$lt": now}}],
+            },
+            {"$set": {"running_until": now + MIGRATION_LEASE}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        # The record exists but is done or leased: the upsert tried to insert
+        return False
+    return True
+
+
+def _run(name: str, version, migrate):
+    try:
+        result = migrate()
+        db[MIGRATIONS_COLLECTION].update_one(
+            {"_id": name},
+            {"$set": {"version": version, "completed_at": datetime.utcnow()}, "$unset": {"running_until": ""}},
+        )
+        logger.info(f"Migration {name} (version {version}) done: {result}")
+    except Exception as e:
+        # Release the lease so the next startup retries
+        db[MIGRATIONS_COLLECTION].update_one({"_id": name}, {"$unset": {"running_until": ""}})
+        logger.error(f"Migration {name} failed: {str(e)}")
+
+
+def run_migration_in_background(name: str, version, migrate):
+    """Run `migrate` once per version, in a background thread of a single worker"""
+    try:
+        state = db[MIGRATIONS_COLLECTION].find_one({"_id": name}, {"version": 1}) or {}
+        if state.get("version") == version or not _claim(name, version):
+            return
+        threading.Thread(target=_run, args=(name, version, migrate), name=f"migration-{name}", daemon=True).start()
+    except Exception as e:
+        logger.error(f"Failed to start migration {name}: {str(e)}")
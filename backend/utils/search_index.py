@@ -0,0 +1,257 @@
+import re
+import logging
+import threading
+import unicodedata
+from typing import Iterable, List, Optional
+from pymongo import UpdateOne
+from config.db import db
+
+logger = logging.getLogger(__name__)
+
+# Prefix n-gram search index
+# Every searchable record keeps two arrays maintained on write:
+#   search_words  -> full lowercase words (used for ranking exact matches)
+#   search_tokens -> every prefix of every word (used for prefix-as-you-type)
+# Both are multikey-indexed, so a search becomes an index lookup instead of
+# an unanchored case-insensitive $regex collection scan.
+# Text is accent-folded first ("Muñoz" -> "munoz"), so accented names stay
+# one word and are found whether or not the admin types the accent.
+
+MIN_PREFIX_LENGTH = 1
+MAX_PREFIX_LENGTH = 15
+
+# Field-scoped tokens for exact filter values (vendor type / operating area)
+GOODS_TYPE_SCOPE = "type"
+AREA_SCOPE = "area"
+
+WORD_SPLIT_PATTERN = re.compile(r"[^0-9a-z]+")
+
+# Bump when tokenization changes; records with another version are rebuilt by the backfill
+SEARCH_VERSION = 2
+MIGRATIONS_COLLECTION = "schema_migrations"
+
+# Ranking only looks at this many newest matches (or skip + limit, if larger),
+# so a one-letter search never sorts the whole collection in memory
+RANK_CANDIDATE_LIMIT = 1000
+
+
+def fold_accents(text: str) -> str:
+    """Lowercase and strip diacritics (NFKD, then drop combining marks)"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text) -> List[str]:
+    """Split text into lowercase, accent-folded alphanumeric words"""
+    if text is None:
+        return []
+    return [w for w in WORD_SPLIT_PATTERN.split(fold_accents(str(text))) if w]
+
+
+def prefixes(word: str) -> List[str]:
+    """All prefixes of a word, capped at MAX_PREFIX_LENGTH"""
+    word = word[:MAX_PREFIX_LENGTH]
+    return [word[:i] for i in range(MIN_PREFIX_LENGTH, len(word) + 1)]
+
+
+def build_search_fields(values: Iterable, scoped: dict = None) -> dict:
+    """
+    Build the search_words / search_tokens fields for a record.
+    `values` are free-text fields, `scoped` maps a scope name to values that
+    should only match when filtered with that scope (e.g. {"area": [...]}).
+    """
+    words = set()
+    tokens = set()
+
+    for value in values:
+        for word in tokenize(value):
+            words.add(word)
+            tokens.update(prefixes(word))
+
+    for scope, scoped_values in (scoped or {}).items():
+        if isinstance(scoped_values, str):
+            scoped_values = [scoped_values]
+        for value in scoped_values or []:
+            for word in tokenize(value):
+                tokens.update(f"{scope}:{p}" for p in prefixes(word))
+
+    return {
+        "search_words": sorted(words),
+        "search_tokens": sorted(tokens),
+        "search_version": SEARCH_VERSION,
+    }
+
+
+def query_terms(search: Optional[str], scope: str = None) -> List[str]:
+    """Turn user input into the tokens that must all be present"""
+    terms = [w[:MAX_PREFIX_LENGTH] for w in tokenize(search)]
+    if scope:
+        terms = [f"{scope}:{t}" for t in terms]
+    # Preserve order while dropping duplicates
+    return list(dict.fromkeys(terms))
+
+
+def add_search_filter(query: dict, search: Optional[str], scope: str = None) -> List[str]:
+    """
+    Add a prefix search condition to a Mongo query in place.
+    Returns the free-text terms so the caller can rank results.
+    """
+    terms = query_terms(search, scope)
+    if not terms:
+        return []
+
+    # Several filters (free text, vendor type, area) share one $all list
+    condition = query.setdefault("search_tokens", {"$all": []})
+    condition["$all"].extend(t for t in terms if t not in condition["$all"])
+    # Scoped terms are exact filters, only free-text terms take part in ranking
+    return [] if scope else terms
+
+
+def ranked_pipeline(query: dict, terms: List[str], sort: dict, skip: int, limit: int, projection: dict = None) -> list:
+    """
+    Aggregation pipeline that ranks prefix matches.
+    Records whose full words equal the search terms come first, then the
+    caller's sort order is used as a tiebreaker. Only the newest
+    RANK_CANDIDATE_LIMIT matches (by the caller's sort) are ranked; run it
+    with allowDiskUse=True.
+    """
+    pipeline = [{"$match": query}]
+    if terms:
+        pipeline += [{"$sort": sort}, {"$limit": max(RANK_CANDIDATE_LIMIT, skip + limit)}]
+        pipeline.append({
+            "$addFields": {
+                "search_score": {
+                    "$size": {"$setIntersection": [{"$ifNull": ["$search_words", []]}, terms]}
+                }
+            }
+        })
+        pipeline.append({"$sort": {"search_score": -1, **sort}})
+    else:
+        pipeline.append({"$sort": sort})
+
+    pipeline += [{"$skip": skip}, {"$limit": limit}]
+
+    # Never send the index arrays back to clients
+    pipeline.append({"$project": projection or {"search_words": 0, "search_tokens": 0, "search_version": 0}})
+    return pipeline
+
+
+# ==================== DOCUMENT BUILDERS ====================
+
+def user_search_fields(user: dict) -> dict:
+    """Search fields for a users record (name and email)"""
+    email = user.get("email") or ""
+    return build_search_fields([
+        user.get("firstname"),
+        user.get("lastname"),
+        email,
+        # Allow matching the full local part, e.g. "juan.delacruz"
+        email.split("@")[0].replace(".", "").replace("_", ""),
+    ])
+
+
+def application_search_fields(application: dict, vendor_user: dict = None) -> dict:
+    """Search fields for a vendor_applications record"""
+    vendor_user = vendor_user or {}
+    return build_search_fields(
+        [
+            application.get("business_name"),
+            vendor_user.get("firstname"),
+            vendor_user.get("lastname"),
+        ],
+        scoped={
+            GOODS_TYPE_SCOPE: application.get("goods_type"),
+            AREA_SCOPE: application.get("area_of_operation") or [],
+        },
+    )
+
+
+# ==================== MAINTENANCE ====================
+
+def refresh_user_search_fields(user_id):
+    """Recompute search fields for a user and the applications that embed their name"""
+    try:
+        user = db["users"].find_one(
+            {"_id": user_id},
+            {"firstname": 1, "lastname": 1, "email": 1},
+        )
+        if not user:
+            return
+
+        db["users"].update_one({"_id": user_id}, {"$set": user_search_fields(user)})
+
+        operations = [
+            UpdateOne({"_id": app["_id"]}, {"$set": application_search_fields(app, user)})
+            for app in db["vendor_applications"].find(
+                {"user_id": user_id},
+                {"business_name": 1, "goods_type": 1, "area_of_operation": 1},
+            )
+        ]
+        if operations:
+            db["vendor_applications"].bulk_write(operations, ordered=False)
+    except Exception as e:
+        # Search fields are derived data; never fail the caller's write
+        logger.error(f"Failed to refresh search fields for user {user_id}: {str(e)}")
+
+
+def backfill_search_fields(batch_size: int = 1000):
+    """Populate search fields for records written before the index (or with an older SEARCH_VERSION)"""
+    missing = {"search_version": {"$ne": SEARCH_VERSION}}
+
+    operations = []
+    for user in db["users"].find(missing, {"firstname": 1, "lastname": 1, "email": 1}):
+        operations.append(UpdateOne({"_id": user["_id"]}, {"$set": user_search_fields(user)}))
+        if len(operations) >= batch_size:
+            db["users"].bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        db["users"].bulk_write(operations, ordered=False)
+
+    applications = list(db["vendor_applications"].find(
+        missing, {"user_id": 1, "business_name": 1, "goods_type": 1, "area_of_operation": 1}
+    ))
+    for start in range(0, len(applications), batch_size):
+        batch = applications[start:start + batch_size]
+        vendor_users = {
+            u["_id"]: u
+            for u in db["users"].find(
+                {"_id": {"$in": [app.get("user_id") for app in batch]}},
+                {"firstname": 1, "lastname": 1},
+            )
+        }
+        db["vendor_applications"].bulk_write(
+            [
+                UpdateOne(
+                    {"_id": app["_id"]},
+                    {"$set": application_search_fields(app, vendor_users.get(app.get("user_id")))},
+                )
+                for app in batch
+            ],
+            ordered=False,
+        )
+
+
+def _run_backfill():
+    try:
+        backfill_search_fields()
+        db[MIGRATIONS_COLLECTION].update_one(
+            {"_id": "search_fields"}, {"$set": {"version": SEARCH_VERSION}}, upsert=True
+        )
+        logger.info(f"Search fields backfilled (version {SEARCH_VERSION})")
+    except Exception as e:
+        logger.error(f"Failed to backfill search fields: {str(e)}")
+
+
+def ensure_search_indexes():
+    """Create the multikey search indexes; backfill older records in the background (once per SEARCH_VERSION)"""
+    try:
+        db["users"].create_index([("search_tokens", 1), ("created_at", -1)], name="users_search_tokens")
+        db["vendor_applications"].create_index(
+            [("search_tokens", 1), ("status", 1), ("submitted_at", -1)],
+            name="vendor_applications_search_tokens",
+        )
+        state = db[MIGRATIONS_COLLECTION].find_one({"_id": "search_fields"}) or {}
+        if state.get("version") != SEARCH_VERSION:
+            threading.Thread(target=_run_backfill, name="search-backfill", daemon=True).start()
+    except Exception as e:
+        logger.error(f"Failed to ensure search indexes: {str(e)}")
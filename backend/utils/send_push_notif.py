@@ -1,7 +1,7 @@
 import logging
-from firebase_admin import messaging
 from bson import ObjectId
-from secrets_backend.firebase_config import firestore_client
+from utils.notification_dispatcher import build_notification, enqueue_notifications
+from utils.token_registry import get_user_tokens, get_barangay_vendor_tokens
 
 logger = logging.getLogger(__name__)
 
@@ -10,67 +10,61 @@ def send_push_notification_to_user(user_id: str, title: str, message: str, data:
     try:
         user_oid = ObjectId(user_id)
         
-        # Fetch user's FCM tokens from Firestore
-        tokens_ref = firestore_client.collection('user_fcm_tokens').document(str(user_oid))
-        tokens_doc = tokens_ref.get()
-        
-        if not tokens_doc.exists:
-            logger.warning(f"No FCM tokens found for user {user_id}")
-            return {"success": False, "error": "No FCM tokens found for user"}
-        
-        tokens_data = tokens_doc.to_dict()
-        fcm_tokens = tokens_data.get('tokens', [])
+        # Tokens come from the registry (cached merge of Firestore and users.fcm_token)
+        fcm_tokens = get_user_tokens(str(user_oid))
         
         if not fcm_tokens:
             logger.warning(f"No FCM tokens available for user {user_id}")
             return {"success": False, "error": "No FCM tokens available for user"}
         
-        # Convert data dict to strings (FCM requirement)
-        string_data = {}
-        if data:
-            string_data = {str(k): str(v) for k, v in data.items()}
+        # Queue one message per device; the dispatcher batches them with
+        # other pending notifications and prunes tokens FCM rejects
+        queued = enqueue_notifications([
+            build_notification(token, title, message, data=data, user_id=str(user_oid), channel_id='document-updates', urgent=True)
+            for token in fcm_tokens
+        ])
         
-        # Create a message to send to the device tokens
-        message_payload = messaging.MulticastMessage(
-            notification=messaging.Notification(
-                title=title,
-                body=message,
-            ),
-            data=string_data,
-            tokens=fcm_tokens,
-            android=messaging.AndroidConfig(
-                priority='high',
-                notification=messaging.AndroidNotification(
-                    channel_id='document-updates',
-                    priority='high',
-                    visibility='public',
-                    sound='default',
-                    color='#1976D2',
-                ),
-            ),
-            apns=messaging.APNSConfig(
-                headers={'apns-priority': '10'},
-                payload=messaging.APNSPayload(
-                    aps=messaging.Aps(
-                        sound='default',
-                        badge=1,
-                        content_available=True,
-                    ),
-                ),
-            ),
-        )
+        if not queued:
+            return {"success": False, "error": "Notification queue is full"}
         
-        # Send the message
-        response = messaging.send_multicast(message_payload)
-        
-        logger.info(f"Sent push notification to user {user_id}: {response.success_count} successful, {response.failure_count} failed")
+        logger.info(f"Queued push notification for user {user_id} ({len(fcm_tokens)} devices)")
         
         return {
             "success": True,
-            "success_count": response.success_count,
-            "failure_count": response.failure_count
+            "queued_count": len(fcm_tokens)
         }
     
     except Exception as e:
         logger.error(f"Error sending push notification to user {user_id}: {str(e)}")
-        return {"success": False, "error": str(e)}
\ No newline at end of file
+        return {"success": False, "error": str(e)}
+
+def send_push_notification_to_barangay_vendors(barangay: str, title: str, message: str, data: dict = None):
+    """Send push notification to every listed vendor in a barangay"""
+    try:
+        # One batched token lookup for all vendors in the barangay
+        tokens_by_user = get_barangay_vendor_tokens(barangay)
+        
+        notifications = [
+            build_notification(token, title, message, data=data, user_id=user_id, channel_id='document-updates', urgent=True)
+            for user_id, tokens in tokens_by_user.items()
+            for token in tokens
+        ]
+        
+        if not notifications:
+            logger.warning(f"No FCM tokens available for vendors in {barangay}")
+            return {"success": False, "error": "No FCM tokens available for vendors"}
+        
+        if not enqueue_notifications(notifications):
+            return {"success": False, "error": "Notification queue is full"}
+        
+        logger.info(f"Queued push notification for {len(tokens_by_user)} vendors in {barangay} ({len(notifications)} devices)")
+        
+        return {
+            "success": True,
+            "vendor_count": len(tokens_by_user),
+            "queued_count": len(notifications)
+        }
+    
+    except Exception as e:
+        logger.error(f"Error sending push notification to vendors in {barangay}: {str(e)}")
+        return {"success": False, "error": str(e)}
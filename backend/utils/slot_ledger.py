@@ -0,0 +1,199 @@
+import logging
+import threading
+from datetime import datetime
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from config.db import db
+
+logger = logging.getLogger(__name__)
+
+# Vendor slot ledger
+# One document holds the approved/pending application counts and the
+# per-area usage. It is adjusted with atomic $inc whenever an application
+# changes status (or a pending application changes areas), so slot
+# availability is a single document read. New applications reserve their
+# slot with a conditional $inc, which is race-free under concurrency.
+# A periodic reconciliation recomputes the ledger from vendor_applications.
+# Every $inc also bumps `version`; the reconciler only writes its result if
+# the version is unchanged since it started, so no concurrent $inc is lost.
+# Only areas configured in the slot config's area_slots are counted; area
+# names become "areas.<name>" $inc paths, so anything else is ignored.
+
+LEDGER_COLLECTION = "slot_ledger"
+LEDGER_ID = "vendor_slots"
+
+# Statuses that hold a slot
+SLOT_STATUSES = ["approved", "pending"]
+
+RECONCILE_INTERVAL = 600  # seconds
+RECONCILE_ATTEMPTS = 3    # retries when a concurrent $inc moves the version
+
+_reconciler_thread = None
+
+
+def is_ledger_area(area) -> bool:
+    """Area names that are safe as a counter path (no dots, no leading $)"""
+    return isinstance(area, str) and bool(area) and "." not in area and not area.startswith("$")
+
+
+def configured_areas() -> set:
+    """Area names from the slot config that the ledger counts"""
+    # Imported here: the slot config controller imports this module
+    from controllers.admin.admin_vendor_carts import get_slot_config
+    return {area for area in get_slot_config().get("area_slots", {}) if is_ledger_area(area)}
+
+
+def application_slot_values(application: dict, areas: set = None) -> dict:
+    """Ledger counters a single application contributes to (`areas` = configured areas)"""
+    if not application:
+        return {}
+
+    status = application.get("status")
+    values = {
+        "approved": 1 if status == "approved" else 0,
+        "pending": 1 if status == "pending" else 0,
+    }
+    if status in SLOT_STATUSES:
+        known = configured_areas() if areas is None else areas
+        for area in set(application.get("area_of_operation") or []):
+            if area in known:
+                values[f"areas.{area}"] = 1
+    return values
+
+
+def _delta(before: dict = None, after: dict = None) -> dict:
+    areas = configured_areas()
+    old = application_slot_values(before, areas)
+    new = application_slot_values(after, areas)
+    delta = {k: new.get(k, 0) - old.get(k, 0) for k in set(old) | set(new)}
+    return {k: v for k, v in delta.items() if v}
+
+
+def record_application_change(before: dict = None, after: dict = None):
+    """Apply the ledger delta between two versions of an application"""
+    delta = _delta(before, after)
+    if not delta:
+        return
+
+    try:
+        result = db[LEDGER_COLLECTION].update_one(
+            {"_id": LEDGER_ID},
+            {"$inc": {**delta, "version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+        )
+        if result.matched_count == 0:
+            # Ledger not created yet: seed it from the collection (includes this change)
+            reconcile_slot_ledger()
+    except Exception as e:
+        # The reconciler fixes any drift; never fail the application write
+        logger.error(f"Failed to update slot ledger: {str(e)}")
+
+
+def reserve_application_slot(application: dict, usable_slots: int) -> bool:
+    """
+    Atomically take a slot for a new pending application.
+    Succeeds only while approved + pending stays below `usable_slots`.
+    """
+    get_slot_ledger()  # make sure the ledger exists before the conditional update
+
+    reserved = db[LEDGER_COLLECTION].find_one_and_update(
+        {
+            "_id": LEDGER_ID,
+            "$expr": {"$lt": [{"$add": ["$approved", "$pending"]}, usable_slots]},
+        },
+        {"$inc": {**_delta(None, application), "version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+        return_document=ReturnDocument.AFTER,
+    )
+    return reserved is not None
+
+
+def release_application_slot(application: dict):
+    """Give back a slot taken by reserve_application_slot (e.g. insert failed)"""
+    record_application_change(application, None)
+
+
+def compute_slot_ledger() -> dict:
+    """Recompute ledger counters from vendor_applications in one aggregation"""
+    areas = sorted(configured_areas())
+    result = next(db["vendor_applications"].aggregate([
+        {"$match": {"status": {"$in": SLOT_STATUSES}}},
+        {"$facet": {
+            "by_status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+            "by_area": [
+                {"$project": {"areas": {"$setUnion": [{"$ifNull": ["$area_of_operation", []]}, []]}}},
+                {"$unwind": "$areas"},
+                {"$match": {"areas": {"$in": areas}}},
+                {"$group": {"_id": "$areas", "count": {"$sum": 1}}},
+            ],
+        }},
+    ]), {"by_status": [], "by_area": []})
+
+    by_status = {row["_id"]: row["count"] for row in result["by_status"]}
+    return {
+        "approved": by_status.get("approved", 0),
+        "pending": by_status.get("pending", 0),
+        "areas": {row["_id"]: row["count"] for row in result["by_area"]},
+    }
+
+
+def reconcile_slot_ledger() -> dict:
+    """
+    Rewrite the ledger from the source collection.
+    The write is conditional on the ledger version read before the
+    aggregation; if an $inc lands in between, recompute and try again.
+    """
+    for _ in range(RECONCILE_ATTEMPTS):
+        current = db[LEDGER_COLLECTION].find_one({"_id": LEDGER_ID}, {"version": 1})
+        ledger = compute_slot_ledger()
+        now = datetime.utcnow()
+
+        if current is None:
+            try:
+                db[LEDGER_COLLECTION].insert_one(
+                    {"_id": LEDGER_ID, **ledger, "version": 1, "updated_at": now, "reconciled_at": now}
+                )
+                return ledger
+            except DuplicateKeyError:
+                continue  # created concurrently
+
+        version = current.get("version", 0)
+        result = db[LEDGER_COLLECTION].replace_one(
+            {"_id": LEDGER_ID, "version": current.get("version")},
+            {**ledger, "version": version + 1, "updated_at": now, "reconciled_at": now},
+        )
+        if result.matched_count:
+            return ledger
+
+    # Still contended: keep the $inc-maintained counters, the next run retries
+    logger.warning("Slot ledger changed during reconciliation; skipped this run")
+    return db[LEDGER_COLLECTION].find_one({"_id": LEDGER_ID}) or ledger
+
+
+def get_slot_ledger() -> dict:
+    """Read the ledger document, creating it on first use"""
+    ledger = db[LEDGER_COLLECTION].find_one({"_id": LEDGER_ID})
+    if ledger:
+        return ledger
+    return reconcile_slot_ledger()
+
+
+def _reconcile_loop(stop_event: threading.Event):
+    while not stop_event.wait(RECONCILE_INTERVAL):
+        try:
+            reconcile_slot_ledger()
+        except Exception as e:
+            logger.error(f"Slot ledger reconciliation failed: {str(e)}")
+
+
+def start_slot_reconciler():
+    """Reconcile now and then every RECONCILE_INTERVAL seconds (background thread)"""
+    global _reconciler_thread
+    if _reconciler_thread and _reconciler_thread.is_alive():
+        return
+    try:
+        reconcile_slot_ledger()
+    except Exception as e:
+        logger.error(f"Initial slot ledger reconciliation failed: {str(e)}")
+    _reconciler_thread = threading.Thread(
+        target=_reconcile_loop, args=(threading.Event(),), name="slot-reconciler", daemon=True
+    )
+    _reconciler_thread.start()
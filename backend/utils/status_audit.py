@@ -0,0 +1,34 @@
+import logging
+from datetime import datetime
+from config.db import db
+
+logger = logging.getLogger(__name__)
+
+# Status change audit trail
+# Every admin status transition is recorded as one entry; bulk operations
+# write all of their entries with a single insert_many.
+
+AUDIT_COLLECTION = "status_audit_log"
+
+
+def build_audit_entry(entity: str, entity_id, previous_status, new_status, changed_by, notes: str = None) -> dict:
+    """Shape one status change entry"""
+    return {
+        "entity": entity,
+        "entity_id": str(entity_id),
+        "previous_status": previous_status,
+        "new_status": new_status,
+        "changed_by": changed_by,
+        "notes": notes,
+        "changed_at": datetime.utcnow(),
+    }
+
+
+def record_status_changes(entries: list):
+    """Write audit entries in one batch (never fails the status change itself)"""
+    if not entries:
+        return
+    try:
+        db[AUDIT_COLLECTION].insert_many(entries, ordered=False)
+    except Exception as e:
+        logger.error(f"Failed to record {len(entries)} status audit entries: {str(e)}")
@@ -0,0 +1,121 @@
+import logging
+from pymongo import UpdateOne
+from config.db import db
+from utils.bbox_codec import encode_bounding_boxes, decode_submission_boxes
+from utils.render_cache import signed_api_url
+
+logger = logging.getLogger(__name__)
+
+# Document submission AI artifacts
+# Per-file Gemini details, Cloud Vision bounding boxes and evidence image URLs
+# live in a side collection (one document per submission, same _id), so the
+# document_submissions records that user/admin listings scan stay small.
+# Detail views load them with attach_artifacts(). Records written before the
+# split still embed the fields; listings project them away and a one-time
+# background migration moves them over.
+# Evidence images are stored as API paths and handed out as signed,
+# expiring URLs when the artifacts are read.
+
+ARTIFACTS_COLLECTION = "document_submission_artifacts"
+ARTIFACT_FIELDS = ("gemini_details", "bounding_boxes", "file_url_processed")
+ARTIFACTS_VERSION = 1  # schema_migrations version of the split
+
+# Listing projection: never fetch embedded artifacts of older records or cache keys
+SUMMARY_PROJECTION = {**{field: 0 for field in ARTIFACT_FIELDS}, "file_hash": 0}
+
+EVIDENCE_ROUTE = "/users/document-submissions/evidence"
+
+
+def evidence_path(submission_id: str, index: int) -> str:
+    """API path of a file's evidence image (under /users/document-submissions)"""
+    return f"{EVIDENCE_ROUTE}/{submission_id}/{index}"
+
+
+def evidence_urls(submission_id, stored: list) -> list:
+    """Signed URLs for stored file_url_processed values (older Cloudinary URLs are kept)"""
+    return [
+        signed_api_url(evidence_path(str(submission_id), index)) if value and EVIDENCE_ROUTE in value else value
+        for index, value in enumerate(stored or [])
+    ]
+
+
+def save_artifacts(submission_id, artifacts: dict):
+    """Create or replace the artifacts of a submission"""
+    fields = {k: v for k, v in artifacts.items() if k in ARTIFACT_FIELDS}
+    db[ARTIFACTS_COLLECTION].update_one({"_id": submission_id}, {"$set": fields}, upsert=True)
+
+
+def delete_artifacts(submission_id):
+    db[ARTIFACTS_COLLECTION].delete_one({"_id": submission_id})
+
+
+def load_artifacts(submission_id, fields: tuple = ARTIFACT_FIELDS) -> dict:
+    """Artifacts of one submission (bounding boxes still packed)"""
+    doc = db[ARTIFACTS_COLLECTION].find_one({"_id": submission_id}, {f: 1 for f in fields})
+    if not doc:
+        return {}
+    doc.pop("_id", None)
+    return doc
+
+
+def attach_artifacts(submission: dict) -> dict:
+    """Add artifacts to a fetched submission (detail views); boxes are decoded"""
+    artifacts = load_artifacts(submission["_id"])
+    for field in ARTIFACT_FIELDS:
+        if field in artifacts:
+            submission[field] = artifacts[field]
+        else:
+            submission.setdefault(field, [])
+    submission["file_url_processed"] = evidence_urls(submission["_id"], submission["file_url_processed"])
+    return decode_submission_boxes(submission)
+
+
+# ==================== MIGRATION ====================
+
+def migrate_submission_artifacts(batch_size: int = 200) -> int:
+    """Move artifacts embedded in older submissions to the side collection; returns the number moved"""
+    embedded = {"$or": [{field: {"$exists": True}} for field in ARTIFACT_FIELDS]}
+    projection = {field: 1 for field in ARTIFACT_FIELDS}
+
+    moved = 0
+    artifact_ops, submission_ops = [], []
+
+    def flush():
+        nonlocal moved
+        # Artifacts are written before they are removed from the submission
+        db[ARTIFACTS_COLLECTION].bulk_write(artifact_ops, ordered=False)
+        moved += db["document_submissions"].bulk_write(submission_ops, ordered=False).modified_count
+        artifact_ops.clear()
+        submission_ops.clear()
+
+    for submission in db["document_submissions"].find(embedded, projection):
+        artifacts = {field: submission[field] for field in ARTIFACT_FIELDS if field in submission}
+        if "bounding_boxes" in artifacts:
+            artifacts["bounding_boxes"] = [encode_bounding_boxes(b) for b in artifacts["bounding_boxes"] or []]
+        # Fields already in the side collection are newer (e.g. written by a
+        # re-verification since this record was read): only fill missing ones
+        artifact_ops.append(UpdateOne(
+            {"_id": submission["_id"]},
+            [{"$set": {field: {"$ifNull": [f"${field}", {"$literal": value}]} for field, value in artifacts.items()}}],
+            upsert=True,
+        ))
+        submission_ops.append(UpdateOne(
+            {"_id": submission["_id"]},
+            {"$unset": {field: "" for field in ARTIFACT_FIELDS}}
+        ))
+        if len(artifact_ops) >= batch_size:
+            flush()
+    if artifact_ops:
+        flush()
+    return moved
+
+
+def ensure_submission_artifacts():
+    """Split artifacts out of older submissions (startup; runs once, in the background)"""
+    # Imported here: schema_migrations is only needed at startup
+    from utils.schema_migrations import run_migration_in_background
+    run_migration_in_background(
+        "submission_artifacts",
+        ARTIFACTS_VERSION,
+        lambda: f"moved AI artifacts of {migrate_submission_artifacts()} submissions to {ARTIFACTS_COLLECTION}",
+    )
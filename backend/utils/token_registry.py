@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+from bson import ObjectId
+from config.db import db
+from secrets_backend.firebase_config import firestore_client
+from utils.vendor_directory import DIRECTORY_COLLECTION
+
+logger = logging.getLogger(__name__)
+
+# FCM token registry
+# A user's device tokens live in two places: users.fcm_token (set at login)
+# and Firestore user_fcm_tokens/{user_id} (set by the mobile app). The
+# registry merges both behind an in-process TTL cache. Entries are dropped
+# when a login refreshes the token and individual tokens are removed when
+# FCM reports them unregistered. Lookups for many users resolve every miss
+# with one Mongo $in query and one Firestore get_all.
+
+TOKEN_TTL = 300  # seconds
+MAX_ENTRIES = 50000
+FIRESTORE_COLLECTION = "user_fcm_tokens"
+
+_cache = {}  # user_id -> (expires_at, tokens)
+_lock = threading.Lock()
+
+
+def _merge(*token_lists) -> list:
+    tokens = []
+    for token_list in token_lists:
+        for token in token_list or []:
+            if token and token not in tokens:
+                tokens.append(token)
+    return tokens
+
+
+def _load_tokens(user_ids: list):
+    """Batched read of both token sources; returns (tokens, complete)"""
+    tokens = {user_id: [] for user_id in user_ids}
+
+    object_ids = [ObjectId(uid) for uid in user_ids if ObjectId.is_valid(uid)]
+    for user in db["users"].find({"_id": {"$in": object_ids}, "fcm_token": {"$nin": [None, ""]}}, {"fcm_token": 1}):
+        tokens[str(user["_id"])] = _merge(tokens[str(user["_id"])], [user["fcm_token"]])
+
+    complete = True
+    try:
+        refs = [firestore_client.collection(FIRESTORE_COLLECTION).document(uid) for uid in user_ids]
+        for snapshot in firestore_client.get_all(refs):
+            if snapshot.exists and snapshot.id in tokens:
+                tokens[snapshot.id] = _merge(tokens[snapshot.id], snapshot.to_dict().get("tokens", []))
+    except Exception as e:
+        # Mongo tokens are still usable, but a partial result is not cached
+        logger.error(f"Failed to read FCM tokens from Firestore: {str(e)}")
+        complete = False
+
+    return tokens, complete
+
+
+def get_tokens_for_users(user_ids: list) -> dict:
+    """Tokens for many users: {user_id: [tokens]}, misses resolved in one batched read"""
+    user_ids = list(dict.fromkeys(str(uid) for uid in user_ids))
+    now = time.monotonic()
+
+    result = {}
+    missing = []
+    with _lock:
+        for user_id in user_ids:
+            entry = _cache.get(user_id)
+            if entry and entry[0] > now:
+                result[user_id] = list(entry[1])
+            else:
+                missing.append(user_id)
+
+    if missing:
+        loaded, complete = _load_tokens(missing)
+        if complete:
+            with _lock:
+                if len(_cache) + len(loaded) > MAX_ENTRIES:
+                    _cache.clear()
+                expires_at = time.monotonic() + TOKEN_TTL
+                for user_id, tokens in loaded.items():
+                    _cache[user_id] = (expires_at, tokens)
+        for user_id, tokens in loaded.items():
+            result[user_id] = list(tokens)
+
+    return result
+
+
+def get_user_tokens(user_id: str) -> list:
+    """All known FCM tokens for one user"""
+    return get_tokens_for_users([user_id]).get(str(user_id), [])
+
+
+def get_barangay_vendor_tokens(barangay: str) -> dict:
+    """Tokens of every listed vendor in a barangay: {user_id: [tokens]}"""
+    user_ids = db[DIRECTORY_COLLECTION].distinct("user_id", {"vendor_barangay": barangay})
+    return get_tokens_for_users([uid for uid in user_ids if uid])
+
+
+def invalidate_user_tokens(user_id: str):
+    """Drop a user's cached tokens (e.g. after login sets a new fcm_token)"""
+    with _lock:
+        _cache.pop(str(user_id), None)
+
+
+def forget_tokens(tokens: list):
+    """Remove tokens FCM reported as unregistered from every cached entry"""
+    dead = set(tokens)
+    with _lock:
+        for user_id, (expires_at, cached) in list(_cache.items()):
+            if dead.intersection(cached):
+                _cache[user_id] = (expires_at, [t for t in cached if t not in dead])
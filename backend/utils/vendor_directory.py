@@ -0,0 +1,193 @@
+import logging
+import time
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ReplaceOne, ReturnDocument
+from config.db import db
+from controllers.vendor_application_controller import calculate_completeness
+
+logger = logging.getLogger(__name__)
+
+# Public vendor directory
+# Denormalized copy of every approved, activated (90%+ complete) vendor
+# application joined with the vendor's profile. It is kept in sync whenever
+# an application or user profile changes so /vendors can be served by a
+# single indexed query.
+
+DIRECTORY_COLLECTION = "public_vendor_directory"
+DIRECTORY_META_COLLECTION = "public_vendor_directory_meta"
+MIN_COMPLETENESS = 90
+
+# How long a worker trusts its last read of the directory version (seconds)
+VERSION_POLL_INTERVAL = 5
+
+# In-memory copy of the directory version counter
+_version_cache = {"version": 0, "updated_at": None, "checked_at": 0.0}
+
+USER_FIELDS = {"firstname": 1, "lastname": 1, "barangay": 1, "mobile_no": 1}
+
+
+# ==================== VERSION COUNTER ====================
+
+def bump_directory_version():
+    """Record that the directory changed (drives public HTTP cache validators)"""
+    try:
+        meta = db[DIRECTORY_META_COLLECTION].find_one_and_update(
+            {"_id": "version"},
+            {"$inc": {"version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        _version_cache.update(
+            version=meta["version"],
+            updated_at=meta["updated_at"],
+            checked_at=time.monotonic(),
+        )
+    except Exception as e:
+        logger.error(f"Failed to bump vendor directory version: {str(e)}")
+
+
+def get_directory_version():
+    """
+    Current (version, updated_at) of the directory.
+    Polled from Mongo at most every VERSION_POLL_INTERVAL seconds so other
+    workers' changes are picked up without a read per request.
+    """
+    now = time.monotonic()
+    if now - _version_cache["checked_at"] >= VERSION_POLL_INTERVAL:
+        try:
+            meta = db[DIRECTORY_META_COLLECTION].find_one({"_id": "version"}) or {}
+            _version_cache.update(
+                version=meta.get("version", 0),
+                updated_at=meta.get("updated_at"),
+                checked_at=now,
+            )
+        except Exception as e:
+            logger.error(f"Failed to read vendor directory version: {str(e)}")
+    return _version_cache["version"], _version_cache["updated_at"]
+
+
+# ==================== SYNC ====================
+
+def build_directory_entry(application: dict, vendor_user: dict = None) -> dict:
+    """Flatten an application and its vendor profile into a directory record"""
+    vendor_user = vendor_user or {}
+    return {
+        "_id": application["_id"],
+        "user_id": application.get("user_id"),
+        "business_name": application.get("business_name"),
+        "goods_type": application.get("goods_type"),
+        "cart_type": application.get("cart_type"),
+        "operating_hours": application.get("operating_hours"),
+        "years_in_operation": application.get("years_in_operation"),
+        "area_of_operation": application.get("area_of_operation"),
+        "delivery_capability": application.get("delivery_capability"),
+        "products": application.get("products"),
+        "specialty_items": application.get("specialty_items"),
+        "preferred_contact": application.get("preferred_contact"),
+        "social_media": application.get("social_media"),
+        "business_logo_url": application.get("business_logo_url"),
+        "cart_image_url": application.get("cart_image_url"),
+        "vendor_photo_url": application.get("vendor_photo_url"),
+        # GeoJSON Point [lng, lat] for proximity search
+        "location": application.get("location"),
+        "location_updated_at": application.get("location_updated_at"),
+        "location_active": application.get("location_active", False),
+        "vendor_name": f"{vendor_user.get('firstname')} {vendor_user.get('lastname')}" if vendor_user else "Unknown",
+        "vendor_barangay": vendor_user.get("barangay") if vendor_user else None,
+        "vendor_mobile_no": vendor_user.get("mobile_no") if vendor_user else None,
+        "completeness_percentage": calculate_completeness(application),
+        "synced_at": datetime.utcnow(),
+    }
+
+
+def is_listed(application: dict) -> bool:
+    """Only approved and activated vendors are public"""
+    return (
+        application.get("status") == "approved"
+        and calculate_completeness(application) >= MIN_COMPLETENESS
+    )
+
+
+def sync_vendor_application(application_id):
+    """Upsert or remove a single application in the directory"""
+    try:
+        application_oid = ObjectId(application_id)
+        application = db["vendor_applications"].find_one({"_id": application_oid})
+
+        if not application or not is_listed(application):
+            result = db[DIRECTORY_COLLECTION].delete_one({"_id": application_oid})
+            if result.deleted_count:
+                bump_directory_version()
+            return
+
+        vendor_user = db["users"].find_one({"_id": application.get("user_id")}, USER_FIELDS)
+        db[DIRECTORY_COLLECTION].replace_one(
+            {"_id": application_oid},
+            build_directory_entry(application, vendor_user),
+            upsert=True,
+        )
+        bump_directory_version()
+    except Exception as e:
+        # The directory is derived data; never fail the caller's write
+        logger.error(f"Failed to sync vendor directory for application {application_id}: {str(e)}")
+
+
+def sync_vendor_user(user_id):
+    """Refresh every directory record that embeds this user's profile"""
+    try:
+        user_oid = ObjectId(user_id)
+        for application in db["vendor_applications"].find({"user_id": user_oid}, {"_id": 1}):
+            sync_vendor_application(application["_id"])
+    except Exception as e:
+        logger.error(f"Failed to sync vendor directory for user {user_id}: {str(e)}")
+
+
+def rebuild_vendor_directory(batch_size: int = 500):
+    """Rebuild the whole directory from vendor_applications and users"""
+    listed_ids = []
+    applications = [app for app in db["vendor_applications"].find({"status": "approved"}) if is_listed(app)]
+
+    for start in range(0, len(applications), batch_size):
+        batch = applications[start:start + batch_size]
+        vendor_users = {
+            u["_id"]: u
+            for u in db["users"].find(
+                {"_id": {"$in": [app.get("user_id") for app in batch]}},
+                USER_FIELDS,
+            )
+        }
+        db[DIRECTORY_COLLECTION].bulk_write(
+            [
+                ReplaceOne(
+                    {"_id": app["_id"]},
+                    build_directory_entry(app, vendor_users.get(app.get("user_id"))),
+                    upsert=True,
+                )
+                for app in batch
+            ],
+            ordered=False,
+        )
+        listed_ids.extend(app["_id"] for app in batch)
+
+    # Drop anything that is no longer approved/activated
+    db[DIRECTORY_COLLECTION].delete_many({"_id": {"$nin": listed_ids}})
+    bump_directory_version()
+    logger.info(f"Vendor directory rebuilt with {len(listed_ids)} vendors")
+
+
+def ensure_directory_indexes():
+    """Create directory indexes and populate the collection on first run"""
+    try:
+        directory = db[DIRECTORY_COLLECTION]
+        directory.create_index([("goods_type", 1), ("business_name", 1)])
+        directory.create_index([("vendor_barangay", 1), ("business_name", 1)])
+        directory.create_index([("delivery_capability", 1), ("business_name", 1)])
+        directory.create_index([("business_name", 1)])
+        directory.create_index([("user_id", 1)])
+        directory.create_index([("location", "2dsphere")])
+
+        if directory.estimated_document_count() == 0:
+            rebuild_vendor_directory()
+    except Exception as e:
+        logger.error(f"Failed to ensure vendor directory indexes: {str(e)}")
@@ -0,0 +1,129 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pymongo import DESCENDING
+from config.db import db
+
+logger = logging.getLogger(__name__)
+
+# Gemini verification cache
+# A verification result only depends on the file bytes, the requirement
+# (base document and its requirement text) and the prompt, so resubmitting the
+# same file for the same base document reuses the stored label/score/reason instead of calling the
+# model again. A small in-process LRU sits in front of a Mongo collection;
+# the collection is trimmed to MAX_CACHE_ENTRIES by least-recent use.
+
+CACHE_COLLECTION = "gemini_verification_cache"
+MAX_CACHE_ENTRIES = 20000
+MAX_MEMORY_ENTRIES = 512
+TRIM_EVERY = 100  # stores between trims of the Mongo collection
+
+_memory = OrderedDict()
+_lock = threading.Lock()
+_stores_since_trim = 0
+
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 of the file bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_content_hash(file) -> str:
+    """SHA-256 of an UploadFile, leaving the stream at the start for the upload"""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file.file.read(1024 * 1024), b""):
+        digest.update(chunk)
+    file.file.seek(0)
+    return digest.hexdigest()
+
+
+def verification_cache_key(file_hash: str, base_document_id, template_requirements: str, prompt_version: str) -> str:
+    """Cache key; editing a base document's requirements starts a fresh key"""
+    requirements_hash = hashlib.sha256((template_requirements or "").encode("utf-8")).hexdigest()[:16]
+    return f"{file_hash}:{base_document_id}:{requirements_hash}:{prompt_version}"
+
+
+def _remember(key: str, result: dict):
+    with _lock:
+        _memory[key] = result
+        _memory.move_to_end(key)
+        while len(_memory) > MAX_MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+
+
+def get_cached_verification(key: str):
+    """Cached {label, score, reason} result for a key, or None"""
+    with _lock:
+        if key in _memory:
+            _memory.move_to_end(key)
+            result = dict(_memory[key])
+        else:
+            result = None
+
+    try:
+        if result is None:
+            entry = db[CACHE_COLLECTION].find_one_and_update(
+                {"_id": key},
+                {"$set": {"last_used_at": datetime.utcnow()}, "$inc": {"hits": 1}},
+                {"result": 1}
+            )
+            if not entry:
+                return None
+            result = entry["result"]
+            _remember(key, result)
+            result = dict(result)
+        else:
+            db[CACHE_COLLECTION].update_one(
+                {"_id": key},
+                {"$set": {"last_used_at": datetime.utcnow()}, "$inc": {"hits": 1}}
+            )
+    except Exception as e:
+        logger.error(f"Verification cache read failed: {str(e)}")
+        return result
+
+    return result
+
+
+def store_verification(key: str, result: dict, metadata: dict = None):
+    """Store a parsed verification result (overwrites any previous one)"""
+    global _stores_since_trim
+    _remember(key, result)
+    try:
+        now = datetime.utcnow()
+        db[CACHE_COLLECTION].replace_one(
+            {"_id": key},
+            {"result": result, **(metadata or {}), "created_at": now, "last_used_at": now, "hits": 0},
+            upsert=True
+        )
+        _stores_since_trim += 1
+        if _stores_since_trim >= TRIM_EVERY:
+            _stores_since_trim = 0
+            trim_verification_cache()
+    except Exception as e:
+        logger.error(f"Verification cache write failed: {str(e)}")
+
+
+def trim_verification_cache():
+    """Evict least recently used entries beyond MAX_CACHE_ENTRIES"""
+    collection = db[CACHE_COLLECTION]
+    excess = collection.estimated_document_count() - MAX_CACHE_ENTRIES
+    if excess <= 0:
+        return
+    cutoff = next(
+        collection.find({}, {"last_used_at": 1}).sort("last_used_at", DESCENDING).skip(MAX_CACHE_ENTRIES).limit(1),
+        None
+    )
+    if cutoff:
+        deleted = collection.delete_many({"last_used_at": {"$lte": cutoff["last_used_at"]}}).deleted_count
+        logger.info(f"Evicted {deleted} verification cache entries")
+
+
+def ensure_verification_cache_indexes():
+    """Index used by LRU eviction; drops pre-screen rejects cached by earlier versions"""
+    try:
+        db[CACHE_COLLECTION].create_index("last_used_at")
+        db[CACHE_COLLECTION].delete_many({"source": "prescreen"})
+    except Exception as e:
+        logger.error(f"Failed to create verification cache index: {str(e)}")
@@ -12,6 +12,7 @@ import toast from "react-hot-toast";
 import Swal from "sweetalert2";
 import Sidebar from "../../components/Sidebar";
 import useUserSubmissions from "../../hooks/useUserSubmissions";
+import usersubService from "../../services/usersubService";
 import SubmissionsTable from "../../components/user_submissions/SubmissionsTable";
 import SubmissionDetailsModal from "../../components/user_submissions/SubmissionDetailsModal";
 
@@ -79,9 +80,16 @@ export default function UserSubmissions({ onLogout }) {
     }
   };
 
-  const handleViewImages = (submission) => {
+  const handleViewImages = async (submission) => {
     setSelectedSubmission(submission);
     setOpenModal(true);
+    // The list only carries summaries; load Gemini details and evidence images
+    try {
+      const details = await usersubService.getDetails(submission._id);
+      setSelectedSubmission((current) => (current && current._id === submission._id ? details : current));
+    } catch (error) {
+      console.error("Failed to load submission details:", error);
+    }
     toast.success(`Viewing details for ${Array.isArray(submission.filename) ? submission.filename.join(', ') : submission.filename}`, {
       duration: 2000
     });
@@ -367,9 +367,11 @@ const VendorCartMonitoring = () => {
   };
 
   const handleStatusUpdate = async (recordId, newStatus) => {
+    const token = localStorage.getItem("token");
     const updatePromise = axios.put(
       `${BASE_URL}/api/admin/vendor-carts/update-status/${recordId}`,
       { status: newStatus },
+      { headers: { Authorization: `Bearer ${token}` } },
     );
 
     toast.promise(updatePromise, {
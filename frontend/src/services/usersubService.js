@@ -14,6 +14,19 @@ const usersubService = {
     );
     return response.data.submissions;
   },
+
+  getDetails: async (submissionId) => {
+    const token = localStorage.getItem("token");
+    const response = await axios.get(
+      `${BASE_URL}/api/admin/document-submissions/details/${submissionId}`,
+      {
+        headers: {
+          Authorization: `Bearer ${token}`
+        }
+      }
+    );
+    return response.data.submission;
+  },
   
   delete: async (submissionId) => {
     const token = localStorage.getItem("token");
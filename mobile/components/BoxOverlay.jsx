@@ -1,17 +1,19 @@
 import React from "react";
 import { View, StyleSheet } from "react-native";
 
-export default function BoxOverlay({ predictions, imageWidth, imageHeight }) {
+// Boxes are in source-image pixels (imageSize = [width, height]); older scans used the 512x512 model frame
+export default function BoxOverlay({ predictions, imageWidth, imageHeight, imageSize = [512, 512] }) {
   if (!predictions || predictions.length === 0) return null;
 
   return (
     <View style={[StyleSheet.absoluteFill, { position: "absolute" }]}>
       {predictions.map((pred, idx) => {
         const [x1, y1, x2, y2] = pred.box;
-        const left = (x1 / 512) * imageWidth;
-        const top = (y1 / 512) * imageHeight;
-        const width = ((x2 - x1) / 512) * imageWidth;
-        const height = ((y2 - y1) / 512) * imageHeight;
+        const [sourceWidth, sourceHeight] = imageSize;
+        const left = (x1 / sourceWidth) * imageWidth;
+        const top = (y1 / sourceHeight) * imageHeight;
+        const width = ((x2 - x1) / sourceWidth) * imageWidth;
+        const height = ((y2 - y1) / sourceHeight) * imageHeight;
 
         return (
           <View
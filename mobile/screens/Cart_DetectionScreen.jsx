@@ -35,6 +35,7 @@ export default function CartDetectionScreen() {
   const [galleryStatuses, setGalleryStatuses] = useState({});
   const [userId, setUserId] = useState(null);
   const [predictions, setPredictions] = useState([]);
+  const [imageSize, setImageSize] = useState(undefined);
   const [textDetection, setTextDetection] = useState(null);
   const [isLoading, setIsLoading] = useState(false);
   const [showScanner, setShowScanner] = useState(true);
@@ -193,6 +194,7 @@ export default function CartDetectionScreen() {
       const data = response.data;
       if (data && Array.isArray(data.predictions)) {
         setPredictions(data.predictions);
+        setImageSize(data.image_size || undefined);
       } else {
         console.warn("Invalid predictions format:", data);
         setPredictions([]);
@@ -487,7 +489,7 @@ export default function CartDetectionScreen() {
                 resizeMode="contain"
               />
               {userRole === "admin" && (
-                <BoxOverlay predictions={predictions} imageWidth={350} imageHeight={350} />
+                <BoxOverlay predictions={predictions} imageWidth={350} imageHeight={350} imageSize={imageSize} />
               )}
             </View>
 
@@ -5,7 +5,29 @@ import VendorMap from '../components/VendorMap';
 import MapDistanceInfo from '../components/MapDistanceInfo';
 import * as Location from "expo-location";
 import firestore from '@react-native-firebase/firestore';
+import AsyncStorage from "@react-native-async-storage/async-storage";
 import authService from '../services/authService';
+import BASE_URL from "../common/baseurl.js";
+
+// Minimum time between location reports to the backend (powers the nearby vendors search)
+const LOCATION_REPORT_INTERVAL = 15000;
+
+// Report the vendor's location (or that sharing stopped) to PUT /api/vendor/location
+async function reportLocation(body) {
+  try {
+    const token = await AsyncStorage.getItem("access_token");
+    await fetch(`${BASE_URL}/api/vendor/location`, {
+      method: "PUT",
+      headers: {
+        "Content-Type": "application/json",
+        Authorization: `Bearer ${token}`,
+      },
+      body: JSON.stringify(body),
+    });
+  } catch (error) {
+    console.error('Error reporting vendor location:', error);
+  }
+}
 
 export default function VendorLocationScreen({ navigation }) {
   const [location, setLocationState] = useState(null);
@@ -19,6 +41,7 @@ export default function VendorLocationScreen({ navigation }) {
   const [distance, setDistance] = useState(null);
   const [eta, setEta] = useState(null);
   const watcherRef = useRef(null);
+  const lastReportRef = useRef(0);
   const [vendor, setVendor] = useState(null);
   const [vendorId, setVendorId] = useState(null);
 
@@ -113,6 +136,11 @@ export default function VendorLocationScreen({ navigation }) {
             ...vendor,
           };
           setLocationState(coords);
+          const now = Date.now();
+          if (now - lastReportRef.current >= LOCATION_REPORT_INTERVAL) {
+            lastReportRef.current = now;
+            reportLocation({ lat: coords.latitude, lng: coords.longitude, active: true });
+          }
           setMapRegion({
             latitude: coords.latitude,
             longitude: coords.longitude,
@@ -133,6 +161,7 @@ export default function VendorLocationScreen({ navigation }) {
       );
       watcherRef.current.remove = () => {
         isActive = false;
+        reportLocation({ active: false });
         firestore()
           .collection('users')
           .doc(vendorId)